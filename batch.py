@@ -0,0 +1,262 @@
+"""Headless batch processing: study notes and quizzes for many topics at once
+
+Reads one topic per line from a file (or stdin with "-"), researches each
+topic on Wikipedia and writes a markdown and a JSON artifact per topic.
+Topics that already have a fully generated JSON artifact are skipped, so an
+interrupted run resumes where it stopped; topics whose notes or quiz fell
+back to the basic versions because Groq failed are marked "degraded" and
+retried.
+
+    export GROQ_API_KEY=...
+    python batch.py topics.txt --out-dir study_output --concurrency 8
+    cat topics.txt | python batch.py - --llm-concurrency 2 --no-quiz
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from studyhelper import StudyTools, get_instrumentation, get_token_usage
+
+
+def read_topics(source):
+    """Read topics from a path or stdin ("-"), skipping blanks, comments and duplicates"""
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        topics, seen = [], set()
+        for line in stream:
+            topic = line.strip()
+            if topic and not topic.startswith("#") and topic.casefold() not in seen:
+                seen.add(topic.casefold())
+                topics.append(topic)
+        return topics
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def artifact_name(topic):
+    """Filesystem-safe, collision-free base name for a topic's artifacts"""
+    slug = re.sub(r'[^a-z0-9]+', '-', topic.lower()).strip('-')[:60] or "topic"
+    return f"{slug}-{hashlib.sha1(topic.encode('utf-8')).hexdigest()[:6]}"
+
+
+def is_done(out_dir, topic):
+    """True when a previous run already produced a fully generated artifact for topic
+
+    Errors and "degraded" records (basic notes or quiz after a Groq failure)
+    are not done, so the next run tries them again.
+    """
+    path = os.path.join(out_dir, artifact_name(topic) + ".json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("status") == "ok"
+    except (OSError, ValueError):
+        return False
+
+
+def write_atomic(path, text):
+    """Write via a temporary file so an interrupted run never leaves half an artifact"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def render_markdown(record):
+    """Markdown study sheet for one topic"""
+    lines = [f"# {record['title']}", ""]
+    if record.get("url"):
+        lines += [f"Source: {record['url']}", ""]
+    lines += ["## Summary", "", record["summary"], ""]
+    if record.get("notes"):
+        lines += ["## Study Notes", "", record["notes"]["content"].strip(), ""]
+    if record.get("quiz"):
+        lines += [f"## Quiz ({record['difficulty']})", ""]
+        for i, item in enumerate(record["quiz"], 1):
+            lines.append(f"{i}. {item['question']}")
+            lines += [f"   - {option}" for option in item.get("options", [])]
+        lines.append("")
+        answered = [(i, item) for i, item in enumerate(record["quiz"], 1) if item.get("answer")]
+        if answered:
+            lines += ["### Answer Key", ""]
+            lines += [f"{i}. {item['answer']}" for i, item in answered]
+            lines.append("")
+    return "\n".join(lines)
+
+
+def interrupted(record, stop):
+    """Mark record as interrupted once the run is stopping; checked between stages"""
+    if stop.is_set():
+        record["status"] = "interrupted"
+    return stop.is_set()
+
+
+def process_topic(topic, args, api_key, llm_slots, stop):
+    """Research one topic and generate its artifacts; returns the JSON record"""
+    started = time.perf_counter()
+    with StudyTools.headless(api_key):
+        tokens_before = StudyTools.token_count()
+        result = StudyTools.search_wikipedia(topic)
+        record = {
+            "topic": topic,
+            "status": "error",
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "difficulty": args.difficulty
+        }
+        if not result["success"]:
+            record["error"] = result.get("error") or result["content"]
+            return record
+
+        record.update(title=result["title"], url=result.get("url", ""), summary=result["content"])
+        content = result["content"]
+        if interrupted(record, stop):
+            return record
+
+        # Wikipedia fetches run at full concurrency; Groq generations share a smaller pool of slots
+        fallbacks = []
+        with llm_slots:
+            if interrupted(record, stop):
+                return record
+            if not args.no_notes:
+                failures_before = StudyTools.failed_call_count()
+                notes = None
+                if args.full_article:
+                    # One Groq call at a time, so a topic holds exactly one of the llm_slots
+                    notes = StudyTools.generate_full_article_notes(result["title"], topic, max_workers=1)
+                if notes is None:
+                    notes = StudyTools.generate_enhanced_notes_with_ai(content, topic)
+                enhanced = notes.get("enhanced", False)
+                record["notes"] = {"enhanced": enhanced, "content": notes["content"]}
+                if not enhanced and StudyTools.failed_call_count() > failures_before:
+                    fallbacks.append("notes")
+            if interrupted(record, stop):
+                return record
+            if not args.no_quiz:
+                failures_before = StudyTools.failed_call_count()
+                record["quiz"] = StudyTools.generate_enhanced_quiz_with_ai(
+                    content, topic, args.difficulty, args.num_questions
+                )
+                # Easy quizzes never call Groq; a failed call means basic questions filled the quiz
+                if StudyTools.failed_call_count() > failures_before:
+                    fallbacks.append("quiz")
+
+        # Basic fallbacks are still written, but the topic is retried on the next run
+        record["status"] = "degraded" if fallbacks else "ok"
+        if fallbacks:
+            record["error"] = f"Groq failed; basic {' and '.join(fallbacks)} written instead"
+        record["tokens"] = StudyTools.token_count() - tokens_before
+        record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate study notes and quizzes for a list of topics.")
+    parser.add_argument("topics", help="file with one topic per line, or - for stdin")
+    parser.add_argument("--out-dir", default="study_output", help="directory for the artifacts")
+    parser.add_argument("--concurrency", type=int, default=4, help="topics processed at once")
+    parser.add_argument("--llm-concurrency", type=int, default=None,
+                        help="simultaneous Groq generations (defaults to --concurrency)")
+    parser.add_argument("--difficulty", choices=["easy", "medium", "hard"], default="medium")
+    parser.add_argument("--num-questions", type=int, default=5)
+    parser.add_argument("--full-article", action="store_true",
+                        help="map-reduce notes over the full article (its parts are summarised one at a time)")
+    parser.add_argument("--no-notes", action="store_true", help="skip notes generation")
+    parser.add_argument("--no-quiz", action="store_true", help="skip quiz generation")
+    parser.add_argument("--metrics", default=None,
+                        help="write per-stage timings, retries, tokens and cache outcomes here (Prometheus text)")
+    parser.add_argument("--api-key", default=os.environ.get("GROQ_API_KEY"),
+                        help="Groq API key (defaults to $GROQ_API_KEY)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    # Easy quizzes are built locally, so only notes and medium/hard quizzes need Groq
+    if not args.api_key and not (args.no_notes and (args.no_quiz or args.difficulty == "easy")):
+        parser.error("a Groq API key is required (--api-key or GROQ_API_KEY) unless --no-notes "
+                     "and either --no-quiz or --difficulty easy")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    topics = read_topics(args.topics)
+    pending = [t for t in topics if not is_done(args.out_dir, t)]
+    skipped = len(topics) - len(pending)
+    print(f"{len(topics)} topics, {skipped} already done, {len(pending)} to process", file=sys.stderr)
+
+    llm_slots = threading.BoundedSemaphore(args.llm_concurrency or args.concurrency)
+    stop = threading.Event()
+    usage_before = get_token_usage().snapshot()
+    started = time.perf_counter()
+    counts = {"ok": 0, "degraded": 0, "failed": 0}
+    saved = set()
+
+    def save(future, topic):
+        saved.add(future)
+        try:
+            record = future.result()
+        except Exception as e:
+            record = {"topic": topic, "status": "error", "error": str(e)}
+        if record["status"] == "interrupted":
+            return
+
+        base = os.path.join(args.out_dir, artifact_name(topic))
+        write_atomic(base + ".json", json.dumps(record, indent=2, ensure_ascii=False))
+        if record["status"] in ("ok", "degraded"):
+            write_atomic(base + ".md", render_markdown(record))
+        progress = f"[{len(saved)}/{len(pending)}]"
+        if record["status"] == "ok":
+            counts["ok"] += 1
+            print(f"{progress} ok     {topic} ({record['elapsed_seconds']:.1f}s)", file=sys.stderr)
+        elif record["status"] == "degraded":
+            counts["degraded"] += 1
+            print(f"{progress} degraded {topic}: {record['error']}", file=sys.stderr)
+        else:
+            counts["failed"] += 1
+            print(f"{progress} failed {topic}: {record.get('error')}", file=sys.stderr)
+
+    executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    futures = {}
+    try:
+        futures = {executor.submit(process_topic, t, args, args.api_key, llm_slots, stop): t for t in pending}
+        for future in as_completed(futures):
+            save(future, futures[future])
+    except KeyboardInterrupt:
+        # Running topics stop at their next stage; a Groq call already in flight cannot be cut short
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        running = [f for f in futures if f not in saved and not f.cancelled()]
+        print(f"Interrupted; waiting for {len(running)} running topics to finish their current step "
+              "(Ctrl-C again to stop waiting and discard them)...", file=sys.stderr)
+        try:
+            for future in as_completed(running):
+                save(future, futures[future])
+        except KeyboardInterrupt:
+            pass
+        print("Finished topics are saved and will be skipped next run.", file=sys.stderr)
+        return 130
+    executor.shutdown()
+    succeeded, degraded, failed = counts["ok"], counts["degraded"], counts["failed"]
+
+    elapsed = time.perf_counter() - started
+    usage_after = get_token_usage().snapshot()
+    tokens = usage_after["total_tokens"] - usage_before["total_tokens"]
+    completion_tokens = usage_after["completion_tokens"] - usage_before["completion_tokens"]
+    print(
+        f"\nDone in {elapsed:.1f}s: {succeeded} ok, {degraded} degraded, {failed} failed, {skipped} skipped\n"
+        f"Throughput: {succeeded / elapsed * 60 if elapsed else 0:.1f} topics/min, "
+        f"{tokens / elapsed if elapsed else 0:.0f} tokens/s "
+        f"({completion_tokens / elapsed if elapsed else 0:.0f} completion tokens/s, "
+        f"{usage_after['requests'] - usage_before['requests']} Groq requests)",
+        file=sys.stderr
+    )
+    if args.metrics:
+        write_atomic(args.metrics, get_instrumentation().render())
+    return 1 if failed or degraded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Benchmark for the BM25 search index (studyhelper.search_index.SearchIndex)
+
+Builds indexes of increasing size from synthetic articles with a Zipf-like
+vocabulary, then reports build throughput, on-disk size and query latency
+(p50/p95) for one- to three-word queries.
+
+    python benchmarks/bench_bm25.py
+    python benchmarks/bench_bm25.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from studyhelper.search_index import SearchIndex  # noqa: E402
+
+VOCABULARY = [f"term{i}" for i in range(50_000)]
+CUMULATIVE_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+
+def synthetic_articles(count, words_per_article=120, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        words = rng.choices(VOCABULARY, cum_weights=CUMULATIVE_WEIGHTS, k=words_per_article)
+        yield f"Article {i} {words[0]}", " ".join(words)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench(size, queries=200):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.sqlite3")
+        index = SearchIndex(path, flush_every=2000)
+        started = time.perf_counter()
+        for title, content in synthetic_articles(size):
+            index.add(title, content)
+        index.flush()
+        build = time.perf_counter() - started
+        disk_mb = sum(
+            os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp)
+        ) / 1e6
+
+        rng = random.Random(1)
+        latencies = []
+        for _ in range(queries):
+            query = " ".join(rng.choices(VOCABULARY[:5000], k=rng.randint(1, 3)))
+            started = time.perf_counter()
+            index.search(query, limit=10)
+            latencies.append((time.perf_counter() - started) * 1000)
+        return size / build, disk_mb, percentile(latencies, 0.5), percentile(latencies, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'documents':>10} {'build docs/s':>13} {'disk MB':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for size in args.sizes:
+        rate, disk_mb, p50, p95 = bench(size)
+        print(f"{size:>10} {rate:>13.0f} {disk_mb:>8.1f} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""End-to-end benchmark of StudyTools and the StudyHelper modes against local fakes
+
+Starts the stand-in Wikipedia and Groq servers from fake_services.py,
+points StudyHelper at them (STUDYHELPER_WIKIPEDIA_URL, GROQ_BASE_URL) with a
+throwaway cache directory, then runs each scenario and reports p50, p95
+and p99 latency, throughput and Python allocations per operation. UI
+scenarios drive the whole Streamlit script through streamlit.testing's
+AppTest and are skipped when it is unavailable. No credentials or
+network access are needed, so runs are comparable between commits:
+
+    python benchmarks/bench_end_to_end.py --json results.json
+    python benchmarks/bench_end_to_end.py --groq-latency 300 --rate-limit-rate 0.05 --baseline results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_services import FakeGroq, FakeWikipedia  # noqa: E402
+
+API_KEY = "bench-key"
+ARTICLE_POOL = 16
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def tool_scenarios(tools):
+    """name -> function(i) running one StudyTools operation for iteration i"""
+    with tools.headless(API_KEY):
+        articles = [tools.search_wikipedia(f"Topic {n}")['content'] for n in range(ARTICLE_POOL)]
+
+    def article(i):
+        # Articles are fetched up front; the topic name in each prompt keeps the LLM cache cold
+        return articles[i % len(articles)]
+
+    def grade(i):
+        items = tools.generate_basic_quiz(article(i), "medium", 5, f"Topic {i}")
+        answers = {}
+        for n, item in enumerate(items, 1):
+            if item['type'] == "matching":
+                # Matching questions are answered with a term -> statement mapping, as the UI does
+                first = next(iter(item['pairs'].values()))
+                answers[n] = {term: first for term in item['pairs']}
+            else:
+                answers[n] = f"An answer about the energy and protein of topic {i}"
+        return tools.grade_quiz(items, answers, article(i), f"Topic {i}", use_cache=False)
+
+    return {
+        "search_wikipedia.cold": lambda i: tools.search_wikipedia(f"Cold topic {i}", use_cache=False),
+        "search_wikipedia.cached": lambda i: tools.search_wikipedia("Photosynthesis"),
+        "fetch_summaries.batch20": lambda i: tools.fetch_summaries(
+            [f"Batch {i} item {n}" for n in range(20)], use_cache=False
+        ),
+        "related_topics": lambda i: tools.get_related_topics(f"Related {i}"),
+        "groq.call": lambda i: tools.call_groq_api(f"Summarize topic number {i}.", max_tokens=300, use_cache=False),
+        "quiz.ai": lambda i: tools.generate_enhanced_quiz_with_ai(article(i), f"Topic {i}", "medium", 5,
+                                                                  use_cache=False),
+        "quiz.ai_streamed": lambda i: tools.generate_enhanced_quiz_with_ai(
+            article(i), f"Topic {i}", "hard", 5, on_question=lambda question: None, use_cache=False
+        ),
+        "quiz.easy": lambda i: tools.generate_enhanced_quiz_with_ai(article(i), f"Topic {i}", "easy", 5),
+        "quiz.grade": grade,
+        "notes.ai": lambda i: tools.generate_enhanced_notes_with_ai(article(i), f"Topic {i}"),
+        "notes.full_article": lambda i: tools.generate_full_article_notes(f"Long topic {i}", f"Long topic {i}"),
+    }
+
+
+def ui_scenarios():
+    """name -> function(i) running the whole Streamlit script for one study mode, or {} without AppTest"""
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return {}
+    script = os.path.join(REPO_DIR, "app.py")
+
+    def study(mode, topic=True):
+        def run(i):
+            at = AppTest.from_file(script, default_timeout=120)
+            at.session_state["groq_api_key"] = API_KEY
+            at.run()
+            next(box for box in at.selectbox if box.label.startswith("📚")).select(mode)
+            if topic:
+                next(box for box in at.text_input if box.label.startswith("🎯")).input(f"UI topic {i}")
+                next(button for button in at.button if button.label.startswith("🔍")).click()
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+        return run
+
+    return {
+        "ui.research": study("📖 Research & Learn"),
+        "ui.quiz": study("📝 Quiz Mode"),
+        "ui.notes": study("📋 Study Notes"),
+        "ui.related": study("🔗 Related Topics"),
+        "ui.review": study("🧠 Review Cards", topic=False),
+    }
+
+
+def run_scenario(func, iterations, concurrency, alloc_iterations, offset):
+    """Time iterations of func, then measure allocations over a few more"""
+    def timed(i):
+        started = time.perf_counter()
+        try:
+            func(i)
+            return time.perf_counter() - started, False
+        except Exception:
+            return time.perf_counter() - started, True
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(timed, range(offset, offset + iterations)))
+    else:
+        results = [timed(i) for i in range(offset, offset + iterations)]
+    wall = time.perf_counter() - started
+    latencies = [seconds * 1000 for seconds, _ in results]
+
+    allocated = peak = 0
+    for i in range(offset + iterations, offset + iterations + alloc_iterations):
+        tracemalloc.start()
+        try:
+            func(i)
+        except Exception:
+            pass
+        snapshot_size, snapshot_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        allocated += snapshot_size
+        peak += snapshot_peak
+
+    return {
+        'iterations': iterations,
+        'errors': sum(failed for _, failed in results),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'throughput_per_s': round(iterations / wall, 2) if wall else None,
+        'retained_kb_per_op': round(allocated / alloc_iterations / 1024, 1) if alloc_iterations else None,
+        'peak_kb_per_op': round(peak / alloc_iterations / 1024, 1) if alloc_iterations else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20, help="timed operations per scenario")
+    parser.add_argument("--alloc-iterations", type=int, default=3, help="operations traced for allocations")
+    parser.add_argument("--concurrency", type=int, default=1, help="threads running StudyTools scenarios")
+    parser.add_argument("--scenarios", nargs="+", help="only run scenarios whose name starts with one of these")
+    parser.add_argument("--wiki-latency", type=float, default=20, help="Wikipedia latency in ms")
+    parser.add_argument("--groq-latency", type=float, default=150, help="Groq time to first byte in ms")
+    parser.add_argument("--token-interval", type=float, default=2, help="ms between streamed Groq chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of Groq requests answered with 429")
+    parser.add_argument("--json", help="write the results here instead of stdout")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+
+    wiki = FakeWikipedia(latency=args.wiki_latency / 1000, error_rate=args.error_rate, seed=1).start()
+    groq = FakeGroq(latency=args.groq_latency / 1000, token_interval=args.token_interval / 1000,
+                    error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=2).start()
+    cache_dir = tempfile.mkdtemp(prefix="studyhelper-bench-")
+    os.environ.update({
+        "STUDYHELPER_WIKIPEDIA_URL": wiki.url,
+        "GROQ_BASE_URL": groq.url,
+        "STUDYHELPER_CACHE_DIR": cache_dir,
+        # The limiter would otherwise pace the run at the free tier's 30 requests per minute
+        "STUDYHELPER_GROQ_RPM": "1000000",
+        "STUDYHELPER_GROQ_TPM": "1000000000",
+    })
+    # Configuration is read at import time, so only after the environment is set
+    from studyhelper import StudyTools
+
+    scenarios = {**tool_scenarios(StudyTools), **ui_scenarios()}
+    if args.scenarios:
+        scenarios = {name: func for name, func in scenarios.items() if name.startswith(tuple(args.scenarios))}
+
+    results = {}
+    print(f"{'scenario':<26} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>8} {'peak KB':>9} {'errors':>6}",
+          file=sys.stderr)
+    for offset, (name, func) in enumerate(scenarios.items()):
+        concurrency = 1 if name.startswith("ui.") else args.concurrency
+        if not name.startswith("ui."):
+            # StudyTools runs outside a Streamlit script here, like batch.py's workers
+            def func(i, operation=func):
+                with StudyTools.headless(API_KEY):
+                    return operation(i)
+        result = run_scenario(func, args.iterations, concurrency, args.alloc_iterations, offset * 1000)
+        results[name] = result
+        print(f"{name:<26} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+              f"{result['throughput_per_s']:>8.1f} {result['peak_kb_per_op'] or 0:>9.0f} {result['errors']:>6}",
+              file=sys.stderr)
+    wiki.stop()
+    groq.stop()
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'config': {key: value for key, value in vars(args).items() if key not in ("json", "baseline")},
+        'fake_services': {'wikipedia': wiki.stats, 'groq': groq.stats},
+        'scenarios': results,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)['scenarios']
+        print(f"\nChange against {args.baseline} (negative is faster):", file=sys.stderr)
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before and before['p50_ms'] and before['p95_ms']:
+                print(f"{name:<26} p50 {result['p50_ms'] / before['p50_ms'] - 1:>+7.1%}  "
+                      f"p95 {result['p95_ms'] / before['p95_ms'] - 1:>+7.1%}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
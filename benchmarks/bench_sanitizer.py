@@ -0,0 +1,76 @@
+"""Micro-benchmark for StudyTools._clean_text_for_api
+
+Compares the precompiled sanitizer against the previous implementation on
+10 KB - 1 MB inputs, checks that both produce identical output, and prints
+throughput in MB/s.
+
+    python benchmarks/bench_sanitizer.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from studyhelper.tools import StudyTools  # noqa: E402
+
+
+def legacy_clean_text_for_api(text):
+    """The sanitizer as it was before it was precompiled"""
+    emoji_pattern = re.compile("["
+                             u"\U0001F600-\U0001F64F"
+                             u"\U0001F300-\U0001F5FF"
+                             u"\U0001F680-\U0001F6FF"
+                             u"\U0001F1E0-\U0001F1FF"
+                             u"\U00002702-\U000027B0"
+                             u"\U000024C2-\U0001F251"
+                             u"\U0001F900-\U0001F9FF"
+                             "]+", flags=re.UNICODE)
+    text = emoji_pattern.sub(r'', text)
+    replacements = {
+        '📖': 'Overview',
+        '🔑': 'Key Points',
+        '📚': 'Important Terms',
+        '💡': 'Key Facts',
+        '🌐': 'Connections',
+        '🎯': 'Study Tips',
+        '❓': 'Review Questions',
+        '##': 'Section:',
+        '•': '-'
+    }
+    for old, new in replacements.items():
+        text = text.replace(old, new)
+    return text.encode('ascii', 'ignore').decode('ascii')
+
+
+SAMPLE = (
+    "Photosynthesis is the process • used by plants — ## Overview 📖 "
+    "Light-dependent reactions take place in the thylakoid membranes (émigré, 中文). "
+)
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def throughput(func, text, budget=2_000_000):
+    rounds = max(1, budget // len(text))
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func(text)
+    elapsed = (time.perf_counter() - started) / rounds
+    return len(text) / elapsed / 1e6
+
+
+def main():
+    print(f"{'size':>9}  {'input':<6} {'legacy MB/s':>12} {'current MB/s':>13} {'speedup':>8}")
+    for size in SIZES:
+        mixed = (SAMPLE * (size // len(SAMPLE) + 1))[:size]
+        ascii_only = mixed.encode('ascii', 'ignore').decode('ascii')
+        for label, text in (("mixed", mixed), ("ascii", ascii_only)):
+            assert StudyTools._clean_text_for_api(text) == legacy_clean_text_for_api(text)
+            old = throughput(legacy_clean_text_for_api, text)
+            new = throughput(StudyTools._clean_text_for_api, text)
+            print(f"{size:>9}  {label:<6} {old:>12.1f} {new:>13.1f} {new / old:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
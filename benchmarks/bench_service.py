@@ -0,0 +1,180 @@
+"""Load benchmark of the HTTP service (python -m studyhelper.service) against local fakes
+
+Starts the stand-in Wikipedia and Groq servers from fake_services.py and
+the service in this process, then fires --requests requests per endpoint
+with --concurrency of them in flight, spread over --keys API keys, and
+reports p50, p95 and p99 latency, throughput and the status codes seen.
+The cancel scenario disconnects quiz requests after a short wait and
+reports how long the service takes to release their slots:
+
+    python benchmarks/bench_service.py --concurrency 300 --requests 600
+    python benchmarks/bench_service.py --max-concurrency-per-key 4 --keys 1 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_end_to_end import git_commit, percentile  # noqa: E402
+from fake_services import FakeGroq, FakeWikipedia  # noqa: E402
+
+ARTICLE_POOL = 64
+
+
+def bodies(endpoint, i):
+    """Request body for the i-th request to endpoint; the topic name keeps the LLM cache cold"""
+    topic = f"Topic {i % ARTICLE_POOL}"
+    if endpoint == "quiz":
+        return {'topic': topic, 'difficulty': "medium", 'num_questions': 5, 'fresh': True}
+    if endpoint == "notes":
+        return {'topic': topic, 'content': f"Notes request {i}. " + "Energy flows through the cell membrane. " * 8}
+    return {'topic': topic}
+
+
+async def run_endpoint(session, base_url, endpoint, requests, concurrency, keys):
+    """Latency and status of each request, with at most concurrency in flight"""
+    in_flight = asyncio.Semaphore(concurrency)
+    timings, statuses = [], Counter()
+
+    async def one(i):
+        async with in_flight:
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{base_url}/v1/{endpoint}", json=bodies(endpoint, i),
+                                        headers={'Authorization': f"Bearer bench-key-{i % keys}"}) as response:
+                    await response.read()
+                    statuses[response.status] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            timings.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        'p50_ms': round(percentile(timings, 0.50), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'p99_ms': round(percentile(timings, 0.99), 2),
+        'throughput_per_s': round(requests / elapsed, 1),
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+    }
+
+
+async def run_cancel(session, base_url, tools, requests, after):
+    """Disconnect requests after `after` seconds; returns how long the service takes to release them"""
+    async def one(i):
+        async with session.post(f"{base_url}/v1/quiz", json=bodies("quiz", i),
+                                headers={'Authorization': "Bearer bench-cancel"}) as response:
+            await response.read()
+
+    tasks = [asyncio.ensure_future(one(i)) for i in range(requests)]
+    await asyncio.sleep(after)
+    held = sum(count for _, count in tools._slots.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    started = time.perf_counter()
+    while tools._slots and time.perf_counter() - started < 10:
+        await asyncio.sleep(0.005)
+    return {
+        'requests': requests,
+        'in_flight_before_cancel': held,
+        'released': not tools._slots,
+        'release_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+async def run(args):
+    import aiohttp
+    from aiohttp import web
+
+    from studyhelper.service import TOOLS, create_app
+
+    app = create_app(api_key=None, max_concurrency_per_key=args.max_concurrency_per_key,
+                     max_queue_wait=args.max_queue_wait)
+    runner = web.AppRunner(app, handler_cancellation=True, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    base_url = f"http://{host}:{port}"
+
+    results = {}
+    connector = aiohttp.TCPConnector(limit=0)
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=300)) as session:
+            print(f"{'endpoint':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}  statuses",
+                  file=sys.stderr)
+            for endpoint in args.endpoints:
+                result = await run_endpoint(session, base_url, endpoint, args.requests, args.concurrency, args.keys)
+                results[endpoint] = result
+                print(f"{endpoint:<10} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+                      f"{result['throughput_per_s']:>8.1f}  {result['statuses']}", file=sys.stderr)
+            if args.cancel:
+                result = await run_cancel(session, base_url, app[TOOLS], args.cancel, args.groq_latency / 2000)
+                results['cancel'] = result
+                print(f"\ncancel: {result['in_flight_before_cancel']} of {result['requests']} requests in flight, "
+                      f"{'released' if result['released'] else 'NOT released'} in {result['release_ms']:.1f} ms",
+                      file=sys.stderr)
+    finally:
+        await runner.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=200, help="requests in flight at once")
+    parser.add_argument("--keys", type=int, default=4, help="API keys the requests are spread over")
+    parser.add_argument("--endpoints", nargs="+", default=["research", "related", "notes", "quiz"],
+                        choices=["research", "related", "notes", "quiz"])
+    parser.add_argument("--max-concurrency-per-key", type=int, default=64)
+    parser.add_argument("--max-queue-wait", type=float, default=60)
+    parser.add_argument("--cancel", type=int, default=100, help="quiz requests disconnected mid-flight (0 to skip)")
+    parser.add_argument("--wiki-latency", type=float, default=20, help="Wikipedia latency in ms")
+    parser.add_argument("--groq-latency", type=float, default=150, help="Groq time to first byte in ms")
+    parser.add_argument("--json", help="write the results here instead of stdout")
+    args = parser.parse_args()
+
+    wiki = FakeWikipedia(latency=args.wiki_latency / 1000, seed=1).start()
+    groq = FakeGroq(latency=args.groq_latency / 1000, seed=2).start()
+    os.environ.update({
+        "STUDYHELPER_WIKIPEDIA_URL": wiki.url,
+        "GROQ_BASE_URL": groq.url,
+        "STUDYHELPER_CACHE_DIR": tempfile.mkdtemp(prefix="studyhelper-bench-"),
+        # The limiter would otherwise pace the run at the free tier's 30 requests per minute
+        "STUDYHELPER_GROQ_RPM": "1000000",
+        "STUDYHELPER_GROQ_TPM": "1000000000",
+    })
+    results = asyncio.run(run(args))
+    wiki.stop()
+    groq.stop()
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'config': {key: value for key, value in vars(args).items() if key != "json"},
+        'fake_services': {'wikipedia': wiki.stats, 'groq': groq.stats},
+        'endpoints': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Startup and per-rerun cost of the studyhelper package and the Streamlit script
+
+Imports each entry point in a fresh interpreter under ``python -X importtime``
+and reports the cumulative import time and which heavy dependencies
+(groq, httpx, requests, numpy) were loaded. Then runs app.py the way
+Streamlit does on every interaction and reports the first run, which
+includes the imports, and the median rerun. Pass an older app.py with
+--script to compare, e.g. the single-file version from before the split:
+
+    python benchmarks/bench_startup.py
+    git show <commit>:app.py > /tmp/old_app.py && python benchmarks/bench_startup.py --script /tmp/old_app.py
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    "studyhelper",
+    "studyhelper.config",
+    "studyhelper.history",
+    "studyhelper.review",
+    "studyhelper.tools",
+    "studyhelper.ui",
+]
+HEAVY_MODULES = ["streamlit", "groq", "httpx", "requests", "numpy"]
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def import_profile(module, repeat):
+    """Median cumulative import time of module (ms) and the heavy modules it pulled in"""
+    probe = f"import sys, json; import {module}; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    timings, loaded = [], []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=REPO_DIR,
+                              capture_output=True, text=True)
+        if proc.returncode:
+            return None, proc.stderr.strip().splitlines()[-1]
+        # module and its parent packages are top-level lines; their cumulative times add up to the total
+        parts = module.split(".")
+        names = {".".join(parts[:i]) for i in range(1, len(parts) + 1)}
+        total = 0
+        for line in proc.stderr.splitlines():
+            match = _IMPORTTIME_RE.match(line)
+            if match and match.group(3) == " " and match.group(4) in names:
+                total += int(match.group(2))
+        timings.append(total / 1000)
+        loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    return statistics.median(timings), loaded
+
+
+def rerun_profile(script, reruns):
+    """First run and median rerun of script (ms), in a fresh interpreter like a new Streamlit server"""
+    code = f"""
+import json, logging, runpy, time
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+timings = []
+for _ in range({reruns + 1}):
+    started = time.perf_counter()
+    runpy.run_path({script!r}, run_name="__main__")
+    timings.append((time.perf_counter() - started) * 1000)
+print(json.dumps(timings))
+"""
+    proc = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+    if proc.returncode:
+        return None, proc.stderr.strip().splitlines()[-1]
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    return timings[0], statistics.median(timings[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per entry point")
+    parser.add_argument("--reruns", type=int, default=20, help="script reruns after the first run")
+    parser.add_argument("--script", default=os.path.join(REPO_DIR, "app.py"), help="Streamlit script to rerun")
+    parser.add_argument("--json", help="write the results here as well")
+    args = parser.parse_args()
+
+    results = {'imports': {}, 'script': None}
+    print(f"{'import':<24} {'ms':>8}  heavy modules loaded")
+    for module in ENTRY_POINTS:
+        elapsed, loaded = import_profile(module, args.repeat)
+        if elapsed is None:
+            print(f"{module:<24} {'failed':>8}  {loaded}")
+            continue
+        results['imports'][module] = {'ms': round(elapsed, 2), 'loaded': loaded}
+        print(f"{module:<24} {elapsed:>8.1f}  {', '.join(loaded) or '-'}")
+
+    first, rerun = rerun_profile(os.path.abspath(args.script), args.reruns)
+    if first is None:
+        print(f"\n{args.script}: failed ({rerun})")
+    else:
+        results['script'] = {'path': args.script, 'first_ms': round(first, 2), 'rerun_ms': round(rerun, 2)}
+        print(f"\n{args.script}: first run {first:.1f} ms, median rerun {rerun:.1f} ms")
+
+    if args.json:
+        results['created'] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Local stand-ins for the Wikipedia and Groq APIs used by the benchmarks
+
+FakeWikipedia serves the REST page summary endpoint and the action API
+(opensearch, list=search, batched intro extracts and full-article
+extracts) from deterministic synthetic articles. FakeGroq serves
+OpenAI-style chat completions, streamed or not, with replies shaped like
+the quiz, grading and notes prompts StudyHelper sends. Both inject a
+fixed latency, server errors and 429s at configurable rates, and run in
+a daemon thread:
+
+    with FakeWikipedia(latency=0.05) as wiki, FakeGroq(latency=0.3, rate_limit_rate=0.05) as groq:
+        os.environ["STUDYHELPER_WIKIPEDIA_URL"] = wiki.url
+        os.environ["GROQ_BASE_URL"] = groq.url
+        from studyhelper import StudyTools
+"""
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+VOCABULARY = """
+energy membrane protein enzyme carbon oxygen nitrogen molecule structure pathway signal cell tissue
+reaction gradient pigment receptor compound sugar acid cycle process system network layer field
+pressure current theory model method measurement experiment sample population species habitat climate
+""".split()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 refuses connections when hundreds of clients connect at once
+    request_queue_size = 1024
+
+
+class FakeService:
+    """Threaded HTTP server with latency, error and 429 injection shared by the fakes"""
+
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'rate_limited': 0}
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, as the real services allow
+
+            def do_GET(self):
+                service._dispatch(self, "GET")
+
+            def do_POST(self):
+                service._dispatch(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _dispatch(self, handler, method):
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        with self._lock:
+            self.stats['requests'] += 1
+            roll = self._rng.random()
+        if self.latency:
+            time.sleep(self.latency)
+
+        if roll < self.rate_limit_rate:
+            with self._lock:
+                self.stats['rate_limited'] += 1
+            self.send_json(handler, 429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                           {"Retry-After": str(self.retry_after)})
+            return
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.stats['errors'] += 1
+            self.send_json(handler, 500, {"error": {"message": "Injected server error"}})
+            return
+
+        parts = urlsplit(handler.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        try:
+            self.handle(handler, method, unquote(parts.path), query, body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def handle(self, handler, method, path, query, body):
+        raise NotImplementedError
+
+    @staticmethod
+    def send_json(handler, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+class FakeWikipedia(FakeService):
+    """Wikipedia REST summary and action API over synthetic articles
+
+    Titles starting with "Missing" do not exist. Every other title has a
+    deterministic lead section and full_sections further sections.
+    """
+
+    def __init__(self, full_sections=12, **kwargs):
+        super().__init__(**kwargs)
+        self.full_sections = full_sections
+
+    @staticmethod
+    def _sentences(title, count, salt=0):
+        rng = random.Random(zlib.crc32(f"{title}|{salt}".encode("utf-8")))
+        sentences = []
+        for _ in range(count):
+            a, b, c = rng.sample(VOCABULARY, 3)
+            sentences.append(rng.choice((
+                f"In {title}, the {a} {b} controls how {c} is produced.",
+                f"The {a} of {title} depends on {b} {c} and on the surrounding {rng.choice(VOCABULARY)}.",
+                f"Researchers measured {a} {b} to explain the role of {c} in {title}.",
+                f"{title} links {a} with {b}, which changes the {c} over time.",
+            )))
+        return sentences
+
+    def lead(self, title):
+        return " ".join(self._sentences(title, 6))
+
+    def full_text(self, title):
+        sections = [self.lead(title)]
+        for number in range(1, self.full_sections + 1):
+            sections.append(f"== Section {number} ==\n" + " ".join(self._sentences(title, 10, number)))
+        return "\n\n".join(sections)
+
+    def page_url(self, title):
+        return f"{self.url}/wiki/{title.replace(' ', '_')}"
+
+    def handle(self, handler, method, path, query, body):
+        if path.startswith("/api/rest_v1/page/summary/"):
+            title = path.rsplit("/", 1)[-1].replace("_", " ")
+            if title.startswith("Missing"):
+                self.send_json(handler, 404, {"title": "Not found."})
+                return
+            self.send_json(handler, 200, {
+                "title": title,
+                "extract": self.lead(title),
+                "content_urls": {"desktop": {"page": self.page_url(title)}},
+                "thumbnail": {"source": f"{self.url}/thumb/{title.replace(' ', '_')}.jpg"}
+            })
+        elif path == "/w/api.php" and query.get("action") == "opensearch":
+            search = query.get("search", "")
+            titles = [f"{search} {suffix}" for suffix in ("history", "theory", "applications", "chemistry",
+                                                          "biology", "physics", "research", "education")]
+            titles = titles[:int(query.get("limit", 10))]
+            self.send_json(handler, 200, [search, titles, [""] * len(titles), [self.page_url(t) for t in titles]])
+        elif path == "/w/api.php" and query.get("list") == "search":
+            search = query.get("srsearch", "")
+            hits = [{"title": f"{search} ({kind})"} for kind in ("science", "topic", "concept")]
+            self.send_json(handler, 200, {"query": {"search": hits[:int(query.get("srlimit", 10))]}})
+        elif path == "/w/api.php" and query.get("titles"):
+            intro = "exintro" in query
+            pages = []
+            for title in query["titles"].split("|"):
+                if title.startswith("Missing"):
+                    pages.append({"title": title, "missing": True})
+                    continue
+                page = {
+                    "title": title,
+                    "extract": self.lead(title) if intro else self.full_text(title),
+                    "fullurl": self.page_url(title)
+                }
+                if intro:
+                    page["thumbnail"] = {"source": f"{self.url}/thumb/{title.replace(' ', '_')}.jpg"}
+                pages.append(page)
+            self.send_json(handler, 200, {"batchcomplete": True, "query": {"pages": pages}})
+        else:
+            self.send_json(handler, 400, {"error": {"code": "badrequest", "info": f"Unsupported request {path}"}})
+
+
+class FakeGroq(FakeService):
+    """OpenAI-compatible chat completions answering like the model StudyHelper expects
+
+    latency is the time to the first byte; streamed replies then send one
+    chunk of a few words every token_interval seconds.
+    """
+
+    COMPLETIONS_PATH = "/openai/v1/chat/completions"
+    WORDS_PER_CHUNK = 4
+
+    def __init__(self, token_interval=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.token_interval = token_interval
+
+    @staticmethod
+    def reply(prompt, max_tokens):
+        """A completion shaped like what the prompt asks for"""
+        if "JSON array of question objects" in prompt:
+            count = re.search(r'(?:Create exactly|Write) (\d+)', prompt)
+            count = int(count.group(1)) if count else 5
+            stamp = zlib.crc32(prompt.encode("utf-8"))
+            questions = []
+            for i in range(1, count + 1):
+                word = VOCABULARY[(stamp + i) % len(VOCABULARY)]
+                if i % 2:
+                    options = [VOCABULARY[(stamp + i + k) % len(VOCABULARY)] for k in range(4)]
+                    questions.append({"question": f"Which term best describes the {word} step number {i}?",
+                                      "type": "multiple_choice", "options": options, "answer": options[0],
+                                      "source": ""})
+                else:
+                    questions.append({"question": f"How does the {word} affect the process described in part {i}?",
+                                      "type": "short_answer", "options": [],
+                                      "answer": f"The {word} changes the rate of the process.", "source": ""})
+            return json.dumps(questions, indent=1)
+        if "Student answer:" in prompt:
+            ids = [int(i) for i in re.findall(r'Q(\d+):', prompt)]
+            return json.dumps([{"id": i, "verdict": ("correct", "partial", "incorrect")[i % 3],
+                                "feedback": "Compared with the reference material."} for i in ids])
+        words = max(40, min(max_tokens, 1500) * 3 // 4)
+        lines = ["Section: Overview", ""]
+        while sum(len(line.split()) for line in lines) < words:
+            n = len(lines)
+            lines.append(f"- The {VOCABULARY[n % len(VOCABULARY)]} relates to the "
+                         f"{VOCABULARY[(n * 7) % len(VOCABULARY)]} through a measurable process.")
+        return "\n".join(lines)
+
+    def handle(self, handler, method, path, query, body):
+        if method != "POST" or path != self.COMPLETIONS_PATH:
+            self.send_json(handler, 404, {"error": {"message": f"Unknown endpoint {path}"}})
+            return
+        request = json.loads(body or b"{}")
+        prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+        text = self.reply(prompt, request.get("max_tokens") or 1024)
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        model = request.get("model", "fake")
+        created = int(time.time())
+
+        if not request.get("stream"):
+            self.send_json(handler, 200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop", "logprobs": None}],
+                "usage": usage
+            })
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def send(payload):
+            data = f"data: {payload}\n\n".encode("utf-8")
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            handler.wfile.flush()
+
+        def chunk(delta, finish_reason=None, **extra):
+            return json.dumps({
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+                **extra
+            })
+
+        send(chunk({"role": "assistant", "content": ""}))
+        words = re.findall(r'\S+\s*', text)
+        for start in range(0, len(words), self.WORDS_PER_CHUNK):
+            if self.token_interval:
+                time.sleep(self.token_interval)
+            send(chunk({"content": "".join(words[start:start + self.WORDS_PER_CHUNK])}))
+        send(chunk({}, "stop", x_groq={"id": "req-fake", "usage": usage}))
+        send("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
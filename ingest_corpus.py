@@ -0,0 +1,264 @@
+"""Build an offline Wikipedia corpus for StudyHelper from a dump
+
+Streams a MediaWiki XML dump (pages-articles, optionally .bz2/.gz) or a
+JSONL file of abstracts (one {"title", "text"|"abstract"|"extract", "url",
+"redirect"} object per line) into a corpus directory that StudyHelper opens
+memory-mapped when STUDYHELPER_OFFLINE_CORPUS points at it. The lead
+section of each article is kept as plain text, and redirects are resolved
+to their target article at build time. Titles are sorted with an external
+merge sort, so memory stays bounded whatever the dump size. Articles are
+also added to the app's full-text search index unless --no-index is given.
+
+    python ingest_corpus.py enwiki-latest-pages-articles.xml.bz2 --out corpus
+    python ingest_corpus.py abstracts.jsonl --out corpus
+    STUDYHELPER_OFFLINE_CORPUS=corpus streamlit run app.py
+"""
+import argparse
+import bz2
+import gzip
+import heapq
+import html
+import json
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+from studyhelper.config import SEARCH_INDEX_PATH
+from studyhelper.corpus import OfflineCorpus
+from studyhelper.search_index import SearchIndex
+
+_LENGTH = struct.Struct("<I")
+
+# Wikitext markup, stripped in this order to get readable lead text
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_REF_RE = re.compile(r'<ref[^>/]*/>|<ref[^>]*>.*?</ref>', re.DOTALL | re.IGNORECASE)
+_TEMPLATE_RE = re.compile(r'\{\{[^{}]*\}\}')
+_TABLE_RE = re.compile(r'\{\|.*?\|\}', re.DOTALL)
+_FILE_LINK_RE = re.compile(r'\[\[(?:File|Image|Category):[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]', re.IGNORECASE)
+_WIKI_LINK_RE = re.compile(r'\[\[(?:[^|\[\]]*\|)?([^\[\]]*)\]\]')
+_EXTERNAL_LINK_RE = re.compile(r'\[(?:https?:)?//[^\s\]]+\s*([^\]]*)\]')
+_EMPHASIS_RE = re.compile(r"'{2,}")
+_BREAK_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+_HEADING_RE = re.compile(r'^==.*==\s*$', re.MULTILINE)
+
+
+def wikitext_to_text(wikitext):
+    """Plain text of an article's lead section"""
+    heading = _HEADING_RE.search(wikitext)
+    text = wikitext[:heading.start()] if heading else wikitext
+    text = _REF_RE.sub('', _COMMENT_RE.sub('', text))
+    # Templates and file links nest, so strip innermost first until nothing changes
+    for pattern in (_TEMPLATE_RE, _FILE_LINK_RE):
+        previous = None
+        while previous != text:
+            previous, text = text, pattern.sub('', text)
+    text = _TABLE_RE.sub('', text)
+    text = _WIKI_LINK_RE.sub(r'\1', text)
+    text = _EXTERNAL_LINK_RE.sub(r'\1', text)
+    text = _BREAK_RE.sub('\n', _EMPHASIS_RE.sub('', text))
+    text = html.unescape(_TAG_RE.sub('', text))
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith(('|', '!', '*', '#', ':')))
+
+
+def open_dump(path):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_xml_pages(path):
+    """Yield (title, text, url, redirect) for main-namespace pages of a MediaWiki XML dump"""
+    with open_dump(path) as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end" or elem.tag.rsplit('}', 1)[-1] != "page":
+                continue
+            fields = {child.tag.rsplit('}', 1)[-1]: child for child in elem.iter()}
+            if fields.get("ns") is None or fields["ns"].text == "0":
+                redirect = fields.get("redirect")
+                text = fields.get("text")
+                yield (
+                    fields["title"].text,
+                    wikitext_to_text(text.text or "") if redirect is None and text is not None else "",
+                    "",
+                    redirect.get("title") if redirect is not None else None
+                )
+            # Drop finished pages so memory stays flat over the whole dump
+            root.clear()
+
+
+def read_jsonl_pages(path):
+    """Yield (title, text, url, redirect) for each line of a JSONL abstracts file"""
+    with open_dump(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            text = item.get("text") or item.get("abstract") or item.get("extract") or ""
+            yield item["title"], text.strip(), item.get("url", ""), item.get("redirect")
+
+
+class SortedRuns:
+    """External sort of (key, payload) byte pairs through sorted temporary run files"""
+
+    def __init__(self, tmp_dir, name, run_size=500_000):
+        self.tmp_dir = tmp_dir
+        self.name = name
+        self.run_size = run_size
+        self._pending = []
+        self._runs = []
+
+    def add(self, key, payload):
+        self._pending.append((key, payload))
+        if len(self._pending) >= self.run_size:
+            self._spill()
+
+    def _spill(self):
+        if not self._pending:
+            return
+        path = os.path.join(self.tmp_dir, f"{self.name}-{len(self._runs)}.run")
+        self._pending.sort()
+        with open(path, "wb") as f:
+            for key, payload in self._pending:
+                f.write(_LENGTH.pack(len(key)) + key + _LENGTH.pack(len(payload)) + payload)
+        self._runs.append(path)
+        self._pending = []
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(_LENGTH.size)
+                if not header:
+                    return
+                key = f.read(_LENGTH.unpack(header)[0])
+                payload = f.read(_LENGTH.unpack(f.read(_LENGTH.size))[0])
+                yield key, payload
+
+    def __iter__(self):
+        """All pairs in key order"""
+        self._spill()
+        return heapq.merge(*(self._read_run(path) for path in self._runs))
+
+
+def write_index(out_dir, name, entries):
+    """Write a sorted (key, record offset, record length) stream as an OfflineCorpus index
+
+    Only one entry is kept per key. Returns the number of entries written.
+    """
+    count, last_key, key_offset = 0, None, 0
+    with open(os.path.join(out_dir, name + ".idx"), "wb") as idx, \
+            open(os.path.join(out_dir, name + ".keys"), "wb") as keys:
+        idx.write(OfflineCorpus.MAGIC)
+        for key, record_offset, record_length in entries:
+            if key == last_key:
+                continue
+            keys.write(key)
+            idx.write(OfflineCorpus.ENTRY.pack(key_offset, len(key), record_offset, record_length))
+            key_offset += len(key)
+            last_key = key
+            count += 1
+    return count
+
+
+def ingest(dump_path, out_dir, fmt=None, run_size=500_000, progress_every=100_000, index=None):
+    """Build a corpus directory from a dump; returns article and redirect counts
+
+    When a SearchIndex is given every article is added to it as well.
+    """
+    fmt = fmt or ("jsonl" if ".json" in dump_path else "xml")
+    pages = read_jsonl_pages(dump_path) if fmt == "jsonl" else read_xml_pages(dump_path)
+    location = struct.Struct("<QI")
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name in OfflineCorpus.INDEXES:
+        for suffix in (".idx", ".keys"):
+            if os.path.exists(os.path.join(out_dir, name + suffix)):
+                os.remove(os.path.join(out_dir, name + suffix))
+    tmp_dir = tempfile.mkdtemp(prefix="studyhelper-ingest-", dir=out_dir)
+    try:
+        articles = SortedRuns(tmp_dir, "articles", run_size)
+        redirects = SortedRuns(tmp_dir, "redirects", run_size)
+        offset = 0
+        seen = 0
+        with open(os.path.join(out_dir, OfflineCorpus.DATA_FILE), "wb") as data:
+            for title, text, url, redirect in pages:
+                seen += 1
+                if progress_every and seen % progress_every == 0:
+                    print(f"  {seen} pages read", file=sys.stderr)
+                if redirect:
+                    redirects.add(OfflineCorpus.key(title), OfflineCorpus.key(redirect))
+                    continue
+                if not text:
+                    continue
+                record = {"title": title, "content": text}
+                if url:
+                    record["url"] = url
+                payload = json.dumps(record, ensure_ascii=False).encode("utf-8")
+                data.write(payload)
+                articles.add(OfflineCorpus.key(title), location.pack(offset, len(payload)))
+                offset += len(payload)
+                if index is not None:
+                    index.add(title, text)
+        if index is not None:
+            index.flush()
+
+        article_count = write_index(
+            out_dir, "titles",
+            ((key, *location.unpack(payload)) for key, payload in articles)
+        )
+
+        # Resolve redirect targets against the finished article index
+        corpus = OfflineCorpus(out_dir)
+
+        def resolved():
+            for key, target in redirects:
+                if corpus.locate(key):
+                    continue  # a real article wins over a redirect with the same key
+                found = corpus.locate(target)
+                if found:
+                    yield key, found[0], found[1]
+
+        redirect_count = write_index(out_dir, "redirects", resolved())
+        corpus.close()
+        return article_count, redirect_count
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an offline Wikipedia corpus from a dump.")
+    parser.add_argument("dump", help="MediaWiki XML dump (.xml, .xml.bz2, .xml.gz) or JSONL abstracts")
+    parser.add_argument("--out", default="corpus", help="corpus directory to write")
+    parser.add_argument("--format", choices=["xml", "jsonl"], default=None,
+                        help="dump format (guessed from the file name by default)")
+    parser.add_argument("--run-size", type=int, default=500_000,
+                        help="titles sorted in memory before spilling a run to disk")
+    parser.add_argument("--index", default=SEARCH_INDEX_PATH, help="full-text search index to add articles to")
+    parser.add_argument("--no-index", action="store_true", help="do not add articles to the search index")
+    args = parser.parse_args(argv)
+
+    index = None if args.no_index else SearchIndex(args.index, flush_every=5000)
+    started = time.perf_counter()
+    articles, redirects = ingest(args.dump, args.out, args.format, args.run_size, index=index)
+    print(
+        f"Indexed {articles} articles and {redirects} redirects into {args.out} "
+        f"in {time.perf_counter() - started:.1f}s\n"
+        f"Use it with: STUDYHELPER_OFFLINE_CORPUS={args.out} streamlit run app.py",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
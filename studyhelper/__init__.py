@@ -0,0 +1,66 @@
+"""StudyHelper: Wikipedia research, AI quizzes, study notes and review cards
+
+Each submodule imports only what it needs, and the heavy dependencies
+load on first use: the groq client when the first Groq call is made,
+requests with the first Wikipedia request and NumPy with the related-topics
+engine. The names below are re-exported lazily, so ``import studyhelper``
+itself costs next to nothing:
+
+    from studyhelper import StudyTools
+    from studyhelper.history import StudyHistory
+"""
+import importlib
+
+_EXPORTS = {
+    'StudyHelper': 'ui',
+    'get_stylesheet': 'ui',
+    'StudyTools': 'tools',
+    'AsyncStudyTools': 'async_tools',
+    'StudyPrefetcher': 'prefetch',
+    'get_prefetcher': 'prefetch',
+    'QuizSession': 'quiz_session',
+    'QuizEngine': 'quiz',
+    'LocalGrader': 'quiz',
+    'quiz_item': 'quiz',
+    'ReviewDeck': 'review',
+    'get_review_deck': 'review',
+    'StudyHistory': 'history',
+    'get_study_history': 'history',
+    'WikiCache': 'caches',
+    'LLMResponseCache': 'caches',
+    'get_wiki_cache': 'caches',
+    'get_llm_cache': 'caches',
+    'OfflineCorpus': 'corpus',
+    'get_offline_corpus': 'corpus',
+    'SearchIndex': 'search_index',
+    'get_search_index': 'search_index',
+    'RelatedTopicsEngine': 'related',
+    'get_related_engine': 'related',
+    'GroqClientPool': 'groq_pool',
+    'GroqRateLimiter': 'groq_pool',
+    'RateLimitQueueTimeout': 'groq_pool',
+    'get_groq_pool': 'groq_pool',
+    'get_rate_limiter': 'groq_pool',
+    'get_token_usage': 'groq_pool',
+    'Instrumentation': 'instrumentation',
+    'get_instrumentation': 'instrumentation',
+    'instrumented': 'instrumentation',
+    'analyze_text': 'text',
+    'estimate_tokens': 'text',
+    'SEARCH_INDEX_PATH': 'config',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
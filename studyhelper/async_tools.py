@@ -0,0 +1,436 @@
+"""Non-blocking research, quiz, notes and related topics for the HTTP service
+
+AsyncStudyTools makes the same calls as StudyTools with the same prompts,
+parsers, caches, rate limiter and result shapes. Only the I/O differs:
+Wikipedia goes through one aiohttp session and Groq through AsyncGroq
+clients, so one event loop serves many requests at once. The SQLite
+caches, the local search index and related-topics engine, prompt packing
+and the offline quiz and notes builders block, so they run in worker
+threads through asyncio.to_thread. aiohttp is imported by start() and
+groq by the first Groq call.
+"""
+import asyncio
+import functools
+import itertools
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from .caches import get_llm_cache, get_wiki_cache
+from .config import (
+    GROQ_BASE_URL, GROQ_MODEL, GROQ_POOL_IDLE_TIMEOUT, GROQ_POOL_MAX_CLIENTS, GROQ_POOL_MAX_CONNECTIONS,
+    OFFLINE_ONLY, SERVICE_MAX_CONCURRENCY_PER_KEY, SERVICE_MAX_QUEUE_WAIT, SYSTEM_PROMPT, WIKIPEDIA_API_URL,
+    WIKIPEDIA_MAX_CONNECTIONS, logger
+)
+from .groq_pool import GroqClientPool, GroqRateLimiter, RateLimitQueueTimeout, get_rate_limiter
+from .instrumentation import get_instrumentation, instrumented
+from .related import get_related_engine
+from .search_index import get_search_index
+from .text import JSONObjectStream, estimate_tokens
+from .tools import StudyTools
+
+
+@functools.lru_cache(maxsize=None)
+def _aiohttp_transport_class():
+    """httpx transport sending the groq client's requests through an aiohttp session
+
+    httpx's own async connection pool slows down sharply with hundreds of
+    requests in flight; an aiohttp connector does not. Defined on first use
+    so that importing this module does not load httpx.
+    """
+    import aiohttp
+    import httpx
+
+    class AiohttpTransport(httpx.AsyncBaseTransport):
+        def __init__(self, session):
+            self.session = session
+
+        async def handle_async_request(self, request):
+            timeout = request.extensions.get("timeout", {})
+            try:
+                async with self.session.request(
+                    request.method, str(request.url), headers=request.headers.multi_items(),
+                    data=await request.aread(), allow_redirects=False,
+                    timeout=aiohttp.ClientTimeout(sock_connect=timeout.get("connect"), sock_read=timeout.get("read"))
+                ) as response:
+                    content = await response.read()
+            except asyncio.TimeoutError as e:
+                raise httpx.ReadTimeout(str(e) or "Timed out", request=request) from e
+            except aiohttp.ClientError as e:
+                raise httpx.ConnectError(str(e), request=request) from e
+            # aiohttp has already decoded the body
+            headers = [(name, value) for name, value in response.headers.items()
+                       if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+            return httpx.Response(response.status, headers=headers, content=content, request=request)
+
+    return AiohttpTransport
+
+
+class AsyncGroqClients:
+    """AsyncGroq clients keyed by API key, sharing one keep-alive aiohttp connection pool
+
+    The event-loop counterpart of GroqClientPool. Clients hold no
+    connections of their own, so the least recently used one is simply
+    dropped once there are more than max_clients.
+    """
+
+    def __init__(self, max_clients=GROQ_POOL_MAX_CLIENTS, max_connections=GROQ_POOL_MAX_CONNECTIONS,
+                 idle_timeout=GROQ_POOL_IDLE_TIMEOUT):
+        self.max_clients = max_clients
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self._clients = OrderedDict()  # hashed key -> client
+        self._session = None
+
+    def _create(self, api_key):
+        try:
+            from groq import AsyncGroq
+        except ImportError as e:
+            raise ImportError("Please install the groq package: pip install groq") from e
+        import aiohttp
+        import httpx  # installed with groq
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(
+                limit=self.max_connections * self.max_clients, keepalive_timeout=self.idle_timeout
+            ))
+        http_client = httpx.AsyncClient(transport=_aiohttp_transport_class()(self._session),
+                                        timeout=httpx.Timeout(60.0, connect=10.0))
+        # Retries are owned by GroqRateLimiter, as for the blocking clients
+        return AsyncGroq(api_key=api_key, base_url=GROQ_BASE_URL, http_client=http_client, max_retries=0)
+
+    def get(self, api_key):
+        """The shared client for an API key"""
+        key = GroqClientPool._key(api_key)
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = self._create(api_key)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        self._clients.move_to_end(key)
+        return client
+
+    async def close(self):
+        self._clients.clear()
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncStudyTools:
+    """StudyTools for asyncio: research, quiz, notes and related topics without a thread per request
+
+    Use as ``async with AsyncStudyTools() as tools``. slot() bounds the
+    requests in flight per API key; Groq calls also go through the
+    process-wide GroqRateLimiter. Failures fall back the way StudyTools
+    does (basic quiz, basic notes, generic suggestions) and are logged
+    rather than shown.
+    """
+
+    def __init__(self, max_concurrency_per_key=SERVICE_MAX_CONCURRENCY_PER_KEY, max_queue_wait=SERVICE_MAX_QUEUE_WAIT,
+                 wikipedia_connections=WIKIPEDIA_MAX_CONNECTIONS):
+        self.max_concurrency_per_key = max_concurrency_per_key
+        self.max_queue_wait = max_queue_wait
+        self.wikipedia_connections = wikipedia_connections
+        self.session = None
+        self.groq = AsyncGroqClients()
+        self._slots = {}  # hashed API key -> [semaphore, requests holding or waiting for it]
+
+    async def start(self):
+        import aiohttp
+
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.wikipedia_connections, ttl_dns_cache=300),
+            headers=StudyTools.WIKIPEDIA_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=30, connect=10)
+        )
+        return self
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+        await self.groq.close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @asynccontextmanager
+    async def slot(self, api_key):
+        """Hold one of the API key's max_concurrency_per_key request slots
+
+        Raises RateLimitQueueTimeout when none frees up within max_queue_wait.
+        Requests without a key share one set of slots.
+        """
+        key = GroqClientPool._key(api_key or "")
+        entry = self._slots.get(key)
+        if entry is None:
+            entry = self._slots[key] = [asyncio.Semaphore(self.max_concurrency_per_key), 0]
+        entry[1] += 1
+        try:
+            try:
+                await asyncio.wait_for(entry[0].acquire(), self.max_queue_wait)
+            except asyncio.TimeoutError:
+                raise RateLimitQueueTimeout(
+                    f"All {self.max_concurrency_per_key} request slots for this API key stayed busy for "
+                    f"{self.max_queue_wait:g}s"
+                ) from None
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._slots[key]
+
+    async def _get_json(self, url, params=None, timeout=None):
+        """GET url and return (status, JSON body or None)"""
+        import aiohttp
+
+        timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+        async with self.session.get(url, params=params, timeout=timeout) as response:
+            if response.status != 200:
+                return response.status, None
+            return response.status, await response.json(content_type=None)
+
+    @instrumented("wikipedia.search")
+    async def search_wikipedia(self, query, max_retries=3, use_cache=True):
+        """StudyTools.search_wikipedia without blocking the event loop"""
+        cache = get_wiki_cache() if use_cache else None
+        if cache:
+            cached = await asyncio.to_thread(cache.get, query)
+            get_instrumentation().cache("wikipedia", "hit" if cached else "miss")
+            if cached:
+                return cached
+
+        result = await asyncio.to_thread(StudyTools._search_offline, query)
+        if result is not None:
+            return result
+
+        result = await self._fetch_wikipedia_summary(query, max_retries)
+        if result.get('success'):
+            await asyncio.to_thread(StudyTools._keep_summaries, {query: result}, {}, cache)
+        return result
+
+    @instrumented("wikipedia.fetch")
+    async def _fetch_wikipedia_summary(self, query, max_retries=3):
+        for attempt in range(max_retries):
+            try:
+                status, data = await self._get_json(StudyTools._summary_url(query), timeout=15)
+                if status == 200:
+                    result = StudyTools._summary_result(data, query)
+                    if result is not None:
+                        return result
+
+                    # A disambiguation page: prefer an article we have already seen over another round trip
+                    candidate = await asyncio.to_thread(get_search_index().resolve, query)
+                    if candidate:
+                        return await self.search_wikipedia(candidate)
+                    search_status, search_data = await self._get_json(
+                        WIKIPEDIA_API_URL, StudyTools._search_params(query), timeout=10
+                    )
+                    title = StudyTools._first_search_title(search_data) if search_status == 200 else None
+                    if title:
+                        return await self.search_wikipedia(title)
+                    return StudyTools._summary_result(data, query, allow_short=True)
+                if status == 404:
+                    return StudyTools._wikipedia_error(query, "Not Found")
+                if attempt == max_retries - 1:
+                    return StudyTools._wikipedia_error(query, f"HTTP {status}")
+                delay = 1
+            except asyncio.TimeoutError:
+                if attempt == max_retries - 1:
+                    return StudyTools._wikipedia_error(query, "Timeout")
+                delay = 2
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    return StudyTools._wikipedia_error(query, str(e))
+                delay = 1
+            get_instrumentation().retry("wikipedia")
+            await asyncio.sleep(delay)
+
+        return StudyTools._wikipedia_error(query, "Max retries exceeded")
+
+    @instrumented("wikipedia.summaries")
+    async def fetch_summaries(self, titles, use_cache=True):
+        """StudyTools.fetch_summaries with the batches requested concurrently"""
+        cache = get_wiki_cache() if use_cache else None
+        results, missing = await asyncio.to_thread(StudyTools._cached_summaries, titles, cache)
+        if OFFLINE_ONLY:
+            return await asyncio.to_thread(StudyTools._offline_summaries, missing, results)
+        batches = [
+            missing[start:start + StudyTools.SUMMARY_BATCH_SIZE]
+            for start in range(0, len(missing), StudyTools.SUMMARY_BATCH_SIZE)
+        ]
+        responses = await asyncio.gather(
+            *(self._get_json(WIKIPEDIA_API_URL, StudyTools._summary_batch_params(batch), timeout=15)
+              for batch in batches),
+            return_exceptions=True
+        )
+        for batch, response in zip(batches, responses):
+            if isinstance(response, BaseException) or response[0] != 200:
+                logger.warning("Batched summary lookup failed: %s",
+                               response if isinstance(response, BaseException) else f"HTTP {response[0]}")
+                continue
+            await asyncio.to_thread(
+                StudyTools._keep_summaries, StudyTools._summaries_from_batch(batch, response[1]), results, cache
+            )
+        return results
+
+    @instrumented("related.topics")
+    async def get_related_topics(self, topic, content=None):
+        """StudyTools.get_related_topics without blocking the event loop"""
+        local = await asyncio.to_thread(self._local_related, topic, content)
+        if len(local) >= StudyTools.MIN_LOCAL_RELATED:
+            return local
+        if OFFLINE_ONLY:
+            return local or StudyTools._fallback_related(topic)
+
+        try:
+            status, data = await self._get_json(WIKIPEDIA_API_URL, StudyTools._opensearch_params(topic), timeout=10)
+            if status == 200:
+                suggestions = StudyTools._suggestions_from_opensearch(topic, data)
+                # Warm the summary cache for every suggestion in one request, for previews and instant clicks
+                await self.fetch_summaries(suggestions)
+                return suggestions
+        except Exception as e:
+            logger.warning("Could not fetch related topics: %s", e)
+
+        return local or StudyTools._fallback_related(topic)
+
+    @staticmethod
+    def _local_related(topic, content):
+        engine = get_related_engine()
+        return engine.related(topic, content) if engine else []
+
+    @instrumented("groq.call")
+    async def call_groq_api(self, api_key, prompt, max_tokens=1500, temperature=0.7, use_cache=True):
+        """StudyTools.call_groq_api on the event loop; returns None when there is no key or the call fails"""
+        if not api_key:
+            return None
+        cache = get_llm_cache() if use_cache else None
+        clean_prompt = StudyTools._clean_text_for_api(prompt)
+        cache_key = StudyTools._llm_cache_key(clean_prompt, max_tokens, temperature)
+        if cache:
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            get_instrumentation().cache("llm", "miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": clean_prompt}
+        ]
+        try:
+            response, reserved = await self._create_completion(api_key, messages, max_tokens, temperature)
+        except Exception as e:
+            logger.warning("Error calling Groq API: %s", e)
+            return None
+
+        content = StudyTools._completion_text(api_key, reserved, response, clean_prompt)
+        if cache and content:
+            await asyncio.to_thread(cache.put, cache_key, content)
+        return content
+
+    async def _create_completion(self, api_key, messages, max_tokens, temperature):
+        """StudyTools._create_completion with the limiter's waits and backoffs slept on the event loop"""
+        limiter = get_rate_limiter()
+        reserved = sum(estimate_tokens(m["content"]) for m in messages) + max_tokens
+        instrumentation = get_instrumentation()
+        for attempt in itertools.count():
+            with instrumentation.span("groq.queue"):
+                await self._acquire(limiter, api_key, reserved)
+            try:
+                response = await self.groq.get(api_key).chat.completions.create(
+                    messages=messages,
+                    model=GROQ_MODEL,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    top_p=1
+                )
+                return response, reserved
+            except asyncio.CancelledError:
+                limiter.settle(api_key, reserved, 0)
+                raise
+            except Exception as e:
+                # A failed attempt used no tokens; give its reservation back
+                limiter.settle(api_key, reserved, 0)
+                if not GroqRateLimiter.is_rate_limit_error(e) or attempt >= limiter.max_retries:
+                    raise
+                instrumentation.retry("groq")
+                await asyncio.sleep(limiter.block(api_key, attempt, GroqRateLimiter.retry_after(e)))
+
+    @staticmethod
+    async def _acquire(limiter, api_key, tokens):
+        """Wait for the limiter to grant a request; raises RateLimitQueueTimeout after its max_wait"""
+        deadline = time.monotonic() + limiter.max_wait
+        while True:
+            wait = limiter.try_acquire(api_key, tokens)
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitQueueTimeout(f"Rate limit queue wait exceeded {limiter.max_wait:g}s")
+            await asyncio.sleep(wait)
+
+    @instrumented("quiz.generate")
+    async def generate_enhanced_quiz_with_ai(self, api_key, content, topic, difficulty="medium", num_questions=5,
+                                             use_cache=True):
+        """StudyTools.generate_enhanced_quiz_with_ai: quiz_item() dicts, built locally for easy quizzes"""
+        seed = 0 if use_cache else random.randrange(2 ** 32)
+        if not content or len(content.strip()) < 50 or difficulty == "easy" or not api_key:
+            return await asyncio.to_thread(StudyTools.generate_basic_quiz, content, difficulty, num_questions, topic,
+                                           seed)
+
+        try:
+            prompt, _ = await asyncio.to_thread(StudyTools._quiz_prompt, content, topic, difficulty, num_questions)
+            questions = []
+            response_text = await self._collect_quiz_items(api_key, prompt, content, num_questions, questions,
+                                                           use_cache)
+            if questions and len(questions) < num_questions:
+                # Ask only for the questions that are missing, not for a whole new quiz
+                repair_prompt = await asyncio.to_thread(
+                    StudyTools._quiz_repair_prompt, content, topic, difficulty, num_questions, questions
+                )
+                await self._collect_quiz_items(api_key, repair_prompt, content, num_questions, questions, use_cache)
+            return await asyncio.to_thread(
+                StudyTools._finish_quiz, questions, response_text, content, topic, difficulty, num_questions, seed
+            )
+        except Exception as e:
+            logger.warning("AI quiz generation encountered an issue: %s. Using basic quiz generation.", e)
+            return await asyncio.to_thread(StudyTools.generate_basic_quiz, content, difficulty, num_questions, topic,
+                                           seed)
+
+    async def _collect_quiz_items(self, api_key, prompt, content, num_questions, questions, use_cache=True):
+        """Run one quiz completion and append its valid, new items to questions; returns the raw text"""
+        parser = JSONObjectStream()
+        response_text = await self.call_groq_api(
+            api_key, prompt, max_tokens=StudyTools._quiz_max_tokens(num_questions - len(questions)),
+            temperature=0.5, use_cache=use_cache
+        )
+        await asyncio.to_thread(
+            StudyTools._add_quiz_items, parser.feed(response_text or ""), content, num_questions, questions
+        )
+        return parser.text
+
+    @instrumented("notes.generate")
+    async def generate_enhanced_notes_with_ai(self, api_key, content, topic):
+        """StudyTools.generate_enhanced_notes_with_ai: {'enhanced', 'content'}, basic notes without AI"""
+        if not content or len(content.strip()) < 50:
+            return await asyncio.to_thread(StudyTools.create_basic_notes, content)
+
+        try:
+            prompt, _ = await asyncio.to_thread(StudyTools._notes_prompt, content, topic)
+            response_text = await self.call_groq_api(api_key, prompt, max_tokens=2000, temperature=0.4)
+        except Exception as e:
+            logger.warning("AI notes generation encountered an issue: %s. Using basic notes generation.", e)
+            response_text = None
+        if response_text:
+            return {
+                'enhanced': True,
+                'content': response_text
+            }
+        return await asyncio.to_thread(StudyTools.create_basic_notes, content)
@@ -0,0 +1,354 @@
+"""SQLite-backed Wikipedia and LLM response caches shared by sessions and worker processes"""
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .config import CACHE_DIR, LLM_CACHE_DISK_BYTES, LLM_CACHE_MEMORY_BYTES, WIKI_CACHE_MAX_ENTRIES, WIKI_CACHE_TTL
+
+
+def cache_resource(getter):
+    """Make a no-argument getter build its object once per process and return it from then on
+
+    st.cache_resource without importing Streamlit, so the service, batch.py
+    and the workers do not pay for it; concurrent first calls build once.
+    """
+    lock = threading.Lock()
+    built = []
+
+    @functools.wraps(getter)
+    def get():
+        if not built:
+            with lock:
+                if not built:
+                    built.append(getter())
+        return built[0]
+    return get
+
+
+class SQLiteStore:
+    """Base class for SQLite stores shared across threads, sessions and worker processes"""
+
+    SCHEMA = ""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        """Return this thread's connection (sqlite3 connections are not shareable across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+class WikiCache(SQLiteStore):
+    """SQLite-backed Wikipedia summary cache shared by all sessions and worker processes"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS summaries (
+        title_key TEXT PRIMARY KEY,
+        payload TEXT NOT NULL,
+        created REAL NOT NULL,
+        accessed REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries(accessed);
+    CREATE TABLE IF NOT EXISTS resolutions (
+        query_key TEXT PRIMARY KEY,
+        title_key TEXT NOT NULL,
+        created REAL NOT NULL
+    );
+    """
+
+    # Only rewrite the LRU timestamp when it is older than this, so hits stay read-only
+    TOUCH_INTERVAL = 60
+    EVICTION_CHECK_EVERY = 64
+
+    def __init__(self, path, ttl=WIKI_CACHE_TTL, max_entries=WIKI_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        super().__init__(path)
+
+    @staticmethod
+    def normalize(title):
+        """Normalize a query or title into a cache key"""
+        return "_".join(title.strip().split()).casefold()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, query, namespace=""):
+        """Return the cached search result for a query, or None on a miss
+
+        A namespace keeps other kinds of page payloads (e.g. full article
+        text) apart from summaries.
+        """
+        try:
+            conn = self._connect()
+            query_key = namespace + self.normalize(query)
+            row = conn.execute(
+                "SELECT title_key FROM resolutions WHERE query_key = ?", (query_key,)
+            ).fetchone()
+            title_key = row[0] if row else query_key
+
+            row = conn.execute(
+                "SELECT payload, created, accessed FROM summaries WHERE title_key = ?", (title_key,)
+            ).fetchone()
+            now = time.time()
+            if not row or now - row[1] > self.ttl:
+                self._count(False)
+                return None
+
+            if now - row[2] > self.TOUCH_INTERVAL:
+                with conn:
+                    conn.execute(
+                        "UPDATE summaries SET accessed = ? WHERE title_key = ?", (now, title_key)
+                    )
+            self._count(True)
+            return json.loads(row[0])
+        except sqlite3.Error:
+            self._count(False)
+            return None
+
+    def put(self, query, result, namespace=""):
+        """Store a successful search result and the query -> canonical title resolution"""
+        try:
+            conn = self._connect()
+            now = time.time()
+            query_key = namespace + self.normalize(query)
+            title_key = namespace + self.normalize(result.get('title') or query)
+
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO summaries (title_key, payload, created, accessed) "
+                    "VALUES (?, ?, ?, ?)",
+                    (title_key, json.dumps(result), now, now)
+                )
+                if query_key != title_key:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO resolutions (query_key, title_key, created) "
+                        "VALUES (?, ?, ?)",
+                        (query_key, title_key, now)
+                    )
+
+            with self._lock:
+                self._puts += 1
+                check = self._puts % self.EVICTION_CHECK_EVERY == 0
+            if check:
+                self.evict()
+        except sqlite3.Error:
+            pass
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones beyond max_entries"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM summaries WHERE created < ?", (time.time() - self.ttl,))
+            excess = conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM summaries WHERE title_key IN "
+                    "(SELECT title_key FROM summaries ORDER BY accessed LIMIT ?)",
+                    (excess,)
+                )
+            conn.execute(
+                "DELETE FROM resolutions WHERE title_key NOT IN (SELECT title_key FROM summaries)"
+            )
+
+    def summaries(self, namespaces=("full:",)):
+        """Yield every unexpired cached summary, skipping other namespaces' payloads"""
+        try:
+            rows = self._connect().execute(
+                "SELECT title_key, payload FROM summaries WHERE created >= ?", (time.time() - self.ttl,)
+            ).fetchall()
+        except sqlite3.Error:
+            return
+        for title_key, payload in rows:
+            if not title_key.startswith(namespaces):
+                yield json.loads(payload)
+
+    def clear(self):
+        """Remove every cached entry"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM summaries")
+            conn.execute("DELETE FROM resolutions")
+
+    def stats(self):
+        """Return hit/miss counters and the current entry count"""
+        try:
+            entries = self._connect().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        except sqlite3.Error:
+            entries = 0
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': entries
+        }
+
+
+class LLMResponseCache(SQLiteStore):
+    """Content-addressed cache of LLM completions: in-memory LRU in front of an on-disk tier"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        response TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created REAL NOT NULL,
+        accessed REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed);
+    """
+
+    EVICTION_CHECK_EVERY = 32
+
+    def __init__(self, path, memory_bytes=LLM_CACHE_MEMORY_BYTES, disk_bytes=LLM_CACHE_DISK_BYTES):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._puts = 0
+        super().__init__(path)
+
+    @staticmethod
+    def make_key(prompt, system_prompt, model, **params):
+        """Hash everything that determines a completion into a stable cache key"""
+        material = json.dumps(
+            {'prompt': prompt, 'system': system_prompt, 'model': model, 'params': params},
+            sort_keys=True
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _remember(self, key, response):
+        """Insert into the memory tier, evicting least recently used entries over budget"""
+        size = len(response.encode('utf-8'))
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= len(previous.encode('utf-8'))
+            self._memory[key] = response
+            self._memory_size += size
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted.encode('utf-8'))
+
+    def get(self, key):
+        """Return a cached completion or None"""
+        with self._lock:
+            response = self._memory.get(key)
+            if response is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return response
+
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row:
+                with conn:
+                    conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error:
+            row = None
+
+        if not row:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        self._remember(key, row[0])
+        with self._lock:
+            self.disk_hits += 1
+        return row[0]
+
+    def put(self, key, response):
+        """Store a completion in both tiers"""
+        self._remember(key, response)
+        try:
+            conn = self._connect()
+            now = time.time()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode('utf-8')), now, now)
+                )
+            with self._lock:
+                self._puts += 1
+                check = self._puts % self.EVICTION_CHECK_EVERY == 0
+            if check:
+                self.evict()
+        except sqlite3.Error:
+            pass
+
+    def evict(self):
+        """Trim the disk tier to disk_bytes, oldest access first"""
+        conn = self._connect()
+        with conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.disk_bytes:
+                return
+            cutoff = None
+            for accessed, size in conn.execute("SELECT accessed, size FROM responses ORDER BY accessed"):
+                total -= size
+                cutoff = accessed
+                if total <= self.disk_bytes:
+                    break
+            conn.execute("DELETE FROM responses WHERE accessed <= ?", (cutoff,))
+
+    def stats(self):
+        """Return per-tier hit counters and current sizes"""
+        try:
+            row = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        except sqlite3.Error:
+            row = (0, 0)
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_bytes': self._memory_size,
+            'disk_entries': row[0],
+            'disk_bytes': row[1]
+        }
+
+
+@cache_resource
+def get_wiki_cache():
+    """Process-wide Wikipedia cache (survives Streamlit reruns)"""
+    return WikiCache(os.path.join(CACHE_DIR, "wikipedia.sqlite3"))
+
+
+@cache_resource
+def get_llm_cache():
+    """Process-wide LLM response cache (survives Streamlit reruns)"""
+    return LLMResponseCache(os.path.join(CACHE_DIR, "llm_responses.sqlite3"))
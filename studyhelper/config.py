@@ -0,0 +1,59 @@
+"""Settings read from STUDYHELPER_* environment variables when the package is imported"""
+import logging
+import os
+
+logger = logging.getLogger("studyhelper")
+
+CACHE_DIR = os.environ.get(
+    "STUDYHELPER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "studyhelper")
+)
+WIKI_CACHE_TTL = int(os.environ.get("STUDYHELPER_WIKI_CACHE_TTL", 7 * 24 * 3600))
+WIKI_CACHE_MAX_ENTRIES = int(os.environ.get("STUDYHELPER_WIKI_CACHE_MAX_ENTRIES", 20000))
+LLM_CACHE_MEMORY_BYTES = int(os.environ.get("STUDYHELPER_LLM_CACHE_MEMORY_BYTES", 8 * 1024 * 1024))
+LLM_CACHE_DISK_BYTES = int(os.environ.get("STUDYHELPER_LLM_CACHE_DISK_BYTES", 256 * 1024 * 1024))
+GROQ_POOL_MAX_CLIENTS = int(os.environ.get("STUDYHELPER_GROQ_POOL_MAX_CLIENTS", 32))
+GROQ_POOL_MAX_CONNECTIONS = int(os.environ.get("STUDYHELPER_GROQ_POOL_MAX_CONNECTIONS", 20))
+GROQ_POOL_IDLE_TIMEOUT = int(os.environ.get("STUDYHELPER_GROQ_POOL_IDLE_TIMEOUT", 300))
+GROQ_REQUESTS_PER_MINUTE = float(os.environ.get("STUDYHELPER_GROQ_RPM", 30))
+GROQ_TOKENS_PER_MINUTE = float(os.environ.get("STUDYHELPER_GROQ_TPM", 30000))
+GROQ_MAX_RETRIES = int(os.environ.get("STUDYHELPER_GROQ_MAX_RETRIES", 5))
+GROQ_MAX_QUEUE_WAIT = float(os.environ.get("STUDYHELPER_GROQ_MAX_QUEUE_WAIT", 120))
+
+GROQ_MODEL = "llama3-8b-8192"
+# Point these at stand-in servers (see benchmarks/fake_services.py) to run without the real services
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL") or None
+WIKIPEDIA_BASE_URL = os.environ.get("STUDYHELPER_WIKIPEDIA_URL", "https://en.wikipedia.org").rstrip("/")
+WIKIPEDIA_API_URL = WIKIPEDIA_BASE_URL + "/w/api.php"
+GROQ_CONTEXT_TOKENS = 8192
+FULL_ARTICLE_MAX_BYTES = int(os.environ.get("STUDYHELPER_FULL_ARTICLE_MAX_BYTES", 2 * 1024 * 1024))
+FULL_ARTICLE_CHUNK_TOKENS = int(os.environ.get("STUDYHELPER_FULL_ARTICLE_CHUNK_TOKENS", 3000))
+FULL_ARTICLE_MAX_WORKERS = int(os.environ.get("STUDYHELPER_FULL_ARTICLE_MAX_WORKERS", 6))
+SEARCH_INDEX_PATH = os.environ.get("STUDYHELPER_SEARCH_INDEX", os.path.join(CACHE_DIR, "search_index.sqlite3"))
+SEARCH_INDEX_FLUSH_EVERY = int(os.environ.get("STUDYHELPER_SEARCH_INDEX_FLUSH_EVERY", 32))
+HISTORY_DB_PATH = os.environ.get("STUDYHELPER_HISTORY_DB", os.path.join(CACHE_DIR, "history.sqlite3"))
+HISTORY_PAGE_SIZE = int(os.environ.get("STUDYHELPER_HISTORY_PAGE_SIZE", 10))
+REVIEW_DB_PATH = os.environ.get("STUDYHELPER_REVIEW_DB", os.path.join(CACHE_DIR, "review_cards.sqlite3"))
+REVIEW_SESSION_SIZE = int(os.environ.get("STUDYHELPER_REVIEW_SESSION_SIZE", 20))
+# Directory written by ingest_corpus.py; OFFLINE_ONLY never falls back to en.wikipedia.org
+OFFLINE_CORPUS_DIR = os.environ.get("STUDYHELPER_OFFLINE_CORPUS", "")
+OFFLINE_ONLY = os.environ.get("STUDYHELPER_OFFLINE_ONLY", "").lower() in ("1", "true", "yes")
+# Prometheus /metrics endpoint (off unless a port is set) and one JSON log line per instrumented stage
+METRICS_HOST = os.environ.get("STUDYHELPER_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("STUDYHELPER_METRICS_PORT", 0))
+JSON_LOGS = os.environ.get("STUDYHELPER_JSON_LOGS", "").lower() in ("1", "true", "yes")
+# Headless HTTP service (python -m studyhelper.service)
+SERVICE_HOST = os.environ.get("STUDYHELPER_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.environ.get("STUDYHELPER_SERVICE_PORT", 8080))
+SERVICE_MAX_CONCURRENCY_PER_KEY = int(os.environ.get("STUDYHELPER_SERVICE_MAX_CONCURRENCY_PER_KEY", 16))
+SERVICE_MAX_QUEUE_WAIT = float(os.environ.get("STUDYHELPER_SERVICE_MAX_QUEUE_WAIT", 30))
+SERVICE_REQUEST_TIMEOUT = float(os.environ.get("STUDYHELPER_SERVICE_REQUEST_TIMEOUT", 180))
+WIKIPEDIA_MAX_CONNECTIONS = int(os.environ.get("STUDYHELPER_WIKIPEDIA_MAX_CONNECTIONS", 64))
+SYSTEM_PROMPT = (
+    "You are a knowledgeable and helpful AI study assistant. Provide clear, accurate, "
+    "and well-structured educational content. Use plain text without emojis in your responses."
+)
+ASCII_SYSTEM_PROMPT = (
+    "You are a helpful AI study assistant. Provide clear educational content "
+    "using only standard ASCII characters."
+)
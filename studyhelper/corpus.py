@@ -0,0 +1,122 @@
+"""Read-only offline Wikipedia corpus written by ingest_corpus.py"""
+import json
+import mmap
+import os
+import struct
+
+from .caches import WikiCache, cache_resource
+from .config import OFFLINE_CORPUS_DIR, logger
+
+
+class OfflineCorpus:
+    """Read-only Wikipedia corpus built from a dump by ingest_corpus.py
+
+    The directory holds articles.dat (one JSON record per article, back to
+    back) and two title indexes, titles.* for articles and redirects.* for
+    redirects already resolved to their target's record. Each index is a
+    sorted array of fixed-width entries (.idx) pointing into a blob of
+    normalized title keys (.keys); both are memory-mapped, so a lookup is a
+    binary search over the page cache with nothing loaded up front.
+    """
+
+    MAGIC = b"SHCIDX01"
+    ENTRY = struct.Struct("<QIQI")  # key offset, key length, record offset, record length
+    DATA_FILE = "articles.dat"
+    INDEXES = ("titles", "redirects")
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._files = []
+        self._data = self._map(os.path.join(directory, self.DATA_FILE))
+        self._indexes = []
+        for name in self.INDEXES:
+            entries = self._map(os.path.join(directory, name + ".idx"))
+            keys = self._map(os.path.join(directory, name + ".keys"))
+            if entries is None or keys is None or entries[:len(self.MAGIC)] != self.MAGIC:
+                continue
+            count = (len(entries) - len(self.MAGIC)) // self.ENTRY.size
+            self._indexes.append((entries, keys, count))
+
+    def _map(self, path):
+        """Memory-map a file read-only; None when it is empty or, for indexes, missing"""
+        if path.endswith((".idx", ".keys")) and not os.path.exists(path):
+            return None
+        f = open(path, "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def key(title):
+        """Index key for a title; matches the Wikipedia cache's normalization"""
+        return WikiCache.normalize(title).encode("utf-8")
+
+    def __len__(self):
+        return self._indexes[0][2] if self._indexes else 0
+
+    def _find(self, index, key):
+        entries, keys, count = index
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_offset, key_length, record_offset, record_length = self.ENTRY.unpack_from(
+                entries, len(self.MAGIC) + mid * self.ENTRY.size
+            )
+            probe = keys[key_offset:key_offset + key_length]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return record_offset, record_length
+        return None
+
+    def locate(self, key):
+        """(record offset, record length) for an index key, or None"""
+        for index in self._indexes:
+            location = self._find(index, key)
+            if location:
+                return location
+        return None
+
+    def lookup(self, title):
+        """Return the article record for a title or redirect, or None"""
+        location = self.locate(self.key(title))
+        if not location:
+            return None
+        offset, length = location
+        return json.loads(self._data[offset:offset + length])
+
+    def search(self, query):
+        """Offline counterpart of StudyTools.search_wikipedia, with the same result shape"""
+        record = self.lookup(query)
+        if not record:
+            return {
+                'success': False,
+                'content': f"No article found for '{query}' in the offline Wikipedia corpus.",
+                'error': "Not Found"
+            }
+        return {
+            'success': True,
+            'content': record['content'],
+            'url': record.get('url') or "https://en.wikipedia.org/wiki/" + record['title'].replace(' ', '_'),
+            'title': record['title'],
+            'thumbnail': ''
+        }
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+
+@cache_resource
+def get_offline_corpus():
+    """The configured offline corpus, or None when there is none"""
+    if not OFFLINE_CORPUS_DIR:
+        return None
+    try:
+        return OfflineCorpus(OFFLINE_CORPUS_DIR)
+    except OSError as e:
+        logger.warning("Offline corpus at %s is unavailable: %s", OFFLINE_CORPUS_DIR, e)
+        return None
@@ -0,0 +1,374 @@
+"""Pooled Groq clients, per-key rate limiting and token usage totals
+
+The groq package (and httpx with it) is imported when the first client
+is created, not when this module is.
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from .caches import cache_resource
+from .config import (
+    GROQ_BASE_URL, GROQ_MAX_QUEUE_WAIT, GROQ_MAX_RETRIES, GROQ_POOL_IDLE_TIMEOUT, GROQ_POOL_MAX_CLIENTS,
+    GROQ_POOL_MAX_CONNECTIONS, GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE
+)
+
+
+class PooledGroqClient:
+    """A Groq client with its own keep-alive HTTP connection pool"""
+
+    def __init__(self, api_key, max_connections, idle_timeout):
+        try:
+            from groq import Groq
+        except ImportError as e:
+            raise ImportError("Please install the groq package: pip install groq") from e
+        import httpx  # installed with groq
+
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=idle_timeout
+            ),
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+        # Retries are owned by GroqRateLimiter, which shares 429 backoff across all callers
+        self.client = Groq(
+            api_key=api_key, base_url=GROQ_BASE_URL, http_client=self.http_client, max_retries=0
+        )
+        self.created = time.time()
+        self.last_used = self.created
+        self.in_use = 0
+        self.requests = 0
+
+    def close(self):
+        try:
+            self.http_client.close()
+        except Exception:
+            pass
+
+
+class GroqClientPool:
+    """Process-wide, thread-safe registry of Groq clients keyed by API key
+
+    Reusing a client keeps its HTTP connections warm, so only the first
+    request per key pays the TCP/TLS handshake. Cold and warm request
+    latencies are tracked separately to make that saving visible.
+    """
+
+    def __init__(self, max_clients=GROQ_POOL_MAX_CLIENTS, max_connections=GROQ_POOL_MAX_CONNECTIONS,
+                 idle_timeout=GROQ_POOL_IDLE_TIMEOUT):
+        self.max_clients = max_clients
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self._cold = [0, 0.0]  # [count, total seconds] for first requests on a new client
+        self._warm = [0, 0.0]  # [count, total seconds] for requests on a reused client
+
+    @staticmethod
+    def _key(api_key):
+        return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+    def _evict_locked(self, now):
+        """Close idle clients and trim the registry to max_clients (never closes leased clients)"""
+        for key, entry in list(self._clients.items()):
+            over_capacity = len(self._clients) > self.max_clients
+            idle = now - entry.last_used > self.idle_timeout
+            if entry.in_use == 0 and (idle or over_capacity):
+                del self._clients[key]
+                entry.close()
+                self.evicted += 1
+
+    def _checkout_locked(self, key, created=None):
+        """Lease the registered client for key, registering created if there is none"""
+        now = time.time()
+        entry = self._clients.get(key)
+        if entry is not None:
+            self._clients.move_to_end(key)
+            self.reused += 1
+        elif created is not None:
+            entry = self._clients[key] = created
+            self.created += 1
+        else:
+            return None
+        entry.in_use += 1
+        entry.last_used = now
+        self._evict_locked(now)
+        return entry
+
+    @contextmanager
+    def lease(self, api_key):
+        """Borrow the shared client for an API key for the duration of a request"""
+        key = self._key(api_key)
+        with self._lock:
+            entry = self._checkout_locked(key)
+        if entry is None:
+            # Building a client imports groq and opens an HTTP pool, so other keys are not held up
+            created = PooledGroqClient(api_key, self.max_connections, self.idle_timeout)
+            with self._lock:
+                entry = self._checkout_locked(key, created)
+            if entry is not created:
+                created.close()  # another thread registered a client for this key first
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.time()
+
+    def record(self, entry, seconds):
+        """Record the latency of a completed request made with a leased client"""
+        with self._lock:
+            bucket = self._cold if entry.requests == 0 else self._warm
+            bucket[0] += 1
+            bucket[1] += seconds
+            entry.requests += 1
+
+    def stats(self):
+        """Return registry counters and average cold vs warm request latency"""
+        with self._lock:
+            cold_ms = self._cold[1] / self._cold[0] * 1000 if self._cold[0] else None
+            warm_ms = self._warm[1] / self._warm[0] * 1000 if self._warm[0] else None
+            return {
+                'clients': len(self._clients),
+                'created': self.created,
+                'reused': self.reused,
+                'evicted': self.evicted,
+                'cold_avg_ms': cold_ms,
+                'warm_avg_ms': warm_ms,
+                'saved_ms_per_call': cold_ms - warm_ms if cold_ms is not None and warm_ms is not None else None
+            }
+
+
+class TokenUsage:
+    """Thread-safe running totals of Groq requests and tokens"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'total_tokens': self.prompt_tokens + self.completion_tokens
+            }
+
+
+class RateLimitQueueTimeout(Exception):
+    """Raised when a request waited longer than the limiter allows"""
+
+
+class _KeyBuckets:
+    """Request and token buckets plus the FIFO wait queue for one API key"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.request_capacity = requests_per_minute
+        self.token_capacity = tokens_per_minute
+        self.requests = requests_per_minute
+        self.tokens = tokens_per_minute
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.granted = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_capacity / 60)
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_capacity / 60)
+
+    def seconds_until_ready(self, now, tokens):
+        """How long the head of the queue must wait for both buckets and any Retry-After block"""
+        waits = [self.blocked_until - now]
+        if self.requests < 1:
+            waits.append((1 - self.requests) * 60 / self.request_capacity)
+        if self.tokens < tokens:
+            waits.append((tokens - self.tokens) * 60 / self.token_capacity)
+        return max(waits)
+
+
+class GroqRateLimiter:
+    """Process-wide token-bucket limiter for Groq requests, per API key
+
+    Every call reserves one request and its estimated tokens (prompt plus
+    max_tokens) from the key's per-minute buckets, waiting in FIFO order when
+    they are empty; the estimate is settled against actual usage afterwards.
+    A 429 blocks the whole key for its Retry-After, or for an exponential
+    backoff with full jitter, so concurrent sessions back off together
+    instead of hammering the API.
+    """
+
+    def __init__(self, requests_per_minute=GROQ_REQUESTS_PER_MINUTE, tokens_per_minute=GROQ_TOKENS_PER_MINUTE,
+                 max_retries=GROQ_MAX_RETRIES, max_wait=GROQ_MAX_QUEUE_WAIT, base_backoff=1.0, max_backoff=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, api_key):
+        key = GroqClientPool._key(api_key)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = _KeyBuckets(self.requests_per_minute, self.tokens_per_minute)
+                self._buckets[key] = bucket
+            return bucket
+
+    def acquire(self, api_key, tokens):
+        """Block until this request may be sent; raises RateLimitQueueTimeout after max_wait"""
+        bucket = self._bucket(api_key)
+        tokens = min(tokens, bucket.token_capacity)
+        ticket = object()
+        enqueued = time.monotonic()
+        deadline = enqueued + self.max_wait
+        with bucket.condition:
+            bucket.queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if bucket.queue[0] is not ticket:
+                        wait = 0
+                    else:
+                        bucket.refill(now)
+                        wait = bucket.seconds_until_ready(now, tokens)
+                    # Fail fast when the head of the queue can already tell it will miss the deadline
+                    if now >= deadline or now + wait > deadline:
+                        raise RateLimitQueueTimeout(
+                            f"Rate limit queue wait exceeded {self.max_wait:g}s"
+                        )
+                    if bucket.queue[0] is not ticket:
+                        bucket.condition.wait(timeout=deadline - now)
+                        continue
+                    if wait <= 0:
+                        bucket.requests -= 1
+                        bucket.tokens -= tokens
+                        waited = now - enqueued
+                        bucket.granted += 1
+                        bucket.total_wait += waited
+                        bucket.max_wait = max(bucket.max_wait, waited)
+                        return waited
+                    bucket.condition.wait(timeout=wait)
+            finally:
+                bucket.queue.remove(ticket)
+                bucket.condition.notify_all()
+
+    def try_acquire(self, api_key, tokens):
+        """Reserve a request without blocking; returns 0 when granted, else the seconds to wait
+
+        For asyncio callers, which sleep on the event loop and try again
+        instead of waiting on the key's condition. Threads already queued
+        in acquire() for the key go first.
+        """
+        bucket = self._bucket(api_key)
+        tokens = min(tokens, bucket.token_capacity)
+        with bucket.condition:
+            now = time.monotonic()
+            bucket.refill(now)
+            wait = bucket.seconds_until_ready(now, tokens)
+            if bucket.queue:
+                wait = max(wait, 0.05)
+            if wait > 0:
+                return wait
+            bucket.requests -= 1
+            bucket.tokens -= tokens
+            bucket.granted += 1
+            return 0.0
+
+    def settle(self, api_key, reserved, actual):
+        """Return over-reserved tokens to the bucket (or charge the shortfall)"""
+        bucket = self._bucket(api_key)
+        with bucket.condition:
+            bucket.refill(time.monotonic())
+            bucket.tokens = min(bucket.token_capacity, bucket.tokens + reserved - actual)
+            bucket.condition.notify_all()
+
+    def backoff(self, api_key, attempt, retry_after=None):
+        """Block the key after a 429 and sleep until it may be retried"""
+        time.sleep(self.block(api_key, attempt, retry_after))
+
+    def block(self, api_key, attempt, retry_after=None):
+        """Block the key after a 429; returns the delay before the caller may retry"""
+        if retry_after is None:
+            delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        else:
+            delay = min(self.max_backoff, retry_after) + random.uniform(0, 0.25)
+        bucket = self._bucket(api_key)
+        with bucket.condition:
+            bucket.throttled += 1
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+        return delay
+
+    @staticmethod
+    def is_rate_limit_error(error):
+        return getattr(error, 'status_code', None) == 429 or "rate limit" in str(error).lower()
+
+    @staticmethod
+    def retry_after(error):
+        """Seconds from a Retry-After header on the error's response, if any"""
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        value = headers.get('retry-after')
+        try:
+            return max(0.0, float(value)) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def stats(self, api_key=None):
+        """Queue depth and wait times, for one key or summed over all keys"""
+        with self._lock:
+            if api_key is not None:
+                bucket = self._buckets.get(GroqClientPool._key(api_key))
+                buckets = [bucket] if bucket else []
+            else:
+                buckets = list(self._buckets.values())
+        granted = sum(b.granted for b in buckets)
+        return {
+            'queue_depth': sum(len(b.queue) for b in buckets),
+            'granted': granted,
+            'throttled': sum(b.throttled for b in buckets),
+            'avg_wait_ms': sum(b.total_wait for b in buckets) / granted * 1000 if granted else 0.0,
+            'max_wait_ms': max((b.max_wait for b in buckets), default=0.0) * 1000
+        }
+
+
+@cache_resource
+def get_groq_pool():
+    """Process-wide Groq client pool shared by all Streamlit sessions"""
+    return GroqClientPool()
+
+
+@cache_resource
+def get_rate_limiter():
+    """Process-wide Groq rate limiter shared by all sessions and workers"""
+    return GroqRateLimiter()
+
+
+@cache_resource
+def get_token_usage():
+    """Process-wide Groq token usage totals"""
+    return TokenUsage()
@@ -0,0 +1,140 @@
+"""Per-user study history and the notes and quizzes generated for each topic"""
+import json
+import sqlite3
+import time
+
+from .caches import SQLiteStore, WikiCache, cache_resource
+from .config import HISTORY_DB_PATH, logger
+
+
+class StudyHistory(SQLiteStore):
+    """Per-user study history with visit counts and the notes/quiz generated for each topic
+
+    One row per (user, topic): revisiting a topic is a primary-key upsert
+    that bumps its visit count. Pages are read newest first through the
+    (user_id, last_visited, topic_key) index with a keyset cursor, so a
+    page costs the same however long the history grows.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS history (
+        user_id TEXT NOT NULL,
+        topic_key TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        visits INTEGER NOT NULL,
+        first_visited REAL NOT NULL,
+        last_visited REAL NOT NULL,
+        PRIMARY KEY (user_id, topic_key)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS history_recent ON history(user_id, last_visited, topic_key);
+    CREATE TABLE IF NOT EXISTS artifacts (
+        user_id TEXT NOT NULL,
+        topic_key TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        created REAL NOT NULL,
+        PRIMARY KEY (user_id, topic_key, kind)
+    ) WITHOUT ROWID;
+    """
+
+    def record(self, user_id, topic, mode):
+        """Add a visit to topic, creating its entry on the first one"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO history (user_id, topic_key, topic, mode, visits, first_visited, last_visited) "
+                    "VALUES (?, ?, ?, ?, 1, ?, ?) "
+                    "ON CONFLICT (user_id, topic_key) DO UPDATE SET "
+                    "topic = excluded.topic, mode = excluded.mode, visits = visits + 1, "
+                    "last_visited = excluded.last_visited",
+                    (user_id, WikiCache.normalize(topic), topic, mode, now, now)
+                )
+        except sqlite3.Error as e:
+            logger.warning("Could not record study history: %s", e)
+
+    def page(self, user_id, query="", cursor=None, limit=10):
+        """One page of entries, most recent first
+
+        query keeps topics containing it; cursor is the 'next' value of the
+        previous page. Each entry lists the artifact kinds saved for it.
+        """
+        sql = "SELECT topic_key, topic, mode, visits, last_visited FROM history WHERE user_id = ?"
+        params = [user_id]
+        if cursor:
+            sql += " AND (last_visited, topic_key) < (?, ?)"
+            params += cursor
+        if query.strip():
+            sql += " AND instr(topic_key, ?) > 0"
+            params.append(WikiCache.normalize(query))
+        sql += " ORDER BY last_visited DESC, topic_key DESC LIMIT ?"
+        params.append(limit + 1)
+        try:
+            conn = self._connect()
+            rows = conn.execute(sql, params).fetchall()
+            keys = [row[0] for row in rows[:limit]]
+            saved = conn.execute(
+                f"SELECT topic_key, kind FROM artifacts WHERE user_id = ? "
+                f"AND topic_key IN ({','.join('?' * len(keys))})",
+                [user_id, *keys]
+            ).fetchall() if keys else []
+        except sqlite3.Error:
+            return {'items': [], 'next': None}
+
+        kinds = {}
+        for topic_key, kind in saved:
+            kinds.setdefault(topic_key, []).append(kind)
+        items = [
+            {'topic': topic, 'mode': mode, 'visits': visits, 'last_visited': last_visited,
+             'artifacts': sorted(kinds.get(topic_key, []))}
+            for topic_key, topic, mode, visits, last_visited in rows[:limit]
+        ]
+        next_cursor = [rows[limit - 1][4], rows[limit - 1][0]] if len(rows) > limit else None
+        return {'items': items, 'next': next_cursor}
+
+    def count(self, user_id):
+        try:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM history WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def save_artifact(self, user_id, topic, kind, payload):
+        """Keep the latest generated notes or quiz for a topic"""
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO artifacts (user_id, topic_key, kind, payload, created) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (user_id, WikiCache.normalize(topic), kind, json.dumps(payload), time.time())
+                )
+        except sqlite3.Error as e:
+            logger.warning("Could not save %s for %s: %s", kind, topic, e)
+
+    def artifact(self, user_id, topic, kind):
+        """The saved payload of one kind for a topic, or None"""
+        try:
+            row = self._connect().execute(
+                "SELECT payload FROM artifacts WHERE user_id = ? AND topic_key = ? AND kind = ?",
+                (user_id, WikiCache.normalize(topic), kind)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return json.loads(row[0]) if row else None
+
+    def clear(self, user_id):
+        """Remove a user's history and saved artifacts"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM history WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM artifacts WHERE user_id = ?", (user_id,))
+
+
+@cache_resource
+def get_study_history():
+    """Process-wide study history store (survives Streamlit reruns and restarts)"""
+    return StudyHistory(HISTORY_DB_PATH)
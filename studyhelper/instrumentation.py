@@ -0,0 +1,245 @@
+"""Per-stage wall time, retries, tokens and cache outcomes, exported as Prometheus text"""
+import bisect
+import functools
+import inspect
+import json
+import logging
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+
+from .caches import cache_resource
+from .config import JSON_LOGS, METRICS_HOST, METRICS_PORT, logger
+
+
+metrics_logger = logging.getLogger("studyhelper.metrics")
+
+
+class Instrumentation:
+    """Per-stage wall time, retries, tokens and cache outcomes for StudyTools and the UI modes
+
+    Every instrumented() call is a span. Its duration goes into a per-stage
+    histogram and a JSON line on the studyhelper.metrics logger, and,
+    between begin_trace() and end_trace(), into the calling thread's trace
+    (the waterfall of one Streamlit run). Counters and histograms render
+    in the Prometheus text format.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    METRICS = {
+        'studyhelper_stage_seconds': ("histogram", "Wall time of instrumented stages"),
+        'studyhelper_stage_errors_total': ("counter", "Instrumented stages that raised"),
+        'studyhelper_retries_total': ("counter", "Network requests retried after a failure or 429"),
+        'studyhelper_tokens_total': ("counter", "Groq tokens used"),
+        'studyhelper_cache_requests_total': ("counter", "Cache lookups by cache and outcome"),
+    }
+    MAX_TRACE_SPANS = 500
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._task_spans = weakref.WeakKeyDictionary()  # asyncio task -> its open spans
+        self._counters = Counter()  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [per-bucket counts, sum, count]
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[name, tuple(sorted(labels.items()))] += value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.BUCKETS) + 1), 0.0, 0]
+            histogram[0][bisect.bisect_left(self.BUCKETS, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def _open_spans(self):
+        task = self._current_task()
+        if task is not None:
+            # Tasks on one event loop share a thread, so each keeps its own stack
+            spans = self._task_spans.get(task)
+            if spans is None:
+                spans = self._task_spans[task] = []
+            return spans
+        spans = getattr(self._local, 'open', None)
+        if spans is None:
+            spans = self._local.open = []
+        return spans
+
+    @staticmethod
+    def _current_task():
+        asyncio = sys.modules.get("asyncio")  # only asked when something already uses asyncio
+        if asyncio is None:
+            return None
+        try:
+            return asyncio.current_task()
+        except RuntimeError:
+            return None
+
+    def begin_trace(self):
+        """Start recording this thread's spans for a waterfall"""
+        self._local.trace = []
+        self._local.origin = time.perf_counter()
+
+    def end_trace(self):
+        """Stop recording and return this thread's spans in start order"""
+        trace = getattr(self._local, 'trace', None) or []
+        self._local.trace = None
+        return trace
+
+    @contextmanager
+    def span(self, stage):
+        spans = self._open_spans()
+        started = time.perf_counter()
+        record = {'stage': stage, 'depth': len(spans), 'attrs': {}}
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None and len(trace) < self.MAX_TRACE_SPANS:
+            record['start'] = started - self._local.origin
+            trace.append(record)
+        spans.append(record)
+        status = "ok"
+        try:
+            yield record
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            # A generator's span may close after spans opened later on this thread
+            spans.remove(record)
+            record['duration'] = duration = time.perf_counter() - started
+            record['status'] = status
+            self.observe('studyhelper_stage_seconds', duration, stage=stage)
+            if status == "error":
+                self.inc('studyhelper_stage_errors_total', stage=stage)
+            if metrics_logger.isEnabledFor(logging.INFO):
+                metrics_logger.info(json.dumps({
+                    'event': "stage", 'stage': stage, 'ms': round(duration * 1000, 3),
+                    'status': status, 'thread': threading.current_thread().name, **record['attrs']
+                }))
+
+    def note(self, **attrs):
+        """Attach attributes to the innermost open span"""
+        spans = self._open_spans()
+        if spans:
+            spans[-1]['attrs'].update(attrs)
+
+    def retry(self, operation):
+        self.inc('studyhelper_retries_total', operation=operation)
+        spans = self._open_spans()
+        if spans:
+            spans[-1]['attrs']['retries'] = spans[-1]['attrs'].get('retries', 0) + 1
+
+    def cache(self, cache, outcome):
+        self.inc('studyhelper_cache_requests_total', cache=cache, outcome=outcome)
+        self.note(**{f"{cache}_cache": outcome})
+
+    def tokens(self, prompt_tokens, completion_tokens):
+        self.inc('studyhelper_tokens_total', prompt_tokens, kind="prompt")
+        self.inc('studyhelper_tokens_total', completion_tokens, kind="completion")
+        self.note(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    @staticmethod
+    def _escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    @staticmethod
+    def _labels(labels, **extra):
+        pairs = [*labels, *extra.items()]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{Instrumentation._escape(value)}"' for key, value in pairs) + "}"
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h[0]), h[1], h[2])) for key, h in self._histograms.items())
+        lines = []
+        for name, (kind, help_text) in self.METRICS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            if kind == "counter":
+                lines += [
+                    f"{name}{self._labels(labels)} {value:g}"
+                    for (metric, labels), value in counters if metric == name
+                ]
+                continue
+            for (metric, labels), (buckets, total, count) in histograms:
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket in zip(self.BUCKETS + ("+Inf",), buckets):
+                    cumulative += bucket
+                    lines.append(f"{name}_bucket{self._labels(labels, le=bound)} {cumulative}")
+                lines.append(f"{name}_sum{self._labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def instrumented(stage):
+    """Record each call of the decorated function (generator or coroutine) as a span named stage"""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with get_instrumentation().span(stage):
+                    return await func(*args, **kwargs)
+        elif inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with get_instrumentation().span(stage):
+                    yield from func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with get_instrumentation().span(stage):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def serve_metrics(instrumentation, host, port):
+    """Serve /metrics in the Prometheus text format from a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = instrumentation.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="studyhelper-metrics", daemon=True).start()
+    return server
+
+
+@cache_resource
+def get_instrumentation():
+    """Process-wide metrics registry; also starts the metrics server and JSON logging when configured"""
+    instrumentation = Instrumentation()
+    if JSON_LOGS and not metrics_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        metrics_logger.addHandler(handler)
+        metrics_logger.setLevel(logging.INFO)
+        metrics_logger.propagate = False
+    if METRICS_PORT:
+        try:
+            serve_metrics(instrumentation, METRICS_HOST, METRICS_PORT)
+        except OSError as e:
+            logger.warning("Could not start the metrics server on %s:%s: %s", METRICS_HOST, METRICS_PORT, e)
+    return instrumentation
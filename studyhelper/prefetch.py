@@ -0,0 +1,67 @@
+"""Background preparation of quiz, notes and related topics while the user reads"""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .caches import cache_resource
+from .tools import StudyTools
+
+
+class StudyPrefetcher:
+    """Speculatively prepares quiz, notes and related topics while the user reads
+
+    Work runs on a shared thread pool. Each session owns one result slot
+    (a plain dict kept in session state) holding the futures for its
+    current topic; starting a prefetch for another topic cancels them.
+    """
+
+    def __init__(self, max_workers=6):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="studyhelper-prefetch")
+
+    @staticmethod
+    def _run_headless(api_key, func, *args):
+        with StudyTools.headless(api_key):
+            return func(*args)
+
+    @staticmethod
+    def cancel(slot):
+        """Cancel every pending job in a slot (jobs already running finish but are ignored)"""
+        for future in slot.get('futures', {}).values():
+            future.cancel()
+        slot['futures'] = {}
+
+    def start(self, slot, topic, content, api_key, difficulty, num_questions):
+        """Queue quiz, notes and related-topic jobs for a topic in the given slot"""
+        content_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        if slot.get('topic') != topic or slot.get('content_hash') != content_hash:
+            self.cancel(slot)
+            slot.update(topic=topic, content_hash=content_hash, futures={})
+
+        futures = slot['futures']
+        quiz_key = ('quiz', difficulty, num_questions)
+        jobs = {'related': (StudyTools.get_related_topics, topic, content)}
+        if api_key:
+            jobs[quiz_key] = (StudyTools.generate_enhanced_quiz_with_ai, content, topic, difficulty, num_questions)
+            jobs['notes'] = (StudyTools.generate_enhanced_notes_with_ai, content, topic)
+
+        for key, (func, *args) in jobs.items():
+            if key not in futures:
+                futures[key] = self._executor.submit(self._run_headless, api_key, func, *args)
+
+    @staticmethod
+    def take(slot, key, topic, content):
+        """Return a prefetched result for the slot's topic, waiting if it is still in flight"""
+        future = slot.get('futures', {}).get(key)
+        if future is None or future.cancelled() or slot.get('topic') != topic:
+            return None
+        if slot.get('content_hash') != hashlib.sha1(content.encode('utf-8')).hexdigest():
+            return None
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+
+@cache_resource
+def get_prefetcher():
+    """Process-wide prefetch thread pool"""
+    return StudyPrefetcher()
@@ -0,0 +1,260 @@
+"""Offline quiz generation and local grading"""
+import difflib
+import functools
+import heapq
+import random
+import re
+
+from .quiz_session import QuizSession
+from .search_index import SearchIndex
+from .text import analyze_text
+
+
+def quiz_item(question, answer=None, kind="open", **extra):
+    """A quiz question as a plain dict; answer is None when no reference answer is known"""
+    return {'type': kind, 'question': question, 'answer': answer, **extra}
+
+
+class QuizEngine:
+    """LLM-free quiz questions built from the sentence and key-term index of one text
+
+    Questions are cloze deletions of key terms, true/false statements
+    (half of them made false by swapping in another key term from the same
+    article), matching of terms to their blanked-out context, and for
+    harder quizzes open questions with the source sentences as reference
+    answers. Every item carries its answer for grading.
+    """
+
+    MIN_SENTENCE_WORDS = 6
+    MAX_SENTENCE_WORDS = 60
+    BLANK = "______"
+    MIX = {
+        "easy": ("cloze", "true_false", "cloze", "matching", "true_false"),
+        "medium": ("cloze", "true_false", "explain", "matching", "cloze"),
+        "hard": ("explain", "relate", "true_false", "cloze", "relate")
+    }
+
+    def __init__(self, text, topic=None, seed=0):
+        self.analysis = analyze_text(text)
+        self.topic = topic or "the topic"
+        self.rng = random.Random(seed)
+        sentences = self.analysis.sentences
+        self.term_sentences = {}
+        for term in self.analysis.key_terms(40):
+            # Asking about the topic itself ("the role of Photosynthesis in Photosynthesis") makes poor questions
+            if topic and term.casefold() == topic.casefold():
+                continue
+            usable = [
+                i for i in self.analysis.phrase_sentences[term]
+                if self.MIN_SENTENCE_WORDS <= len(sentences[i].split()) <= self.MAX_SENTENCE_WORDS
+            ]
+            if usable:
+                self.term_sentences[term] = sorted(usable, key=lambda i: -self.analysis.sentence_scores[i])
+        self.terms = list(self.term_sentences)
+        self._used_terms = set()
+        self._used_sentences = set()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _term_pattern(term):
+        return re.compile(r'(?<!\w)' + re.escape(term) + r'(?!\w)', re.IGNORECASE)
+
+    def _take(self, count=1):
+        """Next unused terms, each with an unused sentence that mentions it"""
+        picked = []
+        for term in self.terms:
+            if term in self._used_terms:
+                continue
+            sentence_id = next((i for i in self.term_sentences[term] if i not in self._used_sentences), None)
+            if sentence_id is None:
+                continue
+            picked.append((term, sentence_id))
+            self._used_terms.add(term)
+            self._used_sentences.add(sentence_id)
+            if len(picked) == count:
+                return picked
+        for term, sentence_id in picked:
+            self._used_terms.discard(term)
+            self._used_sentences.discard(sentence_id)
+        return None
+
+    def _blank(self, term, sentence):
+        return self._term_pattern(term).sub(self.BLANK, sentence, count=1)
+
+    def cloze(self):
+        picked = self._take()
+        if not picked:
+            return None
+        term, sentence_id = picked[0]
+        sentence = self.analysis.sentences[sentence_id]
+        return quiz_item(f"Fill in the blank: {self._blank(term, sentence)}", term, "cloze")
+
+    def true_false(self):
+        picked = self._take()
+        if not picked:
+            return None
+        term, sentence_id = picked[0]
+        sentence = self.analysis.sentences[sentence_id]
+        if self.rng.random() < 0.5:
+            size = len(term.split())
+            swaps = [
+                other for other in self.terms
+                if other != term and not self._term_pattern(other).search(sentence)
+                and len(other.split()) == size
+            ]
+            if swaps:
+                swap = self.rng.choice(swaps)
+                statement = self._term_pattern(term).sub(lambda _: swap, sentence, count=1)
+                return quiz_item(f"True or False: {statement}", "False", "true_false", explanation=sentence)
+        return quiz_item(f"True or False: {sentence}", "True", "true_false", explanation=sentence)
+
+    def matching(self, size=4):
+        picked = self._take(size) or self._take(3)
+        if not picked:
+            return None
+        pairs = {term: self._blank(term, self.analysis.sentences[i]) for term, i in picked}
+        options = list(pairs.values())
+        self.rng.shuffle(options)
+        return quiz_item(
+            "Match each term with the statement it completes.",
+            "; ".join(f"{term} → {statement}" for term, statement in pairs.items()),
+            "matching",
+            pairs=pairs,
+            options=options
+        )
+
+    def explain(self):
+        picked = self._take()
+        if not picked:
+            return None
+        term, sentence_id = picked[0]
+        return quiz_item(
+            f"Explain the role of {term} in {self.topic}.",
+            self.analysis.sentences[sentence_id],
+            "open"
+        )
+
+    def relate(self):
+        """How two key terms that share a sentence are connected"""
+        sentences = self.analysis.sentences
+        for term in self.terms:
+            if term in self._used_terms:
+                continue
+            for sentence_id in self.term_sentences[term]:
+                if sentence_id in self._used_sentences:
+                    continue
+                other = next(
+                    (t for t in self.terms if t != term and t not in self._used_terms
+                     and sentence_id in self.term_sentences[t]),
+                    None
+                )
+                if other:
+                    self._used_terms.update((term, other))
+                    self._used_sentences.add(sentence_id)
+                    return quiz_item(
+                        f"How are {term} and {other} related in the context of {self.topic}?",
+                        sentences[sentence_id],
+                        "open"
+                    )
+        return self.explain()
+
+    def generate(self, difficulty="medium", num_questions=5):
+        """A mix of question types for the difficulty; fewer items when the text runs out"""
+        mix = self.MIX.get(difficulty, self.MIX["medium"])
+        items, misses = [], 0
+        while len(items) < num_questions and misses < len(mix):
+            kind = mix[(len(items) + misses) % len(mix)]
+            item = getattr(self, kind)()
+            if item:
+                items.append(item)
+                misses = 0
+            else:
+                misses += 1
+        return items
+
+
+def grade(verdict, score, feedback, graded_by="local"):
+    """A graded answer: verdict is correct, partial, incorrect, unanswered or review"""
+    return {'verdict': verdict, 'score': score, 'feedback': feedback, 'graded_by': graded_by}
+
+
+class LocalGrader:
+    """Lexical pre-grader that settles clear-cut answers without an AI call
+
+    Answers are compared as sets of content words (stopwords dropped, a
+    plural "s" stripped): against the item's reference answer when it has
+    one, otherwise against the source sentences that best match the
+    question. Open answers are only failed locally when they are empty or
+    next to it; a low overlap may still be a correct answer in other words,
+    so grade_answer() returns None for it, as for any answer that is not
+    clearly right, leaving it to the AI grader.
+    """
+
+    CORRECT_RECALL = 0.6  # share of the reference's content words the answer must cover
+    CORRECT_PRECISION = 0.6  # share of the answer's content words found in the reference
+    MIN_ANSWER_CHARS = 3  # shorter open answers ("x", "?") are failed without asking the AI
+    CLOZE_MATCH = 0.8  # difflib ratio accepted as a misspelling of the right term
+    CLOZE_MISMATCH = 0.4
+    CONTEXT_SENTENCES = 2
+
+    def __init__(self, content):
+        self.analysis = analyze_text(content) if content else None
+        self._sentence_words = None
+
+    @staticmethod
+    def words(text):
+        return {w[:-1] if len(w) > 3 and w.endswith("s") else w for w in SearchIndex.tokenize(text)}
+
+    def context(self, question):
+        """The source sentences sharing the most content words with a question"""
+        if not self.analysis:
+            return ""
+        if self._sentence_words is None:
+            self._sentence_words = [self.words(s) for s in self.analysis.sentences]
+        wanted = self.words(question)
+        best = heapq.nlargest(
+            self.CONTEXT_SENTENCES,
+            range(len(self._sentence_words)),
+            key=lambda i: len(wanted & self._sentence_words[i])
+        )
+        return " ".join(self.analysis.sentences[i] for i in sorted(best))
+
+    def grade_answer(self, item, answer):
+        if not QuizSession.is_answered(answer):
+            return grade("unanswered", 0.0, "No answer given.")
+
+        kind, expected = item['type'], item.get('answer')
+        if kind in ("true_false", "multiple_choice"):
+            if answer == expected:
+                return grade("correct", 1.0, "Correct.")
+            if kind == "multiple_choice":
+                return grade("incorrect", 0.0, f"The correct answer is: {expected}. {item.get('source', '')}".strip())
+            return grade("incorrect", 0.0, f"The statement is {expected.lower()}: {item.get('explanation') or item.get('source', '')}".strip())
+
+        if kind == "matching":
+            matches = answer if isinstance(answer, dict) else {}
+            right = sum(matches.get(term) == statement for term, statement in item['pairs'].items())
+            total = len(item['pairs'])
+            verdict = "correct" if right == total else "partial" if right else "incorrect"
+            return grade(verdict, right / total, f"{right}/{total} matched correctly.")
+
+        if kind == "cloze":
+            ratio = difflib.SequenceMatcher(None, answer.strip().casefold(), expected.casefold()).ratio()
+            if ratio >= self.CLOZE_MATCH:
+                return grade("correct", 1.0, f"Correct: {expected}.")
+            if ratio < self.CLOZE_MISMATCH and not (self.words(answer) & self.words(expected)):
+                return grade("incorrect", 0.0, f"The missing term is: {expected}.")
+            return None
+
+        reference = expected or self.context(item['question'])
+        reference_words, answer_words = self.words(reference), self.words(answer)
+        if len(answer.strip()) < self.MIN_ANSWER_CHARS or not answer_words:
+            key_point = f" Key point: {reference}" if reference else ""
+            return grade("incorrect", 0.0, "The answer is too short to grade." + key_point)
+        if not reference_words:
+            return None
+        shared = len(reference_words & answer_words)
+        recall, precision = shared / len(reference_words), shared / len(answer_words)
+        if expected and recall >= self.CORRECT_RECALL and precision >= self.CORRECT_PRECISION:
+            return grade("correct", 1.0, "Your answer covers the key points of the source.")
+        return None
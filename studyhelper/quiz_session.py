@@ -0,0 +1,39 @@
+"""A generated quiz and its answers as kept in Streamlit session state"""
+import hashlib
+import uuid
+
+
+class QuizSession:
+    """A generated quiz and the user's answers, kept in session state across reruns"""
+
+    def __init__(self, key):
+        self.key = key
+        self.id = uuid.uuid4().hex[:8]  # namespaces widget keys so answers never leak between quizzes
+        self.questions = []
+        self.answers = {}
+        self.grades = None
+        self.graded_answers = None
+
+    @staticmethod
+    def make_key(content, topic, difficulty, num_questions):
+        """Identify a quiz by what it was generated from"""
+        content_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        return (content_hash, topic, difficulty, num_questions)
+
+    def matches(self, content, topic, difficulty, num_questions):
+        return self.key == QuizSession.make_key(content, topic, difficulty, num_questions)
+
+    def answer_key(self, i):
+        return f"answer_{self.id}_{i}"
+
+    def reset_widgets(self):
+        """New widget keys and no answers, for when the questions on screen were replaced"""
+        self.id = uuid.uuid4().hex[:8]
+        self.answers = {}
+
+    @staticmethod
+    def is_answered(answer):
+        """True for a non-blank text answer, a chosen option, or a fully matched set"""
+        if isinstance(answer, dict):
+            return bool(answer) and all(answer.values())
+        return isinstance(answer, str) and bool(answer.strip())
@@ -0,0 +1,199 @@
+"""Content-based related topics; NumPy is imported by get_related_engine() on first use"""
+import threading
+from collections import Counter
+
+from .caches import WikiCache, cache_resource, get_wiki_cache
+from .search_index import SearchIndex
+
+# NumPy powers the engine; without it suggestions come from Wikipedia only
+np = None
+
+
+class RelatedTopicsEngine:
+    """Content-based related topics from a TF-IDF matrix over every article seen
+
+    Articles are rows of a sparse matrix held as CSR-style NumPy arrays
+    (row offsets, term ids, log-scaled term frequencies). New articles are
+    buffered and appended on the next query, which also updates document
+    frequencies and IDF weights. The normalized term-major (CSC) view is
+    only rebuilt once the rows appended since the last build pass
+    REBUILD_FRACTION of it; until then the newer rows are weighted and
+    scored on their own, and the built rows keep the IDF weights of their
+    build. A query touches only the postings of its own terms, and the top
+    k rows of the cosine scores are picked with argpartition.
+    """
+
+    MIN_SIMILARITY = 0.05
+    REBUILD_FRACTION = 0.1  # share of new rows that triggers a rebuild of the CSC view
+    REBUILD_MIN_ROWS = 256  # below this many new rows the CSC view is never rebuilt
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._titles = []
+        self._rows = {}
+        self._vocabulary = {}
+        self._pending = []
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._tf = np.zeros(0, dtype=np.float32)
+        self._df = np.zeros(0, dtype=np.int64)
+        self._built = 0  # rows in the CSC view
+        self._colptr = np.zeros(1, dtype=np.int64)
+        self._stale = True
+        self._loaded = False
+
+    def add(self, title, content):
+        """Queue an article; titles already known are ignored"""
+        key = WikiCache.normalize(title)
+        terms = Counter(SearchIndex.tokenize(content))
+        with self._lock:
+            if not terms or key in self._rows:
+                return
+            self._rows[key] = len(self._titles)
+            self._titles.append(title)
+            self._pending.append(terms)
+            self._stale = True
+
+    def _load_cached(self):
+        """Seed the matrix with every article already in the Wikipedia cache"""
+        self._loaded = True
+        for result in get_wiki_cache().summaries():
+            if result.get('title') and result.get('content'):
+                self.add(result['title'], result['content'])
+
+    def _refresh(self):
+        """Append pending rows and update the derived arrays; call with the lock held"""
+        if self._pending:
+            columns, weights, lengths = [], [], []
+            for terms in self._pending:
+                columns.extend(self._vocabulary.setdefault(term, len(self._vocabulary)) for term in terms)
+                weights.extend(terms.values())
+                lengths.append(len(terms))
+            self._pending = []
+            columns = np.asarray(columns, dtype=np.int32)
+            self._indices = _extend(self._indices, columns)
+            self._tf = _extend(self._tf, 1 + np.log(np.asarray(weights, dtype=np.float32)))
+            self._indptr = np.concatenate([self._indptr, self._indptr[-1] + np.cumsum(lengths)])
+            df = np.bincount(columns, minlength=len(self._vocabulary))
+            df[:len(self._df)] += self._df
+            self._df = df
+
+        n_docs = len(self._indptr) - 1
+        self._idf = (np.log((1 + n_docs) / (1 + self._df)) + 1).astype(np.float32)
+        if n_docs - self._built > max(self.REBUILD_MIN_ROWS, self.REBUILD_FRACTION * self._built):
+            self._build()
+        # Rows appended since the last build, weighted with the current IDF
+        start = self._indptr[self._built]
+        self._new_rows, self._new_weights = self._row_weights(self._built, n_docs)
+        self._new_indices = self._indices[start:]
+        self._stale = False
+
+    def _row_weights(self, first, last):
+        """(row ids, unit-normalized TF-IDF weights) of the entries of rows first to last - 1"""
+        start, end = self._indptr[first], self._indptr[last]
+        rows = np.repeat(np.arange(first, last, dtype=np.int32), np.diff(self._indptr[first:last + 1]))
+        weights = self._tf[start:end] * self._idf[self._indices[start:end]]
+        norms = np.sqrt(np.bincount(rows - first, weights=weights * weights, minlength=last - first))
+        weights /= np.maximum(norms, 1e-12)[rows - first]
+        return rows, weights
+
+    def _build(self):
+        """Rebuild the normalized CSC view over every row"""
+        n_docs = len(self._indptr) - 1
+        rows, weights = self._row_weights(0, n_docs)
+        order = np.argsort(self._indices, kind='stable')
+        self._csc_rows = rows[order]
+        self._csc_weights = weights[order].astype(np.float32)
+        self._colptr = np.concatenate([[0], np.cumsum(self._df)])
+        self._built = n_docs
+
+    def related(self, title, content=None, k=6):
+        """Return up to k titles most similar to an article, best first
+
+        The article is described by content when given, otherwise by its
+        indexed row, otherwise by the words of its title.
+        """
+        if not self._loaded:
+            self._load_cached()
+        with self._lock:
+            if self._stale:
+                self._refresh()
+            if not self._titles:
+                return []
+
+            key = WikiCache.normalize(title)
+            columns, query = self._query_vector(key, content or ("" if key in self._rows else title))
+            if not len(columns):
+                return []
+
+            scores = np.zeros(len(self._titles))
+            # Terms first seen after the last build have no postings in the CSC view
+            built = columns < len(self._colptr) - 1
+            if built.any():
+                spans = [(self._colptr[c], self._colptr[c + 1]) for c in columns[built]]
+                hit_rows = np.concatenate([self._csc_rows[s:e] for s, e in spans])
+                hit_weights = np.concatenate([self._csc_weights[s:e] * q for (s, e), q in zip(spans, query[built])])
+                scores += np.bincount(hit_rows, weights=hit_weights, minlength=len(self._titles))
+            if len(self._new_rows):
+                order = np.argsort(columns)
+                position = np.minimum(np.searchsorted(columns[order], self._new_indices), len(columns) - 1)
+                hits = columns[order][position] == self._new_indices
+                scores += np.bincount(self._new_rows[hits], minlength=len(self._titles),
+                                      weights=self._new_weights[hits] * query[order][position[hits]])
+            if key in self._rows:
+                scores[self._rows[key]] = 0
+            # The query's own article (e.g. reached through a redirect) and exact duplicates
+            scores[scores > 0.999] = 0
+
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [self._titles[i] for i in top if scores[i] >= self.MIN_SIMILARITY]
+
+    def _query_vector(self, key, text):
+        """Unit TF-IDF vector (columns, weights) for text, or for the indexed row when text is empty"""
+        if text:
+            terms = Counter(SearchIndex.tokenize(text))
+            columns = np.asarray(
+                [self._vocabulary.get(term, -1) for term in terms], dtype=np.int64
+            )
+            tf = 1 + np.log(np.asarray(list(terms.values()), dtype=np.float32))
+            known = columns >= 0
+            columns, tf = columns[known], tf[known]
+        else:
+            row = self._rows[key]
+            start, end = self._indptr[row], self._indptr[row + 1]
+            columns, tf = self._indices[start:end], self._tf[start:end]
+        weights = tf * self._idf[columns]
+        norm = np.linalg.norm(weights)
+        return columns, weights / norm if norm else weights
+
+    def stats(self):
+        return {'documents': len(self._titles), 'terms': len(self._vocabulary)}
+
+
+def _extend(array, values):
+    """array followed by values, written into spare capacity behind array when there is some
+
+    array must be a prefix of its base (as every array this returns is).
+    Capacity doubles when it runs out, so appending a few rows does not
+    copy the whole matrix.
+    """
+    base = array.base if array.base is not None else array
+    used = len(array)
+    if used + len(values) > len(base):
+        base = np.empty(max(2 * len(base), used + len(values), 1024), dtype=array.dtype)
+        base[:used] = array
+    base[used:used + len(values)] = values
+    return base[:used + len(values)]
+
+
+@cache_resource
+def get_related_engine():
+    """Process-wide related-topics engine, or None when NumPy is not installed"""
+    global np
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    return RelatedTopicsEngine()
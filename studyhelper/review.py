@@ -0,0 +1,170 @@
+"""Spaced-repetition review cards scheduled with SM-2"""
+import hashlib
+import json
+import sqlite3
+import time
+
+from .caches import SQLiteStore, WikiCache, cache_resource
+from .config import REVIEW_DB_PATH, logger
+from .quiz import QuizEngine, quiz_item
+
+
+class ReviewDeck(SQLiteStore):
+    """Per-user flashcards scheduled with SM-2, built from quiz items and key terms
+
+    Each card stores its quiz_item() dict with the SM-2 state (ease,
+    interval, repetitions). The (user_id, due) index is the priority queue:
+    the next due card or a whole review session is one range scan from its
+    head, O(log n) to reach whatever the deck size. Adding a card that
+    already exists keeps its review progress.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cards (
+        user_id TEXT NOT NULL,
+        card_id TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        item TEXT NOT NULL,
+        ease REAL NOT NULL,
+        interval_days REAL NOT NULL,
+        repetitions INTEGER NOT NULL,
+        lapses INTEGER NOT NULL,
+        due REAL NOT NULL,
+        reviewed REAL,
+        PRIMARY KEY (user_id, card_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS cards_due ON cards(user_id, due);
+    """
+
+    INITIAL_EASE = 2.5
+    MIN_EASE = 1.3
+    # Self-rated recall on SM-2's 0-5 scale
+    QUALITY = {"again": 1, "hard": 3, "good": 4, "easy": 5}
+    TERM_CARDS = 8
+
+    @staticmethod
+    def schedule(ease, interval, repetitions, quality):
+        """SM-2: the next (ease, interval in days, repetitions) after a review of the given quality"""
+        if quality < 3:
+            repetitions, interval = 0, 1
+        else:
+            repetitions += 1
+            interval = 1 if repetitions == 1 else 6 if repetitions == 2 else round(interval * ease)
+        ease = max(ReviewDeck.MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        return ease, interval, repetitions
+
+    @staticmethod
+    def card_id(topic, item):
+        return hashlib.sha1(f"{WikiCache.normalize(topic)}\n{item['question']}".encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def cards_from_quiz(items):
+        """Quiz items that make reviewable cards; matching items become one cloze card per term"""
+        cards = []
+        for item in items:
+            if item['type'] == "matching":
+                cards.extend(
+                    quiz_item(f"Fill in the blank: {statement}", term, "cloze")
+                    for term, statement in item['pairs'].items()
+                )
+            elif item.get('answer'):
+                cards.append(item)
+        return cards
+
+    @staticmethod
+    def cards_from_terms(content, topic=None, limit=TERM_CARDS):
+        """Cloze cards for the key terms of a text, as listed in the study notes"""
+        engine = QuizEngine(content, topic)
+        cards = []
+        while len(cards) < limit:
+            item = engine.cloze()
+            if item is None:
+                break
+            cards.append(item)
+        return cards
+
+    def add_cards(self, user_id, topic, items, now=None):
+        """Add new cards, due immediately; returns how many were new"""
+        now = time.time() if now is None else now
+        rows = [
+            (user_id, self.card_id(topic, item), topic, json.dumps(item), self.INITIAL_EASE, now)
+            for item in items
+        ]
+        try:
+            conn = self._connect()
+            with conn:
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO cards "
+                    "(user_id, card_id, topic, item, ease, interval_days, repetitions, lapses, due) "
+                    "VALUES (?, ?, ?, ?, ?, 0, 0, 0, ?)",
+                    rows
+                )
+                return conn.total_changes - before
+        except sqlite3.Error as e:
+            logger.warning("Could not add review cards for %s: %s", topic, e)
+            return 0
+
+    def due_cards(self, user_id, limit=20, now=None):
+        """A review session: up to limit due cards, most overdue first"""
+        now = time.time() if now is None else now
+        try:
+            rows = self._connect().execute(
+                "SELECT card_id, topic, item, repetitions, due FROM cards "
+                "WHERE user_id = ? AND due <= ? ORDER BY due LIMIT ?",
+                (user_id, now, limit)
+            ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [
+            {'card_id': card_id, 'topic': topic, 'item': json.loads(item), 'new': repetitions == 0, 'due': due}
+            for card_id, topic, item, repetitions, due in rows
+        ]
+
+    def next_due(self, user_id):
+        """Due time of the user's next card, or None for an empty deck"""
+        try:
+            return self._connect().execute(
+                "SELECT MIN(due) FROM cards WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+    def review(self, user_id, card_id, quality, now=None):
+        """Record a review and reschedule the card; returns its next due time"""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        with conn:
+            row = conn.execute(
+                "SELECT ease, interval_days, repetitions FROM cards WHERE user_id = ? AND card_id = ?",
+                (user_id, card_id)
+            ).fetchone()
+            if row is None:
+                return None
+            ease, interval, repetitions = self.schedule(*row, quality)
+            due = now + interval * 86400
+            conn.execute(
+                "UPDATE cards SET ease = ?, interval_days = ?, repetitions = ?, "
+                "lapses = lapses + ?, due = ?, reviewed = ? WHERE user_id = ? AND card_id = ?",
+                (ease, interval, repetitions, int(quality < 3), due, now, user_id, card_id)
+            )
+        return due
+
+    def stats(self, user_id, now=None):
+        """Card and due counts for a user"""
+        now = time.time() if now is None else now
+        try:
+            conn = self._connect()
+            total = conn.execute("SELECT COUNT(*) FROM cards WHERE user_id = ?", (user_id,)).fetchone()[0]
+            due = conn.execute(
+                "SELECT COUNT(*) FROM cards WHERE user_id = ? AND due <= ?", (user_id, now)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            total = due = 0
+        return {'cards': total, 'due': due}
+
+
+@cache_resource
+def get_review_deck():
+    """Process-wide spaced-repetition card store (survives Streamlit reruns and restarts)"""
+    return ReviewDeck(REVIEW_DB_PATH)
@@ -0,0 +1,282 @@
+"""BM25 full-text index over every article StudyHelper has seen"""
+import atexit
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from array import array
+from collections import Counter
+
+from .caches import SQLiteStore, WikiCache, cache_resource
+from .config import SEARCH_INDEX_FLUSH_EVERY, SEARCH_INDEX_PATH, logger
+from .text import STOPWORDS
+
+
+_INDEX_TOKEN_RE = re.compile(r"\w+")
+
+
+def encode_varints(values):
+    """LEB128-encode non-negative integers"""
+    out = bytearray()
+    for value in values:
+        while value > 0x7F:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data):
+    """Inverse of encode_varints"""
+    values, value, shift = [], 0, 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value, shift = 0, 0
+    return values
+
+
+class SearchIndex(SQLiteStore):
+    """Incremental BM25 full-text index over every article the app has seen
+
+    Articles are buffered and written in segments: one row per term holding
+    that segment's postings as delta-encoded doc ids and term frequencies in
+    varints. A term whose postings are split over too many segments is
+    partly merged back when it is next written, so queries read a handful
+    of compact blobs per term. Only the per-document lengths are
+    kept in memory (4 bytes each), which keeps millions of documents within
+    a few megabytes.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS docs (
+        doc_id INTEGER PRIMARY KEY,
+        title_key TEXT NOT NULL UNIQUE,
+        title TEXT NOT NULL,
+        length INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS terms (
+        term TEXT PRIMARY KEY,
+        df INTEGER NOT NULL,
+        segments INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS terms_segments ON terms(segments);
+    CREATE TABLE IF NOT EXISTS postings (
+        term TEXT NOT NULL,
+        segment INTEGER NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (term, segment)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    """
+
+    K1 = 1.2
+    B = 0.75
+    # Title words count this many times, so "Mercury (planet)" outranks articles that merely mention Mercury
+    TITLE_WEIGHT = 3
+    MAX_SEGMENTS = 8
+
+    def __init__(self, path, flush_every=SEARCH_INDEX_FLUSH_EVERY):
+        self.flush_every = flush_every
+        self._pending = []
+        self._flush_lock = threading.Lock()
+        self._lengths = array('I', [0])
+        super().__init__(path)
+
+    @staticmethod
+    def tokenize(text):
+        return [t for t in _INDEX_TOKEN_RE.findall(text.casefold()) if t not in STOPWORDS]
+
+    def add(self, title, content):
+        """Queue an article for indexing; articles already indexed are ignored"""
+        with self._lock:
+            self._pending.append((title, content))
+            flush = len(self._pending) >= self.flush_every
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Write queued articles as one new segment"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            conn = self._connect()
+            with conn:
+                postings = {}
+                added = total_length = 0
+                segment = None
+                for title, content in pending:
+                    title_terms = self.tokenize(title)
+                    terms = Counter(self.tokenize(content))
+                    for term in title_terms:
+                        terms[term] += self.TITLE_WEIGHT
+                    length = sum(terms.values())
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO docs (title_key, title, length) VALUES (?, ?, ?)",
+                        (WikiCache.normalize(title), title, length)
+                    )
+                    if not cursor.rowcount:
+                        continue
+                    doc_id = cursor.lastrowid
+                    if segment is None:
+                        segment = doc_id
+                    added += 1
+                    total_length += length
+                    for term, tf in terms.items():
+                        postings.setdefault(term, []).append((doc_id, tf))
+                if not added:
+                    return 0
+
+                conn.executemany(
+                    "INSERT INTO postings (term, segment, data) VALUES (?, ?, ?)",
+                    ((term, segment, self._encode(entries)) for term, entries in postings.items())
+                )
+                conn.executemany(
+                    "INSERT INTO terms (term, df, segments) VALUES (?, ?, 1) "
+                    "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df, segments = segments + 1",
+                    ((term, len(entries)) for term, entries in postings.items())
+                )
+                conn.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+                    (('doc_count', added), ('total_length', total_length))
+                )
+                for (term,) in conn.execute(
+                    "SELECT term FROM terms WHERE segments > ?", (self.MAX_SEGMENTS,)
+                ).fetchall():
+                    self._merge(conn, term)
+            return added
+
+    @staticmethod
+    def _encode(entries):
+        """Postings as (doc id delta, tf) varint pairs; entries must be sorted by doc id"""
+        values, previous = [], 0
+        for doc_id, tf in entries:
+            values.append(doc_id - previous)
+            values.append(tf)
+            previous = doc_id
+        return encode_varints(values)
+
+    @staticmethod
+    def _decode(data):
+        values = decode_varints(data)
+        doc_id = 0
+        for i in range(0, len(values), 2):
+            doc_id += values[i]
+            yield doc_id, values[i + 1]
+
+    def _merge(self, conn, term):
+        """Rewrite a term's newest segments as one row
+
+        Segments are merged from the newest back while the next older one is
+        at most twice their combined size, so large posting lists are
+        rewritten only O(log n) times rather than on every merge.
+        """
+        rows = conn.execute(
+            "SELECT segment, data FROM postings WHERE term = ? ORDER BY segment", (term,)
+        ).fetchall()
+        merged = [rows.pop()]
+        size = len(merged[0][1])
+        while rows and len(rows[-1][1]) <= 2 * size:
+            merged.append(rows.pop())
+            size += len(merged[-1][1])
+        if len(merged) < 2:
+            return
+        first_segment = merged[-1][0]
+        entries = sorted(entry for _, data in merged for entry in self._decode(data))
+        conn.execute("DELETE FROM postings WHERE term = ? AND segment >= ?", (term, first_segment))
+        conn.execute(
+            "INSERT INTO postings (term, segment, data) VALUES (?, ?, ?)",
+            (term, first_segment, self._encode(entries))
+        )
+        conn.execute("UPDATE terms SET segments = ? WHERE term = ?", (len(rows) + 1, term))
+
+    def _doc_lengths(self, conn):
+        """In-memory doc length table, extended with documents written since the last query"""
+        with self._lock:
+            start = len(self._lengths)
+            rows = conn.execute(
+                "SELECT doc_id, length FROM docs WHERE doc_id >= ? ORDER BY doc_id", (start,)
+            ).fetchall()
+            for doc_id, length in rows:
+                if doc_id >= len(self._lengths):
+                    self._lengths.extend([0] * (doc_id - len(self._lengths) + 1))
+                self._lengths[doc_id] = length
+            return self._lengths
+
+    def search(self, query, limit=10):
+        """Return [(title, score)] for the best BM25 matches, best first"""
+        if self._pending:
+            self.flush()
+        terms = set(self.tokenize(query))
+        if not terms:
+            return []
+        try:
+            conn = self._connect()
+            stats = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            doc_count = stats.get('doc_count', 0)
+            if not doc_count:
+                return []
+            avg_length = stats['total_length'] / doc_count
+            lengths = self._doc_lengths(conn)
+
+            scores = {}
+            for term in terms:
+                row = conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+                if not row:
+                    continue
+                idf = math.log(1 + (doc_count - row[0] + 0.5) / (row[0] + 0.5))
+                for (data,) in conn.execute("SELECT data FROM postings WHERE term = ?", (term,)):
+                    for doc_id, tf in self._decode(data):
+                        length = lengths[doc_id] if doc_id < len(lengths) else avg_length
+                        norm = self.K1 * (1 - self.B + self.B * length / avg_length)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            if not best:
+                return []
+            titles = dict(conn.execute(
+                f"SELECT doc_id, title FROM docs WHERE doc_id IN ({','.join('?' * len(best))})",
+                [doc_id for doc_id, _ in best]
+            ).fetchall())
+            return [(titles[doc_id], score) for doc_id, score in best if doc_id in titles]
+        except sqlite3.Error as e:
+            logger.warning("Search index query failed: %s", e)
+            return []
+
+    def resolve(self, query, limit=10):
+        """Best-ranked title containing every query word, or None
+
+        Used to pick an article for an ambiguous query (e.g. "Mercury" ->
+        "Mercury (planet)") without asking Wikipedia's search API.
+        """
+        wanted = set(self.tokenize(query))
+        normalized = WikiCache.normalize(query)
+        for title, _ in self.search(query, limit):
+            if wanted <= set(self.tokenize(title)) and WikiCache.normalize(title) != normalized:
+                return title
+        return None
+
+    def stats(self):
+        try:
+            stats = dict(self._connect().execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.Error:
+            stats = {}
+        return {'documents': stats.get('doc_count', 0), 'pending': len(self._pending)}
+
+
+@cache_resource
+def get_search_index():
+    """Process-wide full-text index (survives Streamlit reruns)"""
+    index = SearchIndex(SEARCH_INDEX_PATH)
+    atexit.register(index.flush)
+    return index
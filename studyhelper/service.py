@@ -0,0 +1,218 @@
+"""Headless HTTP API: research, quizzes, notes and related topics as JSON
+
+One asyncio process serves many requests at once through AsyncStudyTools.
+The results have the same shapes as in the UI: research returns the
+search_wikipedia() dict, quizzes are lists of quiz_item() dicts and notes
+are {'enhanced', 'content'}. Each API key gets at most
+--max-concurrency-per-key requests in flight, and its Groq calls share the
+app's rate limiter. A request whose client disconnects is cancelled along
+with its Wikipedia and Groq calls.
+
+    export GROQ_API_KEY=...
+    python -m studyhelper.service --port 8080
+    curl -s localhost:8080/v1/quiz -d '{"topic": "Photosynthesis", "difficulty": "hard"}'
+
+A request may bring its own key in an ``Authorization: Bearer <key>``
+header; otherwise the server's --api-key is used.
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+try:
+    from aiohttp import web
+except ImportError as e:
+    raise ImportError("The HTTP service needs aiohttp: pip install aiohttp") from e
+
+from .async_tools import AsyncStudyTools
+from .config import (
+    SERVICE_HOST, SERVICE_MAX_CONCURRENCY_PER_KEY, SERVICE_MAX_QUEUE_WAIT, SERVICE_PORT, SERVICE_REQUEST_TIMEOUT,
+    WIKIPEDIA_MAX_CONNECTIONS, logger
+)
+from .groq_pool import RateLimitQueueTimeout
+from .instrumentation import get_instrumentation
+
+TOOLS = web.AppKey("tools", AsyncStudyTools)
+API_KEY = web.AppKey("api_key", str)
+REQUEST_TIMEOUT = web.AppKey("request_timeout", float)
+DIFFICULTIES = ("easy", "medium", "hard")
+MAX_QUESTIONS = 20
+
+
+class RequestError(Exception):
+    """A request the API cannot serve; answered with status and {'error': message}"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _error(status, message):
+    return web.json_response({'error': message}, status=status)
+
+
+async def _read_request(request):
+    """The JSON object body, with a non-empty 'topic'"""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise RequestError(400, "Body must be a JSON object") from None
+    if not isinstance(body, dict):
+        raise RequestError(400, "Body must be a JSON object")
+    topic = body.get('topic')
+    if not isinstance(topic, str) or not topic.strip():
+        raise RequestError(400, "'topic' is required")
+    body['topic'] = topic.strip()
+    content = body.get('content')
+    if content is not None and not isinstance(content, str):
+        raise RequestError(400, "'content' must be a string")
+    return body
+
+
+def _api_key(request):
+    """The caller's Groq key from an Authorization: Bearer header, else the server's"""
+    header = request.headers.get('Authorization', '')
+    scheme, _, key = header.partition(' ')
+    if scheme.lower() == 'bearer' and key.strip():
+        return key.strip()
+    return request.app[API_KEY]
+
+
+async def _research(tools, topic):
+    """search_wikipedia(), raising a 404 RequestError when the topic has no article"""
+    result = await tools.search_wikipedia(topic)
+    if not result.get('success'):
+        raise RequestError(404, result.get('error') or result['content'])
+    return result
+
+
+async def research(tools, api_key, body):
+    return await _research(tools, body['topic'])
+
+
+async def quiz(tools, api_key, body):
+    difficulty = body.get('difficulty', 'medium')
+    if difficulty not in DIFFICULTIES:
+        raise RequestError(400, f"'difficulty' must be one of {', '.join(DIFFICULTIES)}")
+    num_questions = body.get('num_questions', 5)
+    if not isinstance(num_questions, int) or isinstance(num_questions, bool) or \
+            not 1 <= num_questions <= MAX_QUESTIONS:
+        raise RequestError(400, f"'num_questions' must be an integer from 1 to {MAX_QUESTIONS}")
+
+    source = await _source(tools, body)
+    questions = await tools.generate_enhanced_quiz_with_ai(
+        api_key, source['content'], body['topic'], difficulty, num_questions, use_cache=not body.get('fresh')
+    )
+    return {**_about(source, body['topic']), 'difficulty': difficulty, 'questions': questions}
+
+
+async def notes(tools, api_key, body):
+    source = await _source(tools, body)
+    result = await tools.generate_enhanced_notes_with_ai(api_key, source['content'], body['topic'])
+    return {**_about(source, body['topic']), 'notes': result}
+
+
+async def related(tools, api_key, body):
+    return {'topic': body['topic'], 'related': await tools.get_related_topics(body['topic'], body.get('content'))}
+
+
+async def _source(tools, body):
+    """The content to study: the request's own, or the topic's Wikipedia article"""
+    if body.get('content'):
+        return {'title': body['topic'], 'url': '', 'content': body['content']}
+    return await _research(tools, body['topic'])
+
+
+def _about(source, topic):
+    return {'topic': topic, 'title': source['title'], 'url': source.get('url', '')}
+
+
+def _endpoint(operation):
+    """aiohttp handler running operation(tools, api_key, body) in one of the caller's slots"""
+    async def handler(request):
+        tools = request.app[TOOLS]
+        api_key = _api_key(request)
+        try:
+            body = await _read_request(request)
+            async with tools.slot(api_key):
+                result = await asyncio.wait_for(operation(tools, api_key, body), request.app[REQUEST_TIMEOUT])
+        except RequestError as e:
+            return _error(e.status, str(e))
+        except RateLimitQueueTimeout as e:
+            return _error(429, str(e))
+        except asyncio.TimeoutError:
+            return _error(504, f"Not finished within {request.app[REQUEST_TIMEOUT]:g}s")
+        return web.json_response(result)
+    return handler
+
+
+async def healthz(request):
+    return web.json_response({'status': 'ok'})
+
+
+async def metrics(request):
+    return web.Response(text=get_instrumentation().render(), content_type="text/plain",
+                        headers={'X-Content-Type-Options': 'nosniff'})
+
+
+@web.middleware
+async def log_errors(request, handler):
+    """Answer unexpected errors with a JSON 500 and log them"""
+    try:
+        return await handler(request)
+    except web.HTTPException:
+        raise
+    except Exception:
+        logger.exception("Unhandled error serving %s", request.path)
+        return _error(500, "Internal server error")
+
+
+def create_app(api_key=None, max_concurrency_per_key=SERVICE_MAX_CONCURRENCY_PER_KEY,
+               max_queue_wait=SERVICE_MAX_QUEUE_WAIT, request_timeout=SERVICE_REQUEST_TIMEOUT,
+               wikipedia_connections=WIKIPEDIA_MAX_CONNECTIONS):
+    """The aiohttp application; AsyncStudyTools is started and closed with it"""
+    app = web.Application(middlewares=[log_errors], client_max_size=4 * 1024 * 1024)
+    app[API_KEY] = api_key
+    app[REQUEST_TIMEOUT] = request_timeout
+
+    async def tools_ctx(app):
+        async with AsyncStudyTools(max_concurrency_per_key, max_queue_wait, wikipedia_connections) as tools:
+            app[TOOLS] = tools
+            yield
+
+    app.cleanup_ctx.append(tools_ctx)
+    app.router.add_post("/v1/research", _endpoint(research))
+    app.router.add_post("/v1/quiz", _endpoint(quiz))
+    app.router.add_post("/v1/notes", _endpoint(notes))
+    app.router.add_post("/v1/related", _endpoint(related))
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/metrics", metrics)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve research, quizzes, notes and related topics over HTTP.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--api-key", default=os.environ.get("GROQ_API_KEY"),
+                        help="Groq API key for requests without an Authorization header (defaults to $GROQ_API_KEY)")
+    parser.add_argument("--max-concurrency-per-key", type=int, default=SERVICE_MAX_CONCURRENCY_PER_KEY,
+                        help="requests in flight per API key; more wait up to --max-queue-wait")
+    parser.add_argument("--max-queue-wait", type=float, default=SERVICE_MAX_QUEUE_WAIT,
+                        help="seconds a request may wait for a slot before a 429")
+    parser.add_argument("--request-timeout", type=float, default=SERVICE_REQUEST_TIMEOUT,
+                        help="seconds before a request is cancelled with a 504")
+    parser.add_argument("--wikipedia-connections", type=int, default=WIKIPEDIA_MAX_CONNECTIONS,
+                        help="open connections to Wikipedia across all requests")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    app = create_app(args.api_key, args.max_concurrency_per_key, args.max_queue_wait, args.request_timeout,
+                     args.wikipedia_connections)
+    # Cancel a request's handler, and with it its Wikipedia and Groq calls, when the client goes away
+    web.run_app(app, host=args.host, port=args.port, handler_cancellation=True, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""Prompt cleanup, token estimates, sentence splitting and key-phrase analysis"""
+import functools
+import heapq
+import itertools
+import json
+import math
+import re
+from collections import Counter
+
+from .config import GROQ_CONTEXT_TOKENS, SYSTEM_PROMPT
+
+
+# Emoji and pictograph ranges stripped from prompts
+_EMOJI_CLASS = (
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "\U0001F900-\U0001F9FF"  # supplemental symbols
+    "]"
+)
+_HASH_EMOJI_JOIN_RE = re.compile("#" + _EMOJI_CLASS + "+(?=#)")
+
+_SECTION_HEADING_RE = re.compile(r'^(={2,6})\s*(.+?)\s*\1\s*$', re.MULTILINE)
+_SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Trailing article sections that carry no study material
+SKIPPED_ARTICLE_SECTIONS = {
+    "see also", "references", "external links", "further reading",
+    "notes", "bibliography", "sources", "citations", "footnotes"
+}
+
+NOTES_SECTIONS = """
+            Overview
+            A clear, concise summary (2-3 sentences) of the main concept
+            
+            Key Points
+            5-8 detailed bullet points covering the most important aspects from the content
+            
+            Important Terms and Concepts
+            5-7 key terms with clear definitions and explanations
+            
+            Key Facts and Details
+            4-6 specific facts, data points, or important details worth remembering
+            
+            Connections and Applications
+            How this topic relates to other subjects, real-world applications, or broader concepts
+            
+            Study Tips
+            Specific suggestions for remembering this information (mnemonics, analogies, etc.)
+            
+            Review Questions
+            3-4 self-assessment questions to test understanding
+"""
+
+_COUNTED_SYMBOLS = ".,;:!?()[]\"'-/%$&"
+_WORD_EDGE_PUNCTUATION = ".,;:!?()[]{}\"'`"
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers herself him himself his how i if in into is it its itself just may me might more most must
+my myself no nor not now of off on once only or other our ours ourselves out over own same she should so
+some such than that the their theirs them themselves then there these they this those through to too under
+until up very was we were what when where which while who whom why will with within would you your yours
+yourself yourselves one two many much well however although though thus since among per via upon
+""".split())
+
+
+def estimate_tokens(text):
+    """Conservative token count for the Llama 3 tokenizer without loading it
+
+    Common English words are a single token and long or rare ones split
+    into several, so words count 1.3 each; punctuation counts one each.
+    The result never falls below one token per four characters.
+    """
+    words = len(text.split())
+    symbols = sum(map(text.count, _COUNTED_SYMBOLS))
+    return max(int(words * 1.3) + symbols, (len(text) + 3) // 4)
+
+
+class PromptPacker:
+    """Fits source content into a prompt template within the model's context window
+
+    Content that already fits is used as-is. Otherwise sentences are ranked by
+    salience (frequency of their content words across the text, with a bonus
+    for early sentences) and the best ones are kept, in their original order,
+    until the budget is full.
+    """
+
+    SLOT = "\x00CONTENT\x00"
+    SAFETY_MARGIN = 64
+
+    @staticmethod
+    def budget(template_tokens, max_tokens, context_tokens=GROQ_CONTEXT_TOKENS, system_prompt=SYSTEM_PROMPT):
+        """Tokens left for content after the template, system prompt and reserved completion"""
+        overhead = template_tokens + estimate_tokens(system_prompt) + PromptPacker.SAFETY_MARGIN
+        return max(0, context_tokens - max_tokens - overhead)
+
+    @staticmethod
+    def pack(content, budget):
+        """Select the most salient sentences of content that fit in budget tokens
+
+        Returns the packed text with a report of what was dropped.
+        """
+        total_tokens = estimate_tokens(content)
+        report = {
+            'text': content,
+            'budget': budget,
+            'estimated_tokens': total_tokens,
+            'kept_sentences': None,
+            'dropped_sentences': 0,
+            'dropped_chars': 0
+        }
+        if total_tokens <= budget:
+            return report
+        
+        sentences = [s for s in _SENTENCE_BOUNDARY_RE.split(content) if s.strip()]
+        sentence_words = [
+            [w for w in (raw.strip(_WORD_EDGE_PUNCTUATION) for raw in s.lower().split()) if len(w) > 2]
+            for s in sentences
+        ]
+        frequency = Counter(w for words in sentence_words for w in words if w not in STOPWORDS)
+        
+        scores = []
+        for index, words in enumerate(sentence_words):
+            unique = {w for w in words if w not in STOPWORDS}
+            score = sum(frequency[w] for w in unique) / (len(words) ** 0.5 or 1)
+            score *= 1.0 + 1.0 / (1 + index)  # the lead usually defines the topic
+            scores.append(score)
+        
+        # Per-sentence cost is prorated from the whole-text estimate; the result is re-checked below
+        tokens_per_char = total_tokens / len(content)
+        ranked = sorted(range(len(sentences)), key=scores.__getitem__, reverse=True)
+        kept, used = [], 0
+        for index in ranked:
+            cost = int(len(sentences[index]) * tokens_per_char) + 1
+            if used + cost <= budget:
+                kept.append(index)
+                used += cost
+        
+        text = " ".join(sentences[i] for i in sorted(kept))
+        while len(kept) > 1 and estimate_tokens(text) > budget:
+            kept.pop()  # least salient first
+            text = " ".join(sentences[i] for i in sorted(kept))
+        if not kept:
+            text = sentences[0] if sentences else content
+        
+        # A single giant "sentence" can still overflow; cut it down to size
+        while text and estimate_tokens(text) > budget:
+            text = text[:int(len(text) * budget / estimate_tokens(text) * 0.95)]
+        
+        report.update(
+            text=text,
+            estimated_tokens=estimate_tokens(text),
+            kept_sentences=len(kept) or 1,
+            dropped_sentences=len(sentences) - (len(kept) or 1),
+            dropped_chars=len(content) - len(text)
+        )
+        return report
+
+    @staticmethod
+    def fill(template, content, max_tokens):
+        """Substitute packed content for SLOT in a prompt template"""
+        template_tokens = estimate_tokens(template.replace(PromptPacker.SLOT, ""))
+        report = PromptPacker.pack(content, PromptPacker.budget(template_tokens, max_tokens))
+        return template.replace(PromptPacker.SLOT, report['text']), report
+
+
+# "B) ..." style labels on multiple-choice options, and bare letter answers like "B" or "(b)"
+_OPTION_LABEL_RE = re.compile(r'^\(?[A-Fa-f][).:]\s+')
+_OPTION_LETTER_RE = re.compile(r'^\(?([A-Fa-f])[).:]?$')
+
+
+class JSONObjectStream:
+    """Pulls complete JSON objects out of streamed model output as they close
+
+    Tracks string and escape state so braces inside strings are ignored.
+    Each object is parsed the moment its closing brace arrives, wherever it
+    sits (a bare array, a {"questions": [...]} wrapper or prose around a
+    code fence); text that never forms valid JSON is simply skipped.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._starts = []
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """Add streamed text; return the objects completed by it, innermost first"""
+        self._text += chunk
+        completed = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._starts.append(i)
+            elif char == "}" and self._starts:
+                start = self._starts.pop()
+                try:
+                    completed.append(json.loads(text[start:i + 1]))
+                except ValueError:
+                    pass
+        self._pos = len(text)
+        return completed
+
+    @property
+    def text(self):
+        return self._text
+
+
+# Sentence ends at . ! or ? (optionally followed by a closing quote/bracket) before a capital or digit
+_SENTENCE_SPLIT_RE = re.compile(r'(?:(?<=[.!?])|(?<=[.!?][\'")\]]))\s+(?=[\'"(\[]?[A-Z0-9])')
+_ABBREVIATIONS = frozenset("""
+mr. mrs. ms. dr. prof. st. jr. sr. vs. e.g. i.e. approx. ca. c. no. nos. fig. figs. vol. pp. ed. eds.
+u.s. u.k. inc. ltd. co. corp. gen. col. lt. sgt. rev. mt. ft. jan. feb. mar. apr. aug. sept. oct. nov. dec.
+""".split())
+# Words and single punctuation marks; punctuation and stopwords delimit candidate phrases
+_PHRASE_TOKEN_RE = re.compile(r"\w[\w'’-]*|[^\w\s]")
+# Words that are not stopwords grammatically but never make useful study terms
+KEYPHRASE_STOPWORDS = STOPWORDS | frozenset("""
+wikipedia article also known called including include includes included used use uses using became become
+becomes later first second third new often several various like e g i etc eg ie
+""".split())
+
+
+def split_sentences(text):
+    """Split text into sentences, keeping abbreviations and initials together and skipping headings"""
+    sentences = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or _SECTION_HEADING_RE.match(line):
+            continue
+        merged = []
+        for part in _SENTENCE_SPLIT_RE.split(line):
+            last_word = merged[-1].rsplit(None, 1)[-1].lower() if merged else ""
+            if last_word in _ABBREVIATIONS or (len(last_word) == 2 and last_word[0].isalpha() and last_word[1] == "."):
+                merged[-1] += " " + part
+            else:
+                merged.append(part)
+        sentences.extend(merged)
+    return sentences
+
+
+class TextAnalysis:
+    """Sentence and key-phrase index for one content blob
+
+    Candidate phrases are maximal runs of words between stopwords and
+    punctuation (RAKE). Each word scores its degree, the number of words
+    it co-occurs with inside candidate phrases over all occurrences, and a
+    phrase scores the mean degree of its words times the square root of
+    how often it recurs. Sentences score by the key phrases they contain. Counting runs over
+    integer word ids in flat lists, so a 100 KB article takes a few tens of
+    milliseconds; use analyze_text() to share one analysis per text.
+    """
+
+    MAX_PHRASE_WORDS = 4
+
+    def __init__(self, text):
+        self.sentences = split_sentences(text)
+        word_ids = {}
+        phrase_ids = {}
+        phrases = []  # per phrase id: [word ids, surface forms Counter, sentence ids]
+        occurrences = []  # phrase id per occurrence
+
+        for sentence_id, sentence in enumerate(self.sentences):
+            run = []
+            for token in itertools.chain(_PHRASE_TOKEN_RE.findall(sentence), (".",)):
+                lower = token.lower()
+                if token[0].isalnum() and lower not in KEYPHRASE_STOPWORDS and not (len(lower) < 3 and lower.isalpha()):
+                    run.append(token)
+                    continue
+                if run and len(run) <= self.MAX_PHRASE_WORDS and not all(word.isdigit() for word in run):
+                    key = " ".join(run).lower()
+                    phrase_id = phrase_ids.get(key)
+                    if phrase_id is None:
+                        phrase_id = phrase_ids[key] = len(phrases)
+                        ids = [word_ids.setdefault(word.lower(), len(word_ids)) for word in run]
+                        phrases.append((ids, Counter(), []))
+                    phrases[phrase_id][1][" ".join(run)] += 1
+                    if not phrases[phrase_id][2] or phrases[phrase_id][2][-1] != sentence_id:
+                        phrases[phrase_id][2].append(sentence_id)
+                    occurrences.append(phrase_id)
+                run = []
+
+        counts = [0] * len(phrases)
+        for phrase_id in occurrences:
+            counts[phrase_id] += 1
+        degree = [0] * len(word_ids)
+        for (ids, _, _), count in zip(phrases, counts):
+            for word_id in ids:
+                degree[word_id] += count * len(ids)
+
+        self.phrase_scores = {}
+        self.phrase_sentences = {}
+        for key, phrase_id in phrase_ids.items():
+            ids, surfaces, sentence_ids = phrases[phrase_id]
+            score = sum(degree[w] for w in ids) / len(ids) * math.sqrt(counts[phrase_id])
+            # Most frequent surface form, preferring capitalised spellings on ties (e.g. proper nouns)
+            surface = max(surfaces.items(), key=lambda item: (item[1], item[0][:1].isupper()))[0]
+            self.phrase_scores[surface] = score
+            self.phrase_sentences[surface] = sentence_ids
+
+        self.sentence_scores = [0.0] * len(self.sentences)
+        for surface, sentence_ids in self.phrase_sentences.items():
+            for sentence_id in sentence_ids:
+                self.sentence_scores[sentence_id] += self.phrase_scores[surface]
+        for sentence_id, sentence in enumerate(self.sentences):
+            self.sentence_scores[sentence_id] /= math.sqrt(len(sentence.split()) or 1)
+
+    def key_terms(self, limit=10, max_words=3):
+        """Highest-scoring phrases of up to max_words words, best first
+
+        A phrase is skipped when it contains, or is contained in, a better
+        one ("energy" vs "chemical energy"), so the list is not repetitive.
+        """
+        ranked = sorted(self.phrase_scores.items(), key=lambda item: item[1], reverse=True)
+        terms, chosen = [], []
+        for surface, _ in ranked:
+            words = frozenset(surface.lower().split())
+            if len(words) > max_words or any(words <= other or other <= words for other in chosen):
+                continue
+            terms.append(surface)
+            chosen.append(words)
+            if len(terms) == limit:
+                break
+        return terms
+
+    def key_sentences(self, limit=6, min_words=8):
+        """Most informative sentences of at least min_words words, in document order"""
+        candidates = [i for i, sentence in enumerate(self.sentences) if len(sentence.split()) >= min_words]
+        best = heapq.nlargest(limit, candidates, key=self.sentence_scores.__getitem__)
+        return [self.sentences[i] for i in sorted(best)]
+
+
+@functools.lru_cache(maxsize=32)
+def analyze_text(text):
+    """Shared TextAnalysis for a text (the notes, quiz and grading paths reuse it)"""
+    return TextAnalysis(text)
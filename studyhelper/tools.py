@@ -0,0 +1,1380 @@
+"""Wikipedia research, Groq generation and grading used by the UI, batch.py and the benchmarks
+
+requests is imported by the methods that make HTTP calls and streamlit by
+the ones that talk to the UI, so importing StudyTools loads neither the
+HTTP stack nor Streamlit.
+"""
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from .caches import LLMResponseCache, get_llm_cache, get_wiki_cache
+from .config import (
+    ASCII_SYSTEM_PROMPT, FULL_ARTICLE_CHUNK_TOKENS, FULL_ARTICLE_MAX_BYTES, FULL_ARTICLE_MAX_WORKERS,
+    GROQ_CONTEXT_TOKENS, GROQ_MODEL, OFFLINE_ONLY, SYSTEM_PROMPT, WIKIPEDIA_API_URL, WIKIPEDIA_BASE_URL, logger
+)
+from .corpus import get_offline_corpus
+from .groq_pool import GroqRateLimiter, get_groq_pool, get_rate_limiter, get_token_usage
+from .instrumentation import get_instrumentation, instrumented
+from .quiz import LocalGrader, QuizEngine, grade, quiz_item
+from .related import get_related_engine
+from .search_index import get_search_index
+from .text import (
+    NOTES_SECTIONS, SKIPPED_ARTICLE_SECTIONS, JSONObjectStream, PromptPacker, _HASH_EMOJI_JOIN_RE,
+    _OPTION_LABEL_RE, _OPTION_LETTER_RE, _SECTION_HEADING_RE, _SENTENCE_BOUNDARY_RE, analyze_text,
+    estimate_tokens
+)
+
+
+class StudyTools:
+    # Per-thread execution context; see StudyTools.headless()
+    _context = threading.local()
+    # The API caps titles (and intro extracts) per action=query request at 50 for regular clients
+    SUMMARY_BATCH_SIZE = 50
+    # Content-based suggestions needed before get_related_topics skips Wikipedia's opensearch
+    MIN_LOCAL_RELATED = 3
+    # Score for each verdict the AI grader may return
+    AI_VERDICT_SCORES = {"correct": 1.0, "partial": 0.5, "incorrect": 0.0}
+    WIKIPEDIA_HEADERS = {
+        'User-Agent': 'StudyHelper/2.0 (https://streamlit.io; educational-use)',
+        'Accept': 'application/json'
+    }
+    # Question types the AI quiz may use, and the JSON it is asked to answer with
+    QUIZ_TYPES = ("multiple_choice", "short_answer", "true_false", "essay")
+    QUIZ_JSON_FORMAT = """Respond with only a JSON array of question objects, no other text:
+            [{"question": "...", "type": "multiple_choice", "options": ["...", "...", "...", "..."], "answer": "...", "source": "..."}]
+            - type is one of multiple_choice, short_answer, true_false, essay
+            - options: 4 choices for multiple_choice, [] for the other types
+            - answer: the correct option text, True or False, or a short model answer
+            - source: an exact sentence copied from the content that supports the answer"""
+
+    @staticmethod
+    @contextmanager
+    def headless(api_key=None):
+        """Run StudyTools calls on the current thread without a Streamlit script context
+
+        Used by background workers: the API key is passed explicitly instead of
+        being read from session state, and user-facing messages go to the log.
+        """
+        previous = getattr(StudyTools._context, 'api_key', None), getattr(StudyTools._context, 'headless', False)
+        StudyTools._context.api_key = api_key
+        StudyTools._context.headless = True
+        try:
+            yield
+        finally:
+            StudyTools._context.api_key, StudyTools._context.headless = previous
+
+    @staticmethod
+    def _is_headless():
+        return getattr(StudyTools._context, 'headless', False)
+
+    @staticmethod
+    def _api_key():
+        """Groq API key for the current thread or Streamlit session"""
+        if StudyTools._is_headless():
+            return StudyTools._context.api_key
+        import streamlit as st
+
+        return st.session_state.get('groq_api_key')
+
+    @staticmethod
+    def _notify(level, message):
+        """Show a message in the UI, or log it when running headless"""
+        if StudyTools._is_headless():
+            log_level = {"error": logging.ERROR, "warning": logging.WARNING}.get(level, logging.INFO)
+            logger.log(log_level, message)
+        else:
+            import streamlit as st
+
+            getattr(st, level)(message)
+
+    @staticmethod
+    def network_call_count():
+        """Number of network requests made on the current thread so far"""
+        return getattr(StudyTools._context, 'network_calls', 0)
+
+    @staticmethod
+    def _count_network_call():
+        StudyTools._context.network_calls = StudyTools.network_call_count() + 1
+
+    @staticmethod
+    def _spinner(text):
+        """st.spinner, or a no-op when running headless"""
+        if StudyTools._is_headless():
+            return nullcontext()
+        import streamlit as st
+
+        return st.spinner(text)
+
+    @staticmethod
+    @instrumented("groq.call")
+    def call_groq_api(prompt, max_tokens=1500, temperature=0.7, use_cache=True):
+        """Call Groq API with improved error handling
+
+        Identical requests are answered from the response cache; pass
+        use_cache=False to force a fresh completion.
+        """
+        cache = get_llm_cache() if use_cache else None
+        pool = get_groq_pool()
+        # Get API key from session state (or the headless worker context)
+        api_key = StudyTools._api_key()
+        try:
+            if not api_key:
+                StudyTools._notify("error", "Please enter your Groq API key in the sidebar")
+                return None
+
+            # Clean prompt to remove emojis and special characters that might cause encoding issues
+            clean_prompt = StudyTools._clean_text_for_api(prompt)
+
+            cache_key = StudyTools._llm_cache_key(clean_prompt, max_tokens, temperature)
+            if cache:
+                cached = cache.get(cache_key)
+                get_instrumentation().cache("llm", "miss" if cached is None else "hit")
+                if cached is not None:
+                    return cached
+
+            # Borrow the shared client so the HTTP connection stays warm between calls
+            with pool.lease(api_key) as pooled:
+                response, started, reserved = StudyTools._create_completion(
+                    pooled, api_key,
+                    messages=[
+                        {
+                            "role": "system", 
+                            "content": SYSTEM_PROMPT
+                        },
+                        {
+                            "role": "user", 
+                            "content": clean_prompt
+                        }
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+                pool.record(pooled, time.perf_counter() - started)
+            
+            content = StudyTools._completion_text(api_key, reserved, response, clean_prompt)
+            if cache and content:
+                cache.put(cache_key, content)
+            return content
+
+        except UnicodeEncodeError:
+            StudyTools._notify("error", "Text encoding error. Retrying with cleaned text...")
+            # Try again with more aggressive text cleaning
+            try:
+                ascii_prompt = prompt.encode('ascii', 'ignore').decode('ascii')
+                with pool.lease(api_key) as pooled:
+                    response, started, reserved = StudyTools._create_completion(
+                        pooled, api_key,
+                        messages=[
+                            {
+                                "role": "system", 
+                                "content": ASCII_SYSTEM_PROMPT
+                            },
+                            {
+                                "role": "user", 
+                                "content": ascii_prompt
+                            }
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=temperature
+                    )
+                    pool.record(pooled, time.perf_counter() - started)
+                return StudyTools._completion_text(api_key, reserved, response, ascii_prompt)
+            except Exception as retry_error:
+                StudyTools._count_failed_call()
+                StudyTools._notify("error", f"API call failed after retry: {retry_error}")
+                return None
+        except Exception as e:
+            StudyTools._report_groq_error(e)
+            return None
+
+    @staticmethod
+    @instrumented("groq.stream")
+    def stream_groq_api(prompt, max_tokens=1500, temperature=0.7, use_cache=True):
+        """Stream a Groq completion, yielding text chunks as they arrive
+
+        Shares the cache key with call_groq_api, so a streamed response is
+        cached once complete and a cached one is yielded in a single chunk.
+        """
+        api_key = StudyTools._api_key()
+        if not api_key:
+            StudyTools._notify("error", "Please enter your Groq API key in the sidebar")
+            return
+
+        cache = get_llm_cache() if use_cache else None
+        pool = get_groq_pool()
+        clean_prompt = StudyTools._clean_text_for_api(prompt)
+        cache_key = StudyTools._llm_cache_key(clean_prompt, max_tokens, temperature)
+        if cache:
+            cached = cache.get(cache_key)
+            get_instrumentation().cache("llm", "miss" if cached is None else "hit")
+            if cached is not None:
+                yield cached
+                return
+
+        parts = []
+        usage = None
+        reserved, used = 0, 0
+        try:
+            try:
+                with pool.lease(api_key) as pooled:
+                    stream, started, reserved = StudyTools._create_completion(
+                        pooled, api_key,
+                        messages=[
+                            {"role": "system", "content": SYSTEM_PROMPT},
+                            {"role": "user", "content": clean_prompt}
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        stream=True
+                    )
+                    for chunk in stream:
+                        # Groq reports usage on the final chunk
+                        usage = getattr(getattr(chunk, 'x_groq', None), 'usage', None) or usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if not delta:
+                            continue
+                        if not parts:
+                            # Time to first token is what the warm connection saves
+                            pool.record(pooled, time.perf_counter() - started)
+                        parts.append(delta)
+                        yield delta
+            except Exception as e:
+                StudyTools._report_groq_error(e)
+                return
+
+            full_text = "".join(parts)
+            used = StudyTools._record_usage(usage, clean_prompt, full_text)
+            if cache and full_text:
+                cache.put(cache_key, full_text)
+        finally:
+            # Also reached when the stream fails or its consumer stops early (a rerun, a closed generator)
+            if reserved:
+                get_rate_limiter().settle(api_key, reserved, used)
+
+    @staticmethod
+    def _llm_cache_key(clean_prompt, max_tokens, temperature):
+        """Response cache key shared by the blocking, streaming and async Groq calls"""
+        return LLMResponseCache.make_key(
+            clean_prompt, SYSTEM_PROMPT, GROQ_MODEL,
+            max_tokens=max_tokens, temperature=temperature, top_p=1
+        )
+
+    @staticmethod
+    def _create_completion(pooled, api_key, messages, max_tokens, temperature, stream=False):
+        """Send a chat completion through the rate limiter, retrying 429s with backoff
+
+        Returns (response, started, reserved): the response (or stream), when the
+        successful attempt began, and the tokens reserved for it.
+        """
+        limiter = get_rate_limiter()
+        reserved = sum(estimate_tokens(m["content"]) for m in messages) + max_tokens
+        instrumentation = get_instrumentation()
+        for attempt in itertools.count():
+            with instrumentation.span("groq.queue"):
+                limiter.acquire(api_key, reserved)
+            StudyTools._count_network_call()
+            started = time.perf_counter()
+            try:
+                response = pooled.client.chat.completions.create(
+                    messages=messages,
+                    model=GROQ_MODEL,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    top_p=1,
+                    stream=stream
+                )
+                return response, started, reserved
+            except Exception as e:
+                # A failed attempt used no tokens; give its reservation back
+                limiter.settle(api_key, reserved, 0)
+                if not GroqRateLimiter.is_rate_limit_error(e) or attempt >= limiter.max_retries:
+                    raise
+                instrumentation.retry("groq")
+                limiter.backoff(api_key, attempt, GroqRateLimiter.retry_after(e))
+
+    @staticmethod
+    def _completion_text(api_key, reserved, response, prompt):
+        """Text of a completed response; settles its rate-limit reservation even if the response is unusable"""
+        used = 0
+        try:
+            content = response.choices[0].message.content
+            used = StudyTools._record_usage(getattr(response, 'usage', None), prompt, content)
+            return content
+        finally:
+            get_rate_limiter().settle(api_key, reserved, used)
+
+    @staticmethod
+    def _record_usage(usage, prompt, completion):
+        """Add a completed request's tokens to the thread and process totals
+
+        Falls back to estimates when the response carries no usage block.
+        """
+        prompt_tokens = getattr(usage, 'prompt_tokens', None)
+        if prompt_tokens is None:
+            prompt_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt)
+        completion_tokens = getattr(usage, 'completion_tokens', None)
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(completion or "")
+        StudyTools._context.tokens = StudyTools.token_count() + prompt_tokens + completion_tokens
+        get_token_usage().add(prompt_tokens, completion_tokens)
+        get_instrumentation().tokens(prompt_tokens, completion_tokens)
+        return prompt_tokens + completion_tokens
+
+    @staticmethod
+    def token_count():
+        """Groq tokens (prompt + completion) used on the current thread so far"""
+        return getattr(StudyTools._context, 'tokens', 0)
+
+    @staticmethod
+    def failed_call_count():
+        """Groq calls that failed on the current thread so far (their callers fell back)"""
+        return getattr(StudyTools._context, 'failed_calls', 0)
+
+    @staticmethod
+    def _count_failed_call():
+        StudyTools._context.failed_calls = StudyTools.failed_call_count() + 1
+
+    @staticmethod
+    def _report_groq_error(e):
+        """Show a friendly message for a failed Groq call"""
+        StudyTools._count_failed_call()
+        error_msg = str(e).lower()
+        if "rate limit" in error_msg:
+            StudyTools._notify("error", "Rate limit exceeded. Please wait a moment before trying again.")
+            StudyTools._notify("info", "Tip: Groq free tier has rate limits. Consider upgrading for higher limits.")
+        elif "api key" in error_msg or "authentication" in error_msg:
+            StudyTools._notify("error", "Invalid API key. Please check your Groq API key.")
+        elif "quota" in error_msg:
+            StudyTools._notify("error", "API quota exceeded. Please check your Groq account limits.")
+        else:
+            StudyTools._notify("error", f"Error calling Groq API: {e}")
+
+    @staticmethod
+    def _clean_text_for_api(text):
+        """Clean text to remove emojis and problematic characters for API calls
+
+        Equivalent to stripping the emoji ranges, replacing '##' with 'Section:'
+        and '•' with '-', then dropping every remaining non-ASCII character.
+        """
+        if text.isascii():
+            return text.replace('##', 'Section:')
+        
+        # Emojis between two '#' would join them into a '##' once removed
+        if '#' in text:
+            text = _HASH_EMOJI_JOIN_RE.sub('#', text)
+        
+        # Everything else non-ASCII (emojis included) is dropped by the encode round trip
+        return text.replace('##', 'Section:').replace('•', '-').encode('ascii', 'ignore').decode('ascii')
+
+    @staticmethod
+    @instrumented("wikipedia.search")
+    def search_wikipedia(query, max_retries=3, use_cache=True):
+        """Wikipedia search backed by the persistent summary cache and the offline corpus, if configured"""
+        cache = get_wiki_cache() if use_cache else None
+        if cache:
+            cached = cache.get(query)
+            get_instrumentation().cache("wikipedia", "hit" if cached else "miss")
+            if cached:
+                return cached
+
+        result = StudyTools._search_offline(query)
+        if result is not None:
+            return result
+
+        result = StudyTools._fetch_wikipedia_summary(query, max_retries)
+        if result.get('success'):
+            if cache:
+                cache.put(query, result)
+            StudyTools._remember_article(result)
+        return result
+
+    @staticmethod
+    def _search_offline(query):
+        """The offline corpus's answer for query, or None when Wikipedia should be asked"""
+        corpus = get_offline_corpus()
+        if not corpus:
+            return StudyTools._offline_error(query) if OFFLINE_ONLY else None
+        result = corpus.search(query)
+        if not result['success']:
+            candidate = get_search_index().resolve(query)
+            if candidate and corpus.lookup(candidate):
+                result = corpus.search(candidate)
+        if result['success']:
+            get_instrumentation().note(source="offline")
+            StudyTools._remember_article(result)
+        if result['success'] or OFFLINE_ONLY:
+            return result
+        return None
+
+    @staticmethod
+    def _offline_error(title, what="article"):
+        """Result for a lookup that would need en.wikipedia.org while OFFLINE_ONLY is set"""
+        return {
+            'success': False,
+            'content': f"No offline {what} is available for '{title}' and online lookups are disabled.",
+            'error': "Offline"
+        }
+
+    @staticmethod
+    def _remember_article(result):
+        """Feed a fetched article to the local search index and related-topics engine"""
+        get_search_index().add(result['title'], result['content'])
+        engine = get_related_engine()
+        if engine:
+            engine.add(result['title'], result['content'])
+
+    @staticmethod
+    @instrumented("wikipedia.fetch")
+    def _fetch_wikipedia_summary(query, max_retries=3):
+        """Enhanced Wikipedia search with better error handling and retries"""
+        import requests
+
+        for attempt in range(max_retries):
+            try:
+                StudyTools._count_network_call()
+                response = requests.get(StudyTools._summary_url(query), headers=StudyTools.WIKIPEDIA_HEADERS,
+                                        timeout=15)
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    result = StudyTools._summary_result(data, query)
+                    if result is not None:
+                        return result
+
+                    # A disambiguation page: prefer an article we have already seen over another round trip
+                    candidate = get_search_index().resolve(query)
+                    if candidate:
+                        return StudyTools.search_wikipedia(candidate)
+
+                    # Try to get more specific content
+                    StudyTools._count_network_call()
+                    search_response = requests.get(WIKIPEDIA_API_URL, params=StudyTools._search_params(query),
+                                                   timeout=10)
+                    if search_response.status_code == 200:
+                        title = StudyTools._first_search_title(search_response.json())
+                        if title:
+                            return StudyTools.search_wikipedia(title)
+                    return StudyTools._summary_result(data, query, allow_short=True)
+                elif response.status_code == 404:
+                    return StudyTools._wikipedia_error(query, "Not Found")
+                else:
+                    if attempt == max_retries - 1:
+                        return StudyTools._wikipedia_error(query, f"HTTP {response.status_code}")
+                    get_instrumentation().retry("wikipedia")
+                    time.sleep(1)  # Wait before retry
+                    
+            except requests.exceptions.Timeout:
+                if attempt == max_retries - 1:
+                    return StudyTools._wikipedia_error(query, "Timeout")
+                get_instrumentation().retry("wikipedia")
+                time.sleep(2)
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    return StudyTools._wikipedia_error(query, str(e))
+                get_instrumentation().retry("wikipedia")
+                time.sleep(1)
+        
+        return StudyTools._wikipedia_error(query, "Max retries exceeded")
+
+    @staticmethod
+    def _summary_url(query):
+        """REST page summary URL for a search query"""
+        return f"{WIKIPEDIA_BASE_URL}/api/rest_v1/page/summary/{query.strip().replace(' ', '_')}"
+
+    @staticmethod
+    def _search_params(query):
+        """action=query full-text search, used when the summary is a disambiguation page"""
+        return {
+            'action': 'query',
+            'format': 'json',
+            'list': 'search',
+            'srsearch': query,
+            'srlimit': 5
+        }
+
+    @staticmethod
+    def _first_search_title(data):
+        """Title of the best full-text search hit, or None"""
+        hits = data.get('query', {}).get('search')
+        return hits[0]['title'] if hits else None
+
+    @staticmethod
+    def _summary_result(data, query, allow_short=False):
+        """search_wikipedia() result for a REST page summary
+
+        Returns None for disambiguation pages and stub extracts unless
+        allow_short is set, so the caller can look for a better article.
+        """
+        extract = data.get('extract', 'No summary available.')
+        if not allow_short and ('may refer to:' in extract.lower() or len(extract) < 100):
+            return None
+        return {
+            'success': True,
+            'content': extract,
+            'url': data.get('content_urls', {}).get('desktop', {}).get('page', ''),
+            'title': data.get('title', query),
+            'thumbnail': data.get('thumbnail', {}).get('source', '')
+        }
+
+    @staticmethod
+    def _wikipedia_error(query, error):
+        """search_wikipedia() result for a failed lookup; error is the short reason kept under 'error'"""
+        if error == "Not Found":
+            content = f"No Wikipedia article found for '{query}'. Try a different search term or check the spelling."
+        elif error == "Timeout":
+            content = "Request timed out. Please check your internet connection and try again."
+        elif error == "Max retries exceeded":
+            content = "Failed to retrieve information after multiple attempts."
+        elif error.startswith("HTTP "):
+            content = f"Could not fetch information about '{query}' ({error})"
+        else:
+            content = f"Error searching Wikipedia: {error}"
+        return {'success': False, 'content': content, 'error': error}
+    
+    @staticmethod
+    @instrumented("wikipedia.summaries")
+    def fetch_summaries(titles, use_cache=True, cached_only=False):
+        """Look up intro extracts, thumbnails and URLs for many titles at once
+
+        Titles missing from the cache are fetched with one multi-title
+        action=query request per 50 titles, and each result is stored under
+        its title in the Wikipedia cache, so a later search_wikipedia() for
+        it makes no network call. Returns {title: result} (same shape as
+        search_wikipedia) for the titles that resolved to a real article;
+        with cached_only=True nothing is fetched.
+        """
+        cache = get_wiki_cache() if use_cache else None
+        results, missing = StudyTools._cached_summaries(titles, cache)
+        if cached_only:
+            return results
+        if OFFLINE_ONLY:
+            return StudyTools._offline_summaries(missing, results)
+        for start in range(0, len(missing), StudyTools.SUMMARY_BATCH_SIZE):
+            batch = missing[start:start + StudyTools.SUMMARY_BATCH_SIZE]
+            try:
+                fetched = StudyTools._fetch_summary_batch(batch)
+            except Exception as e:
+                logger.warning("Batched summary lookup failed: %s", e)
+                continue
+            StudyTools._keep_summaries(fetched, results, cache)
+        return results
+
+    @staticmethod
+    def _offline_summaries(titles, results):
+        """Add the offline corpus's articles for titles to results, without asking Wikipedia"""
+        for title in titles:
+            result = StudyTools._search_offline(title)
+            if result['success']:
+                results[title] = result
+        return results
+
+    @staticmethod
+    def _cached_summaries(titles, cache):
+        """({title: cached result}, [titles still to fetch]) for fetch_summaries"""
+        results, missing = {}, []
+        for title in dict.fromkeys(titles):
+            cached = cache.get(title) if cache else None
+            if cache:
+                get_instrumentation().cache("wikipedia", "hit" if cached else "miss")
+            if cached:
+                results[title] = cached
+            else:
+                missing.append(title)
+        return results, missing
+
+    @staticmethod
+    def _keep_summaries(fetched, results, cache):
+        """Add freshly fetched summaries to results, the cache and the local indexes"""
+        for title, result in fetched.items():
+            results[title] = result
+            if cache:
+                cache.put(title, result)
+            StudyTools._remember_article(result)
+
+    @staticmethod
+    def _fetch_summary_batch(titles):
+        """One action=query request for up to SUMMARY_BATCH_SIZE titles"""
+        import requests
+
+        StudyTools._count_network_call()
+        response = requests.get(WIKIPEDIA_API_URL, params=StudyTools._summary_batch_params(titles),
+                                headers=StudyTools.WIKIPEDIA_HEADERS, timeout=15)
+        response.raise_for_status()
+        return StudyTools._summaries_from_batch(titles, response.json())
+
+    @staticmethod
+    def _summary_batch_params(titles):
+        return {
+            'action': 'query',
+            'format': 'json',
+            'formatversion': 2,
+            'titles': "|".join(titles),
+            'redirects': 1,
+            'prop': 'extracts|pageimages|info|pageprops',
+            'exintro': 1,
+            'explaintext': 1,
+            'exlimit': 'max',
+            'piprop': 'thumbnail',
+            'pithumbsize': 320,
+            'pilimit': 'max',
+            'inprop': 'url',
+            'ppprop': 'disambiguation'
+        }
+
+    @staticmethod
+    def _summaries_from_batch(titles, data):
+        """{title: search_wikipedia() result} from a batched action=query response"""
+        query = data.get('query', {})
+
+        # Follow title normalization and redirects back to the titles we asked for
+        resolved = {title: title for title in titles}
+        for step in ('normalized', 'redirects'):
+            hops = {hop['from']: hop['to'] for hop in query.get(step, [])}
+            resolved = {title: hops.get(target, target) for title, target in resolved.items()}
+
+        pages = {page['title']: page for page in query.get('pages', [])}
+        results = {}
+        for title, target in resolved.items():
+            page = pages.get(target)
+            if not page or page.get('missing') or page.get('invalid'):
+                continue
+            extract = page.get('extract') or ''
+            # Same disambiguation filter as search_wikipedia; those go through its search fallback
+            if 'disambiguation' in page.get('pageprops', {}) or 'may refer to:' in extract.lower() \
+                    or len(extract) < 100:
+                continue
+            results[title] = {
+                'success': True,
+                'content': extract,
+                'url': page.get('fullurl', ''),
+                'title': page['title'],
+                'thumbnail': page.get('thumbnail', {}).get('source', '')
+            }
+        return results
+
+    @staticmethod
+    @instrumented("quiz.generate")
+    def generate_enhanced_quiz_with_ai(content, topic, difficulty="medium", num_questions=5, on_question=None,
+                                       use_cache=True):
+        """Generate better quiz questions using Groq AI
+
+        Questions are quiz_item() dicts. Easy quizzes (cloze, true/false and
+        matching) are built locally without an AI call. The model answers
+        with JSON objects that are validated as they arrive; when some are
+        missing or invalid, one small follow-up call asks for just those.
+        When on_question is given the completion is streamed and each
+        question is passed to it as soon as its object is complete. Pass
+        use_cache=False to get a fresh set of questions.
+        """
+        seed = 0 if use_cache else random.randrange(2 ** 32)
+        if not content or len(content.strip()) < 50 or difficulty == "easy":
+            return StudyTools.generate_basic_quiz(content, difficulty, num_questions, topic, seed)
+        
+        try:
+            prompt, packing = StudyTools._quiz_prompt(content, topic, difficulty, num_questions)
+            StudyTools._report_packing(packing)
+            
+            questions = []
+            with StudyTools._spinner("AI is crafting personalized quiz questions..."):
+                response_text = StudyTools._collect_quiz_items(
+                    prompt, content, num_questions, questions, on_question, use_cache
+                )
+                
+                if questions and len(questions) < num_questions:
+                    # Ask only for the questions that are missing, not for a whole new quiz
+                    repair_prompt = StudyTools._quiz_repair_prompt(content, topic, difficulty, num_questions,
+                                                                   questions)
+                    StudyTools._collect_quiz_items(
+                        repair_prompt, content, num_questions, questions, on_question, use_cache
+                    )
+            
+            return StudyTools._finish_quiz(questions, response_text, content, topic, difficulty, num_questions,
+                                           seed, on_question)
+            
+        except Exception as e:
+            StudyTools._notify("warning", f"AI quiz generation encountered an issue: {e}. Using basic quiz generation.")
+            return StudyTools.generate_basic_quiz(content, difficulty, num_questions, topic, seed)
+
+    @staticmethod
+    def _quiz_prompt(content, topic, difficulty, num_questions):
+        """The AI quiz prompt with the content packed in; returns (prompt, packing)"""
+        difficulty_instructions = {
+            "easy": "Create simple recall questions, fill-in-the-blanks, and basic true/false questions that test basic understanding.",
+            "medium": "Create questions that require understanding and explanation of concepts, asking 'how' and 'why' questions.",
+            "hard": "Create analytical questions that require critical thinking, comparison, synthesis, and application of knowledge."
+        }
+        
+        prompt_template = f"""
+            Create exactly {num_questions} {difficulty} level educational quiz questions about: "{topic}"
+            
+            Content to base questions on:
+            {PromptPacker.SLOT}
+            
+            Requirements:
+            {difficulty_instructions[difficulty]}
+            - Make questions varied (multiple_choice, short_answer, essay, true_false)
+            - Ensure questions test different aspects of the topic
+            - Focus on the most important concepts from the content
+            - Make questions specific to the content provided
+            - Use plain text without emojis or special characters
+            
+            {StudyTools.QUIZ_JSON_FORMAT}
+            """
+        return PromptPacker.fill(prompt_template, content, max_tokens=1200)
+
+    @staticmethod
+    def _quiz_repair_prompt(content, topic, difficulty, num_questions, questions):
+        """Follow-up prompt asking only for the questions still missing from questions"""
+        missing = num_questions - len(questions)
+        asked = "\n".join(f"- {item['question']}" for item in questions)
+        repair_template = f"""
+                    Write {missing} more {difficulty} level quiz question{'s' if missing > 1 else ''} about "{topic}" from this content:
+                    {PromptPacker.SLOT}
+                    
+                    Do not repeat any of these questions:
+                    {asked}
+                    
+                    {StudyTools.QUIZ_JSON_FORMAT}
+                    """
+        repair_prompt, _ = PromptPacker.fill(repair_template, content, max_tokens=StudyTools._quiz_max_tokens(missing))
+        return repair_prompt
+
+    @staticmethod
+    def _finish_quiz(questions, response_text, content, topic, difficulty, num_questions, seed, on_question=None):
+        """Complete an AI quiz: salvage plain-text questions, then top up with basic ones"""
+        if not questions and response_text:
+            # The model ignored the JSON format; salvage numbered question lines
+            for line in response_text.split('\n'):
+                question = StudyTools._parse_quiz_line(line)
+                if question and len(questions) < num_questions:
+                    questions.append(quiz_item(question))
+                    if on_question:
+                        on_question(questions[-1])
+        
+        if questions:
+            # If we still didn't get enough questions, fill with basic ones
+            if len(questions) < num_questions:
+                basic_questions = StudyTools.generate_basic_quiz(
+                    content, difficulty, num_questions - len(questions), topic, seed
+                )
+                questions.extend(basic_questions)
+            
+            return questions[:num_questions]
+        else:
+            return StudyTools.generate_basic_quiz(content, difficulty, num_questions, topic, seed)
+
+    @staticmethod
+    def _quiz_max_tokens(num_questions):
+        """Completion budget for num_questions JSON quiz objects"""
+        return 180 * num_questions + 200
+
+    @staticmethod
+    @instrumented("quiz.collect")
+    def _collect_quiz_items(prompt, content, num_questions, questions, on_question=None, use_cache=True):
+        """Run one quiz completion and append its valid, new items to questions
+
+        Returns the raw completion text.
+        """
+        parser = JSONObjectStream()
+        max_tokens = StudyTools._quiz_max_tokens(num_questions - len(questions))
+
+        def take(objects):
+            StudyTools._add_quiz_items(objects, content, num_questions, questions, on_question)
+
+        if on_question:
+            for chunk in StudyTools.stream_groq_api(prompt, max_tokens=max_tokens, temperature=0.5,
+                                                    use_cache=use_cache):
+                take(parser.feed(chunk))
+        else:
+            response_text = StudyTools.call_groq_api(prompt, max_tokens=max_tokens, temperature=0.5,
+                                                     use_cache=use_cache)
+            take(parser.feed(response_text or ""))
+        return parser.text
+
+    @staticmethod
+    def _add_quiz_items(objects, content, num_questions, questions, on_question=None):
+        """Append the valid JSON question objects that are not repeats to questions, up to num_questions"""
+        seen = {item['question'].casefold() for item in questions}
+        for obj in objects:
+            item = StudyTools._quiz_item_from_json(obj, content)
+            if item and item['question'].casefold() not in seen and len(questions) < num_questions:
+                seen.add(item['question'].casefold())
+                questions.append(item)
+                if on_question:
+                    on_question(item)
+
+    @staticmethod
+    def _quiz_item_from_json(obj, content):
+        """Validate one JSON question object from the model; returns a quiz_item() or None"""
+        if not isinstance(obj, dict) or not isinstance(obj.get('question'), str):
+            return None
+        question = " ".join(obj['question'].split())
+        kind = str(obj.get('type', '')).strip().lower().replace(' ', '_').replace('-', '_')
+        answer = obj.get('answer')
+        answer = " ".join(str(answer).split()) if answer not in (None, "") else None
+        if len(question) <= 10 or kind not in StudyTools.QUIZ_TYPES:
+            return None
+
+        extra = {}
+        # Keep the source span only when it really is a quote from the content
+        source = " ".join(obj['source'].split()) if isinstance(obj.get('source'), str) else ""
+        if source and source.casefold() in " ".join(content.split()).casefold():
+            extra['source'] = source
+
+        if kind == "multiple_choice":
+            options = [
+                _OPTION_LABEL_RE.sub('', " ".join(str(o).split()))
+                for o in obj.get('options') or [] if str(o).strip()
+            ]
+            if len(options) < 2 or not answer:
+                return None
+            letter = _OPTION_LETTER_RE.match(answer)
+            if answer not in options and letter:
+                index = ord(letter.group(1).upper()) - ord('A')
+                answer = options[index] if index < len(options) else None
+            else:
+                answer = _OPTION_LABEL_RE.sub('', answer)
+            if answer not in options:
+                return None
+            return quiz_item(question, answer, "multiple_choice", options=options, **extra)
+
+        if kind == "true_false":
+            verdict = (answer or "").casefold()
+            if verdict not in ("true", "false"):
+                return None
+            return quiz_item(question, verdict.capitalize(), "true_false", **extra)
+
+        return quiz_item(question, answer, "open", **extra)
+
+    @staticmethod
+    def _report_packing(packing):
+        """Tell the user when content had to be trimmed to fit the model context"""
+        if packing['dropped_sentences'] or packing['dropped_chars'] > 0:
+            share = packing['dropped_chars'] / max(1, packing['dropped_chars'] + len(packing['text']))
+            StudyTools._notify(
+                "info",
+                f"Content trimmed to fit the model context: kept {packing['kept_sentences']} sentences, "
+                f"dropped {packing['dropped_sentences']} ({share:.0%} of the text)."
+            )
+
+    @staticmethod
+    def _parse_quiz_line(line):
+        """Return the question text if a completion line is a numbered question, else None"""
+        line = line.strip()
+        # Look for question patterns
+        if (line and (line.lower().startswith('q') or 
+                     re.match(r'^[0-9]+[\.\):]', line) or
+                     line.lower().startswith('question'))):
+            # Clean up the question
+            cleaned_question = re.sub(r'^(Q[0-9]+[:.]?|[0-9]+[\.\):]|Question [0-9]+[:.]?)\s*', '', line)
+            if cleaned_question and len(cleaned_question) > 10:
+                return cleaned_question
+        return None
+
+    @staticmethod
+    @instrumented("quiz.basic")
+    def generate_basic_quiz(content, difficulty="medium", num_questions=5, topic=None, seed=0):
+        """Generate quiz questions with answers from the content alone (no AI call)"""
+        if not content or len(content.split()) < 10:
+            return [quiz_item("Not enough content to generate meaningful quiz questions. Please search for a topic first.")]
+        
+        questions = QuizEngine(content, topic, seed).generate(difficulty, num_questions)
+        
+        # Fill with generic questions if needed
+        generic_questions = [
+            "What is the main concept discussed in this topic?",
+            "How does this topic relate to real-world applications?",
+            "What are the most important points to remember?",
+            "What questions does this information raise?",
+            "How might this knowledge be useful in practice?"
+        ]
+        while len(questions) < num_questions:
+            questions.append(quiz_item(generic_questions[len(questions) % len(generic_questions)]))
+        
+        return questions[:num_questions]
+    
+    @staticmethod
+    @instrumented("quiz.grade")
+    def grade_quiz(items, answers, content, topic, use_cache=True):
+        """Grade quiz answers: clear-cut ones locally, the rest in one batched AI call
+
+        answers maps 1-based question numbers to the user's answers.
+        Returns one grade() dict per item; without an API key (or if the AI
+        reply cannot be read) undecided answers are marked for review.
+        """
+        grader = LocalGrader(content)
+        grades = [grader.grade_answer(item, answers.get(i)) for i, item in enumerate(items, 1)]
+        pending = [i for i, result in enumerate(grades, 1) if result is None]
+        
+        ai_grades = {}
+        if pending and StudyTools._api_key():
+            ai_grades = StudyTools._grade_with_ai(items, answers, pending, grader, topic, use_cache)
+        for i in pending:
+            grades[i - 1] = ai_grades.get(i) or grade(
+                "review", None, "Could not be graded automatically; compare your answer with the source."
+            )
+        return grades
+
+    @staticmethod
+    def _grade_with_ai(items, answers, pending, grader, topic, use_cache=True):
+        """Grade the given question numbers in a single structured Groq request"""
+        blocks = []
+        for i in pending:
+            item = items[i - 1]
+            reference = item.get('answer') or grader.context(item['question'])
+            blocks.append(
+                f"Q{i}: {item['question']}\n"
+                f"Reference: {reference[:600]}\n"
+                f"Student answer: {str(answers.get(i))[:1000]}"
+            )
+        prompt = f"""
+        Grade a student's quiz answers about "{topic}" against the reference material.
+        Accept answers that are correct in substance even if worded differently.
+        
+        {chr(10).join(blocks)}
+        
+        Reply with only a JSON array containing one object per question, like:
+        [{{"id": 1, "verdict": "correct", "feedback": "One or two sentences for the student."}}]
+        The verdict must be "correct", "partial" or "incorrect".
+        """
+        with StudyTools._spinner("AI is checking your answers..."):
+            response_text = StudyTools.call_groq_api(
+                prompt, max_tokens=80 * len(pending) + 100, temperature=0, use_cache=use_cache
+            )
+        try:
+            results = json.loads(response_text[response_text.index('['):response_text.rindex(']') + 1])
+        except (AttributeError, TypeError, ValueError):
+            logger.warning("Could not parse AI grading response")
+            return {}
+        
+        grades = {}
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            verdict = str(result.get('verdict', '')).lower()
+            try:
+                question = int(result.get('id'))
+            except (TypeError, ValueError):
+                continue
+            if question in pending and verdict in StudyTools.AI_VERDICT_SCORES:
+                grades[question] = grade(
+                    verdict, StudyTools.AI_VERDICT_SCORES[verdict], str(result.get('feedback', '')), "ai"
+                )
+        return grades
+
+    @staticmethod
+    @instrumented("notes.generate")
+    def generate_enhanced_notes_with_ai(content, topic, on_update=None):
+        """Generate comprehensive study notes using Groq AI
+
+        When on_update is given the completion is streamed and the text
+        generated so far is passed to it as it grows.
+        """
+        if not content or len(content.strip()) < 50:
+            return StudyTools.create_basic_notes(content)
+        
+        try:
+            prompt, packing = StudyTools._notes_prompt(content, topic)
+            StudyTools._report_packing(packing)
+            
+            with StudyTools._spinner("AI is creating comprehensive study notes..."):
+                response_text = StudyTools._complete(prompt, max_tokens=2000, temperature=0.4, on_update=on_update)
+            
+            if response_text:
+                return {
+                    'enhanced': True,
+                    'content': response_text
+                }
+            else:
+                return StudyTools.create_basic_notes(content)
+            
+        except Exception as e:
+            StudyTools._notify("warning", f"AI notes generation encountered an issue: {e}. Using basic notes generation.")
+            return StudyTools.create_basic_notes(content)
+
+    @staticmethod
+    def _notes_prompt(content, topic):
+        """The AI notes prompt with the content packed in; returns (prompt, packing)"""
+        prompt_template = f"""
+            Create comprehensive, well-structured study notes for the topic: "{topic}"
+            
+            Source content:
+            {PromptPacker.SLOT}
+            
+            Create detailed study notes with these sections:
+            {NOTES_SECTIONS}
+            Make the notes comprehensive, student-friendly, and well-organized.
+            Focus specifically on the content provided, not generic information.
+            Use plain text formatting without emojis or special unicode characters.
+            """
+        return PromptPacker.fill(prompt_template, content, max_tokens=2000)
+
+    @staticmethod
+    def _complete(prompt, max_tokens, temperature, on_update=None):
+        """call_groq_api, or a stream whose accumulated text is passed to on_update"""
+        if not on_update:
+            return StudyTools.call_groq_api(prompt, max_tokens=max_tokens, temperature=temperature)
+        
+        response_text = ""
+        last_update = 0.0
+        for chunk in StudyTools.stream_groq_api(prompt, max_tokens=max_tokens, temperature=temperature):
+            response_text += chunk
+            # Re-render on line breaks or at most every 100ms, not on every token
+            if '\n' in chunk or time.perf_counter() - last_update > 0.1:
+                on_update(response_text)
+                last_update = time.perf_counter()
+        if response_text:
+            on_update(response_text)
+        return response_text
+
+    @staticmethod
+    @instrumented("wikipedia.full_article")
+    def fetch_full_article(title, max_bytes=FULL_ARTICLE_MAX_BYTES, use_cache=True):
+        """Fetch the complete plain-text article, streaming the response up to max_bytes"""
+        cache = get_wiki_cache() if use_cache else None
+        if cache:
+            cached = cache.get(title, namespace="full:")
+            get_instrumentation().cache("wikipedia_full", "hit" if cached else "miss")
+            if cached:
+                return cached
+        if OFFLINE_ONLY:
+            # The offline corpus only holds lead sections
+            return StudyTools._offline_error(title, "full article")
+
+        import requests
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'formatversion': 2,
+            'prop': 'extracts|info',
+            'inprop': 'url',
+            'explaintext': 1,
+            'exsectionformat': 'wiki',
+            'redirects': 1,
+            'titles': title
+        }
+        try:
+            StudyTools._count_network_call()
+            with requests.get(WIKIPEDIA_API_URL, params=params, headers=StudyTools.WIKIPEDIA_HEADERS, timeout=30,
+                              stream=True) as response:
+                if response.status_code != 200:
+                    return {
+                        'success': False,
+                        'content': f"Could not fetch the full article for '{title}' (HTTP {response.status_code})",
+                        'error': f"HTTP {response.status_code}"
+                    }
+                body = bytearray()
+                for block in response.iter_content(chunk_size=64 * 1024):
+                    body.extend(block)
+                    if len(body) > max_bytes:
+                        return {
+                            'success': False,
+                            'content': f"The article for '{title}' is larger than {max_bytes // 1024} KB.",
+                            'error': "Too large"
+                        }
+            
+            pages = json.loads(bytes(body)).get('query', {}).get('pages', [])
+            page = pages[0] if pages else {}
+            if not page or page.get('missing') or not page.get('extract'):
+                return {
+                    'success': False,
+                    'content': f"No Wikipedia article found for '{title}'.",
+                    'error': "Not Found"
+                }
+            
+            result = {
+                'success': True,
+                'content': page['extract'],
+                'url': page.get('fullurl', ''),
+                'title': page.get('title', title)
+            }
+            if cache:
+                cache.put(title, result, namespace="full:")
+            return result
+        except Exception as e:
+            return {
+                'success': False,
+                'content': f"Error fetching the full article: {str(e)}",
+                'error': str(e)
+            }
+
+    @staticmethod
+    def chunk_article(text, max_chunk_tokens=FULL_ARTICLE_CHUNK_TOKENS):
+        """Split plain article text into section-aware chunks of at most max_chunk_tokens
+
+        Whole sections are packed together while they fit; an oversized
+        section is split on paragraphs, and an oversized paragraph on sentences.
+        """
+        # (heading, body) pairs; the lead section has no heading
+        sections = []
+        last_end, heading = 0, "Introduction"
+        for match in _SECTION_HEADING_RE.finditer(text):
+            sections.append((heading, text[last_end:match.start()]))
+            heading, last_end = match.group(2), match.end()
+        sections.append((heading, text[last_end:]))
+        
+        pieces = []
+        for heading, body in sections:
+            body = body.strip()
+            if not body or heading.strip().lower() in SKIPPED_ARTICLE_SECTIONS:
+                continue
+            block = f"{heading}\n{body}"
+            if estimate_tokens(block) <= max_chunk_tokens:
+                pieces.append(block)
+                continue
+            for paragraph in body.split('\n'):
+                paragraph = paragraph.strip()
+                if not paragraph:
+                    continue
+                if estimate_tokens(paragraph) <= max_chunk_tokens:
+                    pieces.append(f"{heading}\n{paragraph}")
+                    continue
+                sentence_run = ""
+                for sentence in _SENTENCE_BOUNDARY_RE.split(paragraph):
+                    # A single sentence longer than the budget is cut hard
+                    sentence = sentence[:max_chunk_tokens * 4]
+                    if sentence_run and estimate_tokens(sentence_run + " " + sentence) > max_chunk_tokens:
+                        pieces.append(f"{heading}\n{sentence_run}")
+                        sentence_run = ""
+                    sentence_run = f"{sentence_run} {sentence}".strip()
+                if sentence_run:
+                    pieces.append(f"{heading}\n{sentence_run}")
+        
+        chunks, current = [], ""
+        for piece in pieces:
+            if current and estimate_tokens(current + "\n\n" + piece) > max_chunk_tokens:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    @instrumented("notes.full_article")
+    def generate_full_article_notes(title, topic, max_workers=FULL_ARTICLE_MAX_WORKERS, on_update=None):
+        """Map-reduce study notes over the complete article
+
+        Each chunk is summarised concurrently (map), then the partial notes
+        are merged into the usual notes structure (reduce), so wall-clock
+        time follows the slowest chunk rather than the article length.
+        Up to max_workers Groq calls run at once; the tokens they use are
+        added to the calling thread's token_count().
+        """
+        with StudyTools._spinner("Fetching the full Wikipedia article..."):
+            article = StudyTools.fetch_full_article(title)
+        if not article['success']:
+            StudyTools._notify("warning", f"{article['content']} Using the summary instead.")
+            return None
+        
+        chunks = StudyTools.chunk_article(article['content'])
+        if len(chunks) <= 1:
+            return StudyTools.generate_enhanced_notes_with_ai(article['content'], topic, on_update=on_update)
+        
+        api_key = StudyTools._api_key()
+        
+        def summarise_chunk(index, chunk):
+            prompt = f"""
+            You are writing partial study notes on "{topic}" from part {index} of {len(chunks)} of its Wikipedia article.
+            
+            Article excerpt:
+            {chunk}
+            
+            List the key points, important terms with short definitions, and specific facts
+            (dates, figures, names) from this excerpt only. Be concise and use plain text bullet points.
+            """
+            return StudyTools._call_on_worker(api_key, prompt, max_tokens=700, temperature=0.3)
+        
+        with StudyTools._spinner(f"AI is reading {len(chunks)} parts of the article in parallel..."):
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+                partials = StudyTools._gather_worker_results(
+                    executor.map(summarise_chunk, range(1, len(chunks) + 1), chunks)
+                )
+        if not partials:
+            return None
+        
+        with StudyTools._spinner("AI is merging the partial notes..."):
+            merged = StudyTools._reduce_partial_notes(partials, topic, api_key, max_workers, on_update)
+        if not merged:
+            return None
+        return {
+            'enhanced': True,
+            'content': merged,
+            'chunks': len(chunks)
+        }
+
+    @staticmethod
+    def _call_on_worker(api_key, prompt, **kwargs):
+        """call_groq_api from a pool thread; returns the text and the tokens it used"""
+        with StudyTools.headless(api_key):
+            tokens_before = StudyTools.token_count()
+            text = StudyTools.call_groq_api(prompt, **kwargs)
+            return text, StudyTools.token_count() - tokens_before
+
+    @staticmethod
+    def _gather_worker_results(results):
+        """Texts from _call_on_worker results, adding their tokens to the current thread"""
+        texts = []
+        for text, tokens in results:
+            StudyTools._context.tokens = StudyTools.token_count() + tokens
+            if text:
+                texts.append(text)
+        return texts
+
+    @staticmethod
+    def _reduce_partial_notes(partials, topic, api_key, max_workers, on_update=None):
+        """Merge partial notes, first in parallel groups if they exceed one prompt's budget"""
+        budget = GROQ_CONTEXT_TOKENS - 2000 - 800  # final output and template overhead
+        
+        def merge_group(group):
+            prompt = f"""
+            Combine these partial study notes on "{topic}" into one concise set of bullet points,
+            removing duplicates and keeping specific facts:
+            
+            {chr(10).join(group)}
+            """
+            return StudyTools._call_on_worker(api_key, prompt, max_tokens=900, temperature=0.3)
+        
+        while estimate_tokens("\n\n".join(partials)) > budget and len(partials) > 1:
+            groups, current = [], []
+            for partial in partials:
+                if current and estimate_tokens("\n\n".join(current + [partial])) > budget:
+                    groups.append(current)
+                    current = []
+                current.append(partial)
+            groups.append(current)
+            if len(groups) == len(partials):
+                # No two partials fit together, so merging cannot shrink them
+                break
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as executor:
+                partials = StudyTools._gather_worker_results(executor.map(merge_group, groups))
+        
+        while len(partials) > 1 and estimate_tokens("\n\n".join(partials)) > budget:
+            partials.pop()
+        
+        prompt = f"""
+            Create comprehensive, well-structured study notes for the topic: "{topic}"
+            
+            The following partial notes were taken from consecutive parts of the full article:
+            {chr(10).join(partials)}
+            
+            Create detailed study notes with these sections:
+            {NOTES_SECTIONS}
+            Merge overlapping points, keep the most specific facts, and cover the whole article.
+            Use plain text formatting without emojis or special unicode characters.
+            """
+        return StudyTools._complete(prompt, max_tokens=2000, temperature=0.4, on_update=on_update)
+
+    @staticmethod
+    @instrumented("notes.basic")
+    def create_basic_notes(content):
+        """Create structured study notes (fallback method)"""
+        if not content:
+            return {
+                'enhanced': False,
+                'content': "No content available for notes generation."
+            }
+        
+        # Ranked key phrases and sentences from the shared analysis of this content
+        analysis = analyze_text(content)
+        sentences = analysis.sentences
+        
+        # Create formatted notes
+        notes_content = f"""
+Overview
+{' '.join(sentences[:2]) if sentences else 'No overview available.'}
+
+Key Points
+"""
+        for point in analysis.key_sentences(6, min_words=9):
+            notes_content += f"- {point}\n"
+        
+        notes_content += """
+Important Terms
+"""
+        for term in analysis.key_terms(8):
+            notes_content += f"- {term}\n"
+        
+        notes_content += f"""
+Summary
+{' '.join(sentences[:3]) if len(sentences) >= 3 else content[:200] + '...'}
+
+Study Tips
+- Review the key points regularly
+- Create connections between important terms
+- Practice explaining the concept in your own words
+- Look for real-world examples and applications
+"""
+        
+        return {
+            'enhanced': False,
+            'content': notes_content
+        }
+    
+    @staticmethod
+    @instrumented("related.topics")
+    def get_related_topics(topic, content=None):
+        """Suggest related topics for further study
+
+        Articles similar to content (or to the topic's cached article) are
+        found locally first; Wikipedia's opensearch is only asked when
+        there are too few of them, and never with OFFLINE_ONLY.
+        """
+        engine = get_related_engine()
+        local = engine.related(topic, content) if engine else []
+        if len(local) >= StudyTools.MIN_LOCAL_RELATED:
+            return local
+        if OFFLINE_ONLY:
+            return local or StudyTools._fallback_related(topic)
+
+        import requests
+        try:
+            StudyTools._count_network_call()
+            response = requests.get(WIKIPEDIA_API_URL, params=StudyTools._opensearch_params(topic), timeout=10)
+            
+            if response.status_code == 200:
+                suggestions = StudyTools._suggestions_from_opensearch(topic, response.json())
+                # Warm the summary cache for every suggestion in one request, for previews and instant clicks
+                StudyTools.fetch_summaries(suggestions)
+                return suggestions
+            
+        except Exception as e:
+            StudyTools._notify("warning", f"Could not fetch related topics: {e}")
+        
+        return local or StudyTools._fallback_related(topic)
+
+    @staticmethod
+    def _opensearch_params(topic):
+        # Use Wikipedia's opensearch API for suggestions
+        return {
+            'action': 'opensearch',
+            'search': topic,
+            'limit': 8,
+            'format': 'json'
+        }
+
+    @staticmethod
+    def _suggestions_from_opensearch(topic, data):
+        """Up to six opensearch titles other than the topic itself"""
+        suggestions = data[1] if len(data) > 1 else []
+        return [suggestion for suggestion in suggestions[:6] if suggestion.lower() != topic.lower()]
+
+    @staticmethod
+    def _fallback_related(topic):
+        """Generic suggestions when neither the local engine nor Wikipedia has any"""
+        return [
+            f"History of {topic}",
+            f"Applications of {topic}",
+            f"{topic} fundamentals",
+            f"Advanced {topic}",
+            f"{topic} in practice"
+        ]
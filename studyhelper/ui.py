@@ -0,0 +1,870 @@
+"""The Streamlit interface: research, quiz, notes, related topics and review modes"""
+import hashlib
+import html
+import os
+import uuid
+from datetime import datetime
+
+import streamlit as st
+
+from .caches import get_llm_cache, get_wiki_cache
+from .config import HISTORY_PAGE_SIZE, REVIEW_SESSION_SIZE
+from .groq_pool import get_groq_pool, get_rate_limiter
+from .history import get_study_history
+from .instrumentation import get_instrumentation, instrumented
+from .prefetch import StudyPrefetcher, get_prefetcher
+from .quiz_session import QuizSession
+from .review import ReviewDeck, get_review_deck
+from .tools import StudyTools
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+@st.cache_resource
+def get_stylesheet():
+    """Page CSS as a <style> block, read from static/style.css once per process"""
+    with open(os.path.join(STATIC_DIR, "style.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+
+class StudyHelper:
+    def __init__(self):
+        self.tools = StudyTools()
+        self.difficulty = "medium"
+        self.num_questions = 5
+        self.initialize_session_state()
+    
+    def initialize_session_state(self):
+        """Initialize session state variables"""
+        defaults = {
+            'history_query': "",
+            'history_cursors': [None],
+            'open_artifact': None,
+            'carded': set(),
+            'review_session': [],
+            'review_owner': None,
+            'review_revealed': False,
+            'show_waterfall': False,
+            'last_trace': [],
+            'current_content': "",
+            'current_topic': "",
+            'current_title': "",
+            'show_quiz': False,
+            'show_notes': False,
+            'show_related': False,
+            'groq_api_key': "",
+            'session_user_id': f"session-{uuid.uuid4().hex}",
+            'prefetch_enabled': False,
+            'prefetch_slot': {},
+            'quiz_session': None,
+            'quiz_generations': 0,
+            'regenerate_quiz': False
+        }
+        
+        for key, value in defaults.items():
+            if key not in st.session_state:
+                st.session_state[key] = value
+    
+    def display_header(self):
+        """Display the main header"""
+        st.markdown("""
+        <div class="main-header">
+            <h1>🤖 Agentic AI Study Helper</h1>
+            <p>Your intelligent study companion powered by Groq AI - Research, Learn, and Test your knowledge!</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    @instrumented("ui.sidebar")
+    def display_sidebar(self):
+        """Display sidebar with options and history"""
+        with st.sidebar:
+            st.header("🎯 Study Configuration")
+
+            # Groq API Key input with validation
+            groq_api_key = st.text_input(
+                "🔑 Enter Groq API Key:",
+                type="password",
+                value=st.session_state.get('groq_api_key', ''),
+                help="Get your free API key from console.groq.com"
+            )
+            
+            if groq_api_key:
+                st.session_state['groq_api_key'] = groq_api_key
+                st.markdown('<div class="api-status">✅ API Key Configured</div>', unsafe_allow_html=True)
+            else:
+                st.markdown('<div class="warning-box">⚠️ Please enter your Groq API key to enable AI features</div>', unsafe_allow_html=True)
+
+            st.divider()
+
+            # Study mode selection
+            study_mode = st.selectbox(
+                "📚 Select Study Mode:",
+                ["📖 Research & Learn", "📝 Quiz Mode", "📋 Study Notes", "🔗 Related Topics", "🧠 Review Cards"],
+                help="Choose how you want to study your topic"
+            )
+            
+            # Advanced options
+            with st.expander("⚙️ Advanced Options"):
+                difficulty = st.selectbox(
+                    "📊 Difficulty Level:",
+                    ["easy", "medium", "hard"],
+                    index=1,
+                    help="Select the complexity level for quizzes and content"
+                )
+                
+                num_questions = st.slider(
+                    "❓ Number of Quiz Questions:", 
+                    min_value=3, 
+                    max_value=15, 
+                    value=5,
+                    help="How many questions to generate for quizzes"
+                )
+
+                st.checkbox(
+                    "⚡ Prefetch quiz, notes & related topics",
+                    key="prefetch_enabled",
+                    help="Start preparing the next study steps in the background as soon as a topic is researched"
+                )
+
+                cache_stats = get_wiki_cache().stats()
+                st.caption(
+                    f"🗄️ Wikipedia cache: {cache_stats['entries']} topics, "
+                    f"{cache_stats['hits']} hits / {cache_stats['misses']} misses"
+                )
+                llm_stats = get_llm_cache().stats()
+                st.caption(
+                    f"🧠 AI response cache: {llm_stats['memory_hits'] + llm_stats['disk_hits']} hits / "
+                    f"{llm_stats['misses']} misses"
+                )
+                pool_stats = get_groq_pool().stats()
+                if pool_stats['saved_ms_per_call'] is not None:
+                    st.caption(
+                        f"🔌 Warm Groq connections save ~{pool_stats['saved_ms_per_call']:.0f} ms per call "
+                        f"({pool_stats['warm_avg_ms']:.0f} ms warm vs {pool_stats['cold_avg_ms']:.0f} ms cold)"
+                    )
+                limiter_stats = get_rate_limiter().stats()
+                if limiter_stats['granted']:
+                    st.caption(
+                        f"🚦 Groq rate limiter: {limiter_stats['queue_depth']} queued, "
+                        f"~{limiter_stats['avg_wait_ms']:.0f} ms average wait, "
+                        f"{limiter_stats['throttled']} throttled"
+                    )
+
+                st.checkbox(
+                    "⏱️ Show timing waterfall",
+                    key="show_waterfall",
+                    help="Where the previous run spent its time: Wikipedia, Groq, caches and rendering"
+                )
+
+            if st.session_state.show_waterfall:
+                self.display_waterfall(st.session_state.last_trace)
+
+            st.divider()
+            
+            # Study history, one page at a time
+            history = get_study_history()
+            user_id = self.user_id()
+            st.header("📚 Recent Studies")
+            st.text_input(
+                "🔎 Search history:",
+                key="history_query",
+                on_change=lambda: st.session_state.update(history_cursors=[None]),
+                placeholder="Filter your topics..."
+            )
+            cursors = st.session_state.history_cursors
+            page = history.page(user_id, st.session_state.history_query, cursors[-1], HISTORY_PAGE_SIZE)
+            if page['items']:
+                for i, item in enumerate(page['items']):
+                    with st.expander(f"📖 {item['topic'][:25]}{'...' if len(item['topic']) > 25 else ''}"):
+                        visited = datetime.fromtimestamp(item['last_visited']).strftime("%Y-%m-%d %H:%M")
+                        st.write(f"**🕒 Last visit:** {visited}")
+                        st.write(f"**📋 Mode:** {item['mode']}")
+                        st.write(f"**🔁 Visits:** {item['visits']}")
+                        if st.button("🔄 Study Again", key=f"restudy_{i}"):
+                            return study_mode, difficulty, num_questions, item['topic']
+                        labels = {"notes": "📋 Saved Notes", "quiz": "📝 Saved Quiz"}
+                        for kind in item['artifacts']:
+                            if st.button(labels.get(kind, kind), key=f"artifact_{kind}_{i}"):
+                                st.session_state.open_artifact = (item['topic'], kind)
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    if len(cursors) > 1 and st.button("⬅️ Newer", use_container_width=True):
+                        cursors.pop()
+                        st.rerun()
+                with col2:
+                    if page['next'] and st.button("Older ➡️", use_container_width=True):
+                        cursors.append(page['next'])
+                        st.rerun()
+                st.caption(f"🗂️ {history.count(user_id)} topics studied")
+            else:
+                st.info("No recent studies")
+            
+            if st.button("🗑️ Clear History", help="Remove all study history"):
+                history.clear(user_id)
+                st.session_state.history_cursors = [None]
+                st.rerun()
+            
+            return study_mode, difficulty, num_questions, None
+    
+    def display_waterfall(self, trace):
+        """Stage timings of the previous run as a waterfall of bars"""
+        st.header("⏱️ Last Run Timings")
+        spans = [span for span in trace if 'duration' in span]
+        if not spans:
+            st.info("No timings recorded yet")
+            return
+        
+        total = max(span['start'] + span['duration'] for span in spans) or 1e-9
+        rows = []
+        for span in spans:
+            left = span['start'] / total * 100
+            width = max(span['duration'] / total * 100, 0.5)
+            color = "#e74c3c" if span['status'] == "error" else "#667eea"
+            details = ", ".join(f"{key}: {value}" for key, value in span['attrs'].items())
+            rows.append(
+                f'<div style="font-size: 0.75rem; margin: 4px 0; padding-left: {span["depth"] * 10}px;">'
+                f'{html.escape(span["stage"])} · {span["duration"] * 1000:.0f} ms'
+                f'<div style="position: relative; height: 6px; background: #eee; border-radius: 3px;">'
+                f'<div style="position: absolute; left: {left:.2f}%; width: {width:.2f}%; height: 6px; '
+                f'background: {color}; border-radius: 3px;"></div></div>'
+                + (f'<span style="color: #888;">{html.escape(details)}</span>' if details else '')
+                + '</div>'
+            )
+        st.markdown("".join(rows), unsafe_allow_html=True)
+        st.caption(f"🕒 {total * 1000:.0f} ms in total")
+    
+    @staticmethod
+    def user_id():
+        """Owner of the study history and review deck: a digest of the Groq API key, or this browser session
+
+        Without a key there is nothing to recognise a returning user by, so
+        their history and cards stay private to the session instead of being
+        shared with every other keyless user.
+        """
+        api_key = st.session_state.get('groq_api_key')
+        if api_key:
+            return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+        return st.session_state.session_user_id
+    
+    def add_to_history(self, topic, mode):
+        """Record a study session in the persistent history"""
+        get_study_history().record(self.user_id(), topic, mode)
+    
+    def save_artifact(self, kind, payload):
+        """Save generated notes or a quiz so they can be reopened from the history"""
+        if st.session_state.current_topic:
+            get_study_history().save_artifact(self.user_id(), st.session_state.current_topic, kind, payload)
+    
+    def add_review_cards(self, topic, items):
+        """Turn generated questions into spaced-repetition cards"""
+        added = get_review_deck().add_cards(self.user_id(), topic, items)
+        if added:
+            st.caption(f"🧠 {added} new review card{'s' if added > 1 else ''} added to your deck")
+    
+    def display_artifact(self, topic, kind):
+        """Show notes or a quiz saved in the history"""
+        payload = get_study_history().artifact(self.user_id(), topic, kind)
+        if payload is None:
+            return
+        if kind == "notes":
+            st.header(f"📋 Saved Notes: {topic}")
+            st.markdown('<div class="notes-section">', unsafe_allow_html=True)
+            st.markdown(payload['content'])
+            st.markdown('</div>', unsafe_allow_html=True)
+        else:
+            st.header(f"📝 Saved Quiz: {topic} ({payload['difficulty']})")
+            for i, item in enumerate(payload['questions'], 1):
+                with st.expander(f"Question {i}: {item['question']}"):
+                    for option in item.get('options', []):
+                        st.write(f"• {option}")
+                    for term, statement in item.get('pairs', {}).items():
+                        st.write(f"**{term}** → {statement}")
+                    if item.get('answer'):
+                        st.markdown(f"**🔑 Answer:** {item['answer']}")
+        if st.button("✖️ Close", key="close_artifact"):
+            st.session_state.open_artifact = None
+            st.rerun()
+        st.divider()
+    
+    @instrumented("ui.research")
+    def research_mode(self, topic):
+        """Research and learning mode with enhanced display"""
+        st.header(f"📖 Researching: {topic}")
+        
+        with st.spinner("🔍 Searching Wikipedia for comprehensive information..."):
+            result = self.tools.search_wikipedia(topic)
+        
+        if result['success']:
+            st.session_state.current_content = result['content']
+            st.session_state.current_topic = topic
+            st.session_state.current_title = result.get('title', topic)
+            
+            if st.session_state.get('prefetch_enabled'):
+                get_prefetcher().start(
+                    st.session_state.prefetch_slot,
+                    topic,
+                    result['content'],
+                    st.session_state.get('groq_api_key'),
+                    self.difficulty,
+                    self.num_questions
+                )
+            
+            # Success message with animation
+            st.markdown('<div class="success-message">', unsafe_allow_html=True)
+            st.success(f"✅ Successfully found detailed information about: **{result['title']}**")
+            st.markdown('</div>', unsafe_allow_html=True)
+            
+            # Display content in an attractive format
+            col1, col2 = st.columns([3, 1])
+            
+            with col1:
+                st.markdown("### 📄 Content Summary")
+                st.markdown(f"**📊 Length:** {len(result['content'])} characters")
+                st.markdown("---")
+                st.write(result['content'])
+            
+            with col2:
+                if result.get('thumbnail'):
+                    st.image(result['thumbnail'], width=200)
+                
+                if result.get('url'):
+                    st.markdown(f"**📖 Source:** [Wikipedia Article]({result['url']})")
+                
+                st.markdown("**🔧 Available Actions:**")
+                if st.button("📝 Generate Quiz", use_container_width=True):
+                    st.session_state.show_quiz = True
+                    st.rerun()
+                
+                if st.button("📋 Create Notes", use_container_width=True):
+                    st.session_state.show_notes = True
+                    st.rerun()
+                
+                if st.button("🔗 Related Topics", use_container_width=True):
+                    st.session_state.show_related = True
+                    st.rerun()
+            
+        else:
+            StudyPrefetcher.cancel(st.session_state.prefetch_slot)
+            st.error(f"❌ {result['content']}")
+            if result.get('error') == 'Not Found':
+                st.info("💡 **Suggestions:**")
+                st.info("• Check the spelling of your search term")
+                st.info("• Try more general or specific terms")
+                st.info("• Use alternative names or synonyms")
+    
+    @instrumented("ui.quiz")
+    def quiz_mode(self, difficulty, num_questions):
+        """Enhanced quiz generation mode"""
+        if not st.session_state.current_content:
+            st.warning("⚠️ Please research a topic first to generate a quiz!")
+            return
+        
+        st.header(f"📝 Interactive Quiz: {st.session_state.current_topic}")
+        
+        # Display quiz metadata
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("📊 Difficulty", difficulty.capitalize())
+        with col2:
+            st.metric("❓ Questions", num_questions)
+        with col3:
+            st.metric("📄 Content Length", f"{len(st.session_state.current_content)} chars")
+        
+        st.divider()
+        
+        # Display questions with enhanced styling
+        st.markdown("### 🎯 Quiz Questions")
+        content = st.session_state.current_content
+        topic = st.session_state.current_topic
+        calls_before = self.tools.network_call_count()
+        
+        # Only generate on first view, when the inputs change, or on an explicit "Generate New Quiz"
+        quiz = st.session_state.quiz_session
+        regenerate = st.session_state.regenerate_quiz
+        if quiz is None or regenerate or not quiz.matches(content, topic, difficulty, num_questions):
+            st.session_state.regenerate_quiz = False
+            quiz = QuizSession(QuizSession.make_key(content, topic, difficulty, num_questions))
+            
+            # Render each question as soon as it is streamed in
+            def render_streamed_question(question):
+                quiz.questions.append(question)
+                self._render_quiz_question(quiz, len(quiz.questions), question)
+            
+            questions = None
+            if not regenerate:
+                questions = StudyPrefetcher.take(
+                    st.session_state.prefetch_slot,
+                    ('quiz', difficulty, num_questions),
+                    topic,
+                    content
+                )
+            if questions is None:
+                questions = self.tools.generate_enhanced_quiz_with_ai(
+                    content, 
+                    topic,
+                    difficulty, 
+                    num_questions,
+                    on_question=render_streamed_question,
+                    use_cache=not regenerate
+                )
+            
+            # Questions that were not streamed (fallback fill-ins) are rendered afterwards
+            streamed = quiz.questions
+            quiz.questions = list(questions)
+            # A failure after streaming started returns a basic quiz instead of the streamed questions
+            replaced = quiz.questions[:len(streamed)] != streamed
+            if not replaced:
+                for i, question in enumerate(quiz.questions[len(streamed):], len(streamed) + 1):
+                    self._render_quiz_question(quiz, i, question)
+            
+            st.session_state.quiz_session = quiz
+            st.session_state.quiz_generations += 1
+            self.save_artifact("quiz", {'difficulty': difficulty, 'questions': quiz.questions})
+            self.add_review_cards(topic, ReviewDeck.cards_from_quiz(quiz.questions))
+            if replaced:
+                # Redraw under fresh widget keys so answers given on screen match the graded questions
+                quiz.reset_widgets()
+                st.rerun()
+        else:
+            for i, question in enumerate(quiz.questions, 1):
+                self._render_quiz_question(quiz, i, question)
+        
+        questions = quiz.questions
+        st.caption(
+            f"🔁 Quizzes generated this session: {st.session_state.quiz_generations} · "
+            f"network calls on this run: {self.tools.network_call_count() - calls_before}"
+        )
+        
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            if st.button("📊 Submit Quiz", type="primary", use_container_width=True):
+                quiz.grades = self.tools.grade_quiz(questions, quiz.answers, content, topic)
+                quiz.graded_answers = dict(quiz.answers)
+        
+        with col2:
+            if st.button("🔄 Generate New Quiz", use_container_width=True):
+                st.session_state.regenerate_quiz = True
+                st.rerun()
+        
+        # Results stay visible across reruns until an answer is changed
+        if quiz.grades and quiz.graded_answers == quiz.answers:
+            self._render_quiz_results(questions, quiz.grades)
+    
+    def _render_quiz_results(self, questions, grades):
+        """Score summary and per-question verdicts with feedback"""
+        icons = {"correct": "✅", "partial": "🟡", "incorrect": "❌", "unanswered": "⚪", "review": "🔍"}
+        scored = [g['score'] for g in grades if g['score'] is not None]
+        points = sum(scored)
+        st.success(f"✅ Quiz graded! Score: {points:g}/{len(scored)}" + (
+            f" ({len(grades) - len(scored)} to review yourself)" if len(scored) < len(grades) else ""
+        ))
+        if scored and points / len(scored) >= 0.8:
+            st.balloons()
+        unanswered = sum(1 for g in grades if g['verdict'] == "unanswered")
+        if unanswered:
+            st.warning(f"📝 You left {unanswered} question{'s' if unanswered > 1 else ''} unanswered.")
+        
+        ai_graded = sum(1 for g in grades if g['graded_by'] == "ai")
+        st.caption(f"🧮 {len(grades) - ai_graded} answers graded instantly, {ai_graded} checked by AI")
+        for i, (item, result) in enumerate(zip(questions, grades), 1):
+            with st.expander(f"{icons[result['verdict']]} Question {i}: {result['verdict'].capitalize()}"):
+                st.markdown(f"**{item['question']}**")
+                if result['feedback']:
+                    st.write(result['feedback'])
+                if item.get('answer') and result['verdict'] != "correct":
+                    st.markdown(f"**🔑 Answer:** {item['answer']}")
+                if item.get('source') and result['verdict'] != "correct":
+                    st.caption(f"📖 Source: \"{item['source']}\"")
+    
+    def _render_quiz_question(self, quiz, i, item):
+        """Render one quiz question card with the answer widget for its type"""
+        question = item['question']
+        st.markdown(f"""
+        <div class="quiz-question">
+            <strong>Question {i}:</strong> {question}
+        </div>
+        """, unsafe_allow_html=True)
+        
+        if item['type'] == "true_false":
+            answer = st.radio(
+                f"Your answer for Question {i}:",
+                ["True", "False"],
+                index=None,
+                horizontal=True,
+                key=quiz.answer_key(i)
+            )
+        elif item['type'] == "multiple_choice":
+            answer = st.radio(
+                f"Your answer for Question {i}:",
+                item['options'],
+                index=None,
+                key=quiz.answer_key(i)
+            )
+        elif item['type'] == "matching":
+            answer = {}
+            for j, term in enumerate(item['pairs'], 1):
+                answer[term] = st.selectbox(
+                    f"**{term}**",
+                    item['options'],
+                    index=None,
+                    placeholder="Choose the matching statement...",
+                    key=f"{quiz.answer_key(i)}_{j}"
+                )
+        else:
+            # Answer input with dynamic height based on question type
+            if "essay" in question.lower() or "explain" in question.lower() or "analyze" in question.lower():
+                height = 150
+            else:
+                height = 80
+            
+            answer = st.text_area(
+                f"Your answer for Question {i}:", 
+                key=quiz.answer_key(i), 
+                height=height,
+                placeholder="Type your answer here..."
+            )
+        quiz.answers[i] = answer
+    
+    @instrumented("ui.notes")
+    def notes_mode(self):
+        """Enhanced study notes generation mode"""
+        if not st.session_state.current_content:
+            st.warning("⚠️ Please research a topic first to create study notes!")
+            return
+        
+        st.header(f"📋 Study Notes: {st.session_state.current_topic}")
+        
+        # The notes' key terms become review cards once per topic and session
+        carded = (st.session_state.current_topic, st.session_state.current_content)
+        if carded not in st.session_state.carded:
+            st.session_state.carded.add(carded)
+            self.add_review_cards(
+                st.session_state.current_topic,
+                ReviewDeck.cards_from_terms(st.session_state.current_content, st.session_state.current_topic)
+            )
+        
+        # Notes type selection
+        col1, col2 = st.columns([3, 2])
+        with col1:
+            st.markdown("**Choose your notes style:**")
+        with col2:
+            notes_type = st.selectbox(
+                "", 
+                ["🧠 AI Enhanced (Recommended)", "📝 Basic Structure"], 
+                key="notes_type",
+                help="AI Enhanced provides comprehensive, structured notes using Groq AI"
+            )
+        
+        if notes_type == "🧠 AI Enhanced (Recommended)":
+            if not st.session_state.get('groq_api_key'):
+                st.error("🔑 Please enter your Groq API key in the sidebar to use AI-enhanced notes.")
+                return
+            
+            full_article = st.checkbox(
+                "📚 Use the full article (slower, more detailed)",
+                key="notes_full_article",
+                help="Reads the complete Wikipedia article in parallel chunks instead of just the summary"
+            )
+            
+            st.markdown('<div class="notes-section">', unsafe_allow_html=True)
+            notes_placeholder = st.empty()
+            notes_result = None
+            if full_article:
+                notes_result = self.tools.generate_full_article_notes(
+                    st.session_state.current_title or st.session_state.current_topic,
+                    st.session_state.current_topic,
+                    on_update=lambda text: notes_placeholder.markdown(text + " ▌")
+                )
+            else:
+                notes_result = StudyPrefetcher.take(
+                    st.session_state.prefetch_slot,
+                    'notes',
+                    st.session_state.current_topic,
+                    st.session_state.current_content
+                )
+            if notes_result is None:
+                notes_result = self.tools.generate_enhanced_notes_with_ai(
+                    st.session_state.current_content, 
+                    st.session_state.current_topic,
+                    on_update=lambda text: notes_placeholder.markdown(text + " ▌")
+                )
+            
+            if notes_result.get('enhanced'):
+                notes_placeholder.markdown(notes_result['content'])
+                self.save_artifact("notes", {'content': notes_result['content']})
+                st.markdown('</div>', unsafe_allow_html=True)
+                
+                # Download option
+                st.download_button(
+                    label="💾 Download Notes",
+                    data=notes_result['content'],
+                    file_name=f"{st.session_state.current_topic}_notes.md",
+                    mime="text/markdown"
+                )
+            else:
+                notes_placeholder.empty()
+                st.markdown('</div>', unsafe_allow_html=True)
+                self._display_basic_notes(notes_result)
+        else:
+            notes = self.tools.create_basic_notes(st.session_state.current_content)
+            st.markdown('<div class="notes-section">', unsafe_allow_html=True)
+            st.markdown(notes['content'])
+            st.markdown('</div>', unsafe_allow_html=True)
+    
+    def _display_basic_notes(self, notes_result):
+        """Display basic notes with enhanced styling"""
+        st.markdown('<div class="notes-section">', unsafe_allow_html=True)
+        st.markdown(notes_result['content'])
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    @instrumented("ui.related")
+    def related_topics_mode(self):
+        """Enhanced related topics suggestion mode"""
+        if not st.session_state.current_topic:
+            st.warning("⚠️ Please research a topic first to find related topics!")
+            return
+        
+        st.header(f"🔗 Topics Related to: {st.session_state.current_topic}")
+        
+        with st.spinner("🔍 Discovering related topics..."):
+            related = StudyPrefetcher.take(
+                st.session_state.prefetch_slot,
+                'related',
+                st.session_state.current_topic,
+                st.session_state.current_content
+            )
+            if related is None:
+                related = self.tools.get_related_topics(
+                    st.session_state.current_topic, st.session_state.current_content
+                )
+            # Served from the cache that get_related_topics just filled
+            previews = self.tools.fetch_summaries(related, cached_only=True)
+        
+        if related:
+            st.markdown("### 📚 Suggested Topics for Further Study:")
+            
+            # Display in a grid layout
+            cols = st.columns(2)
+            for i, topic in enumerate(related):
+                preview = previews.get(topic)
+                with cols[i % 2]:
+                    with st.container():
+                        st.markdown(f"**📖 {topic}**")
+                        col1, col2 = st.columns([2, 1])
+                        with col1:
+                            if preview:
+                                if preview.get('thumbnail'):
+                                    st.image(preview['thumbnail'], width=120)
+                                summary = preview['content']
+                                st.write(summary[:280].rsplit(' ', 1)[0] + "…" if len(summary) > 280 else summary)
+                                if preview.get('url'):
+                                    st.markdown(f"[🌐 Wikipedia]({preview['url']})")
+                            else:
+                                st.write("Explore this related topic")
+                        with col2:
+                            if st.button("🔍 Study", key=f"study_{i}_{topic}"):
+                                self.research_mode(topic)
+                                self.add_to_history(topic, "Related Topic Research")
+                                st.rerun()
+                        st.divider()
+        else:
+            st.info("No related topics found. Try searching for a different topic.")
+    
+    @instrumented("ui.review")
+    def review_mode(self):
+        """Spaced-repetition review of saved cards (no AI calls)"""
+        st.header("🧠 Review Cards")
+        deck = get_review_deck()
+        user_id = self.user_id()
+        session = st.session_state.review_session
+        if st.session_state.review_owner != user_id:
+            # Entering or changing the API key switches decks; cards queued from the old one must not be rated here
+            session.clear()
+            st.session_state.review_owner = user_id
+        if not session:
+            session.extend(deck.due_cards(user_id, REVIEW_SESSION_SIZE))
+            st.session_state.review_revealed = False
+        
+        stats = deck.stats(user_id)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("🗂️ Cards", stats['cards'])
+        with col2:
+            st.metric("⏰ Due now", stats['due'])
+        with col3:
+            st.metric("📋 This session", len(session))
+        
+        if not session:
+            next_due = deck.next_due(user_id)
+            if next_due is None:
+                st.info("No review cards yet. Generate a quiz or study notes to create some!")
+            else:
+                st.success(
+                    f"✅ All caught up! Next card is due "
+                    f"{datetime.fromtimestamp(next_due).strftime('%Y-%m-%d %H:%M')}."
+                )
+            return
+        
+        card = session[0]
+        item = card['item']
+        st.caption(f"📖 {card['topic']}{' · 🆕 new card' if card['new'] else ''}")
+        st.markdown(f"""
+        <div class="quiz-question">
+            <strong>{item['question']}</strong>
+        </div>
+        """, unsafe_allow_html=True)
+        for option in item.get('options', []):
+            st.write(f"• {option}")
+        
+        if not st.session_state.review_revealed:
+            if st.button("👀 Show Answer", type="primary", use_container_width=True):
+                st.session_state.review_revealed = True
+                st.rerun()
+            return
+        
+        st.markdown(f"**🔑 Answer:** {item['answer']}")
+        if item.get('explanation') or item.get('source'):
+            st.caption(item.get('explanation') or item.get('source'))
+        
+        st.markdown("**How well did you remember it?**")
+        labels = {"again": "❌ Again", "hard": "😓 Hard", "good": "🙂 Good", "easy": "😄 Easy"}
+        for col, (rating, label) in zip(st.columns(len(labels)), labels.items()):
+            with col:
+                if st.button(label, key=f"review_{rating}", use_container_width=True):
+                    deck.review(user_id, card['card_id'], ReviewDeck.QUALITY[rating])
+                    session.pop(0)
+                    st.session_state.review_revealed = False
+                    st.rerun()
+    
+    def display_usage_tips(self):
+        """Display helpful usage tips"""
+        with st.expander("💡 Usage Tips & Help"):
+            st.markdown("""
+            ### 🚀 Getting Started
+            1. **Get a Groq API Key**: Visit [console.groq.com](https://console.groq.com) to get your free API key
+            2. **Enter your API key** in the sidebar (it's stored securely in your session)
+            3. **Search for any topic** you want to learn about
+            
+            ### 🎯 Study Modes
+            - **📖 Research & Learn**: Get comprehensive information from Wikipedia
+            - **📝 Quiz Mode**: Generate personalized quizzes based on your content
+            - **📋 Study Notes**: Create structured, comprehensive study notes
+            - **🔗 Related Topics**: Discover connected topics for deeper learning
+            - **🧠 Review Cards**: Review questions and key terms from past quizzes and notes, spaced for long-term memory
+            
+            ### ⚙️ Pro Tips
+            - Use **specific topic names** for better results (e.g., "Photosynthesis" vs "plants")
+            - Try different **difficulty levels** to match your learning needs
+            - Use the **study history** to quickly revisit topics
+            - **Download your notes** for offline studying
+            
+            ### 🔧 Troubleshooting
+            - If you get rate limit errors, wait a few moments before trying again
+            - For "API key" errors, double-check your Groq API key
+            - If Wikipedia search fails, try alternative topic names
+            """)
+    
+    def run(self):
+        """Main application runner"""
+        instrumentation = get_instrumentation()
+        instrumentation.begin_trace()
+        try:
+            self.render_page()
+        finally:
+            # st.rerun() ends a run early by raising; keep its timings too
+            st.session_state.last_trace = instrumentation.end_trace()
+    
+    def render_page(self):
+        """Header, sidebar, topic input and the selected study mode"""
+        self.display_header()
+        
+        # Check if this is first run
+        if not st.session_state.get('groq_api_key'):
+            st.info("👋 **Welcome!** Please enter your Groq API key in the sidebar to get started. It's free at console.groq.com")
+        
+        # Sidebar
+        study_mode, difficulty, num_questions, restudy_topic = self.display_sidebar()
+        self.difficulty, self.num_questions = difficulty, num_questions
+        
+        # Main content area
+        col1, col2 = st.columns([4, 1])
+        
+        with col1:
+            topic_input = st.text_input(
+                "🎯 Enter a topic to study:",
+                placeholder="e.g., Machine Learning, Photosynthesis, Ancient Rome, Quantum Physics...",
+                value=restudy_topic if restudy_topic else ""
+            )
+        
+        with col2:
+            st.write("")  # Spacing for alignment
+            search_button = st.button("🔍 Start Learning", type="primary", use_container_width=True)
+        
+        # Usage tips
+        self.display_usage_tips()
+        
+        if st.session_state.open_artifact:
+            self.display_artifact(*st.session_state.open_artifact)
+        
+        # Process user input
+        if (search_button and topic_input) or restudy_topic:
+            current_topic = topic_input or restudy_topic
+            self.add_to_history(current_topic, study_mode)
+            
+            if "Research" in study_mode or "Review" in study_mode:
+                self.research_mode(current_topic)
+            elif "Quiz" in study_mode:
+                st.session_state.current_topic = current_topic
+                # First research, then show quiz
+                self.research_mode(current_topic)
+                if st.session_state.current_content:
+                    st.divider()
+                    self.quiz_mode(difficulty, num_questions)
+            elif "Notes" in study_mode:
+                st.session_state.current_topic = current_topic
+                self.research_mode(current_topic)
+                if st.session_state.current_content:
+                    st.divider()
+                    self.notes_mode()
+            elif "Related" in study_mode:
+                st.session_state.current_topic = current_topic
+                self.research_mode(current_topic)
+                if st.session_state.current_content:
+                    st.divider()
+                    self.related_topics_mode()
+        
+        # Reviews work from saved cards and need no researched topic
+        if study_mode == "🧠 Review Cards":
+            st.divider()
+            self.review_mode()
+        
+        # Handle mode-specific displays for current content
+        if st.session_state.current_content:
+            if study_mode == "📝 Quiz Mode" and not search_button:
+                st.divider()
+                self.quiz_mode(difficulty, num_questions)
+            
+            elif study_mode == "📋 Study Notes" and not search_button:
+                st.divider()
+                self.notes_mode()
+            
+            elif study_mode == "🔗 Related Topics" and not search_button:
+                st.divider()
+                self.related_topics_mode()
+        
+        # Handle action button states from research mode
+        if st.session_state.get('show_quiz'):
+            st.divider()
+            self.quiz_mode(difficulty, num_questions)
+            st.session_state.show_quiz = False
+        
+        if st.session_state.get('show_notes'):
+            st.divider()
+            self.notes_mode()
+            st.session_state.show_notes = False
+        
+        if st.session_state.get('show_related'):
+            st.divider()
+            self.related_topics_mode()
+            st.session_state.show_related = False
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from studyhelper import async_tools, tools
+from studyhelper.async_tools import AsyncStudyTools
+from studyhelper.groq_pool import GroqRateLimiter, RateLimitQueueTimeout
+from studyhelper.tools import StudyTools
+
+KEY = "gsk_test_key"
+TOKENS_PER_MINUTE = 60000
+MESSAGES = [{"role": "user", "content": "Explain photosynthesis."}]
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = GroqRateLimiter(requests_per_minute=60, tokens_per_minute=TOKENS_PER_MINUTE, max_retries=2, max_wait=5)
+    monkeypatch.setattr(tools, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(async_tools, "get_rate_limiter", lambda: limiter)
+    return limiter
+
+
+class RateLimited(Exception):
+    """A 429 as the groq package raises it, with an optional Retry-After header"""
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("Error code: 429 - rate limit reached")
+        self.response = SimpleNamespace(headers={} if retry_after is None else {"retry-after": str(retry_after)})
+
+
+def pooled(create):
+    """Stand-in for a leased client whose chat.completions.create is create"""
+    return SimpleNamespace(client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+
+
+def available_tokens(limiter, key=KEY):
+    bucket = limiter._bucket(key)
+    with bucket.condition:
+        bucket.refill(time.monotonic())
+        return bucket.tokens
+
+
+def test_settle_returns_unused_tokens_and_charges_shortfall(limiter):
+    limiter.acquire(KEY, 1000)
+    assert available_tokens(limiter) == pytest.approx(TOKENS_PER_MINUTE - 1000, abs=50)
+    limiter.settle(KEY, 1000, 300)
+    assert available_tokens(limiter) == pytest.approx(TOKENS_PER_MINUTE - 300, abs=50)
+    limiter.settle(KEY, 0, 200)
+    assert available_tokens(limiter) == pytest.approx(TOKENS_PER_MINUTE - 500, abs=50)
+    # Never refilled past capacity
+    limiter.settle(KEY, 5000, 0)
+    assert available_tokens(limiter) == TOKENS_PER_MINUTE
+
+
+def test_failed_request_gives_its_reservation_back(limiter):
+    def create(**kwargs):
+        assert available_tokens(limiter) < TOKENS_PER_MINUTE - 500
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        StudyTools._create_completion(pooled(create), KEY, MESSAGES, max_tokens=500, temperature=0)
+    assert available_tokens(limiter) == TOKENS_PER_MINUTE
+    assert limiter.stats(KEY)['granted'] == 1
+
+
+def test_unusable_response_gives_its_reservation_back(limiter):
+    limiter.acquire(KEY, 800)
+    with pytest.raises(IndexError):
+        StudyTools._completion_text(KEY, 800, SimpleNamespace(choices=[]), "Explain photosynthesis.")
+    assert available_tokens(limiter) == TOKENS_PER_MINUTE
+
+
+def test_cancelled_async_request_gives_its_reservation_back(limiter):
+    async def run():
+        sent = asyncio.Event()
+
+        async def create(**kwargs):
+            sent.set()
+            await asyncio.sleep(60)
+
+        study_tools = AsyncStudyTools()
+        study_tools.groq = SimpleNamespace(get=lambda api_key: pooled(create).client)
+        task = asyncio.create_task(study_tools._create_completion(KEY, MESSAGES, 500, 0))
+        await sent.wait()
+        assert available_tokens(limiter) < TOKENS_PER_MINUTE - 500
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert available_tokens(limiter) == TOKENS_PER_MINUTE
+
+
+def test_rate_limited_request_is_retried_after_retry_after(limiter):
+    attempts = []
+
+    def create(**kwargs):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RateLimited(retry_after=0.2)
+        return "response"
+
+    response, _, reserved = StudyTools._create_completion(pooled(create), KEY, MESSAGES, max_tokens=100, temperature=0)
+    assert response == "response"
+    assert attempts[1] - attempts[0] >= 0.2
+    assert available_tokens(limiter) == pytest.approx(TOKENS_PER_MINUTE - reserved, abs=50)
+    assert limiter.stats(KEY)['throttled'] == 1
+
+
+def test_rate_limit_retries_are_bounded(limiter):
+    attempts = []
+
+    def create(**kwargs):
+        attempts.append(1)
+        raise RateLimited(retry_after=0)
+
+    with pytest.raises(RateLimited):
+        StudyTools._create_completion(pooled(create), KEY, MESSAGES, max_tokens=100, temperature=0)
+    assert len(attempts) == limiter.max_retries + 1
+    assert available_tokens(limiter) == TOKENS_PER_MINUTE
+
+
+def test_429_blocks_every_caller_of_the_key(limiter):
+    delay = limiter.block(KEY, 0, retry_after=0.3)
+    assert 0.3 <= delay <= 0.55
+    assert limiter.try_acquire(KEY, 10) >= 0.25
+    assert limiter.try_acquire("gsk_other_key", 10) == 0
+
+    waits = []
+
+    def caller():
+        waits.append(limiter.acquire(KEY, 10))
+
+    threads = [threading.Thread(target=caller) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(waits) == 3 and min(waits) >= 0.25
+
+
+def test_backoff_without_retry_after_is_capped(limiter):
+    limiter.max_backoff = 0.5
+    assert all(0 <= limiter.block(KEY, attempt) <= 0.5 for attempt in range(10))
+
+
+def test_queue_timeout_when_wait_would_exceed_max_wait(limiter):
+    limiter.max_wait = 0.2
+    limiter.acquire(KEY, TOKENS_PER_MINUTE)  # drains the token bucket: 1000 tokens/s refill
+    started = time.monotonic()
+    with pytest.raises(RateLimitQueueTimeout):
+        limiter.acquire(KEY, 1000)
+    # The head of the queue knows it cannot be served in time, so it fails without waiting
+    assert time.monotonic() - started < 0.1
+    assert limiter.stats(KEY)['queue_depth'] == 0
+    # A wait that fits within max_wait is granted
+    assert 0 < limiter.acquire(KEY, 100) <= 0.2
+
+
+def test_queue_timeout_for_callers_queued_behind_the_head(limiter):
+    limiter.max_wait = 0.3
+    limiter.acquire(KEY, TOKENS_PER_MINUTE)
+    results = []
+
+    def head():
+        results.append(limiter.acquire(KEY, 250))
+
+    thread = threading.Thread(target=head)
+    thread.start()
+    time.sleep(0.05)
+    # Queued behind a head waiting ~0.25s, this caller runs out of time before reaching the front
+    limiter.max_wait = 0.1
+    with pytest.raises(RateLimitQueueTimeout):
+        limiter.acquire(KEY, 1)
+    thread.join()
+    assert len(results) == 1
+    assert limiter.stats(KEY)['queue_depth'] == 0
+
+
+def test_async_acquire_times_out(limiter):
+    limiter.max_wait = 0.2
+    limiter.acquire(KEY, TOKENS_PER_MINUTE)
+    with pytest.raises(RateLimitQueueTimeout):
+        asyncio.run(AsyncStudyTools._acquire(limiter, KEY, 1000))
+    asyncio.run(AsyncStudyTools._acquire(limiter, KEY, 100))
@@ -0,0 +1,95 @@
+import pytest
+
+from studyhelper.quiz import LocalGrader, quiz_item
+
+SOURCE = (
+    "Photosynthesis converts light energy into chemical energy stored in glucose. "
+    "Chlorophyll in the chloroplast absorbs mostly red and blue light. "
+    "The Calvin cycle fixes carbon dioxide using ATP and NADPH from the light reactions."
+)
+
+
+@pytest.fixture
+def grader():
+    return LocalGrader(SOURCE)
+
+
+@pytest.mark.parametrize("answer", [None, "", "   ", {}, {"chlorophyll": ""}])
+def test_unanswered(grader, answer):
+    item = quiz_item("Explain the role of chlorophyll.", "Chlorophyll absorbs light.", "open")
+    assert grader.grade_answer(item, answer)['verdict'] == "unanswered"
+
+
+def test_true_false(grader):
+    item = quiz_item("True or False: Chlorophyll absorbs green light.", "False", "true_false",
+                     explanation="Chlorophyll in the chloroplast absorbs mostly red and blue light.")
+    assert grader.grade_answer(item, "False")['verdict'] == "correct"
+    wrong = grader.grade_answer(item, "True")
+    assert (wrong['verdict'], wrong['score']) == ("incorrect", 0.0)
+    assert wrong['feedback'].startswith("The statement is false: Chlorophyll")
+
+
+def test_multiple_choice(grader):
+    item = quiz_item("Which pigment absorbs light?", "Chlorophyll", "multiple_choice",
+                     options=["Chlorophyll", "Glucose", "ATP", "NADPH"], source="")
+    assert grader.grade_answer(item, "Chlorophyll")['score'] == 1.0
+    wrong = grader.grade_answer(item, "Glucose")
+    assert wrong['verdict'] == "incorrect"
+    assert wrong['feedback'] == "The correct answer is: Chlorophyll."
+
+
+def test_matching_scores_each_pair(grader):
+    pairs = {"chlorophyll": "______ absorbs light.", "glucose": "______ stores energy.",
+             "ATP": "______ powers the Calvin cycle."}
+    item = quiz_item("Match each term with the statement it completes.", None, "matching", pairs=pairs)
+
+    assert grader.grade_answer(item, dict(pairs))['verdict'] == "correct"
+    partial = grader.grade_answer(item, {**pairs, "glucose": pairs["ATP"], "ATP": pairs["glucose"]})
+    assert (partial['verdict'], partial['score']) == ("partial", pytest.approx(1 / 3))
+    swapped = dict(zip(pairs, [pairs["glucose"], pairs["ATP"], pairs["chlorophyll"]]))
+    assert grader.grade_answer(item, swapped)['verdict'] == "incorrect"
+
+
+def test_cloze(grader):
+    item = quiz_item("Fill in the blank: ______ in the chloroplast absorbs light.", "Chlorophyll", "cloze")
+    assert grader.grade_answer(item, " chlorophyll ")['verdict'] == "correct"
+    assert grader.grade_answer(item, "chlorophyl")['verdict'] == "correct"
+    assert grader.grade_answer(item, "mitochondria")['verdict'] == "incorrect"
+    # Close enough to be a wrong-but-plausible answer: left to the AI
+    assert grader.grade_answer(item, "chloroplast") is None
+
+
+def test_open_answer_matching_reference_is_correct(grader):
+    item = quiz_item("Explain the role of chlorophyll.", "Chlorophyll absorbs red and blue light.", "open")
+    result = grader.grade_answer(item, "Chlorophyll absorbs the red and blue light")
+    assert (result['verdict'], result['score'], result['graded_by']) == ("correct", 1.0, "local")
+
+
+def test_open_answer_in_other_words_goes_to_ai(grader):
+    item = quiz_item("Explain the role of chlorophyll.", "Chlorophyll absorbs red and blue light.", "open")
+    # No content words in common with the reference, but not wrong: the AI decides
+    assert grader.grade_answer(item, "It is the green pigment plants use to capture sunlight") is None
+    assert grader.grade_answer(item, "Photosynthesis happens in leaves") is None
+
+
+@pytest.mark.parametrize("answer", ["x", "?!", "the", "it is"])
+def test_near_empty_open_answer_is_incorrect(grader, answer):
+    item = quiz_item("Explain the role of chlorophyll.", "Chlorophyll absorbs red and blue light.", "open")
+    result = grader.grade_answer(item, answer)
+    assert (result['verdict'], result['score']) == ("incorrect", 0.0)
+    assert result['feedback'].endswith("Key point: Chlorophyll absorbs red and blue light.")
+
+
+def test_open_answer_without_reference_uses_source_context(grader):
+    item = quiz_item("How does the Calvin cycle use ATP?", None, "short_answer")
+    assert "Calvin cycle" in grader.context(item['question'])
+    # Without a reference answer a local "correct" is never given
+    assert grader.grade_answer(item, "The Calvin cycle fixes carbon dioxide using ATP and NADPH") is None
+    assert grader.grade_answer(item, "?")['verdict'] == "incorrect"
+
+
+def test_without_content_undecided_answers_go_to_ai():
+    grader = LocalGrader("")
+    item = quiz_item("What is the main idea?", None, "open")
+    assert grader.grade_answer(item, "Plants make sugar from light") is None
+    assert grader.grade_answer(item, "no")['feedback'] == "The answer is too short to grade."
@@ -0,0 +1,94 @@
+import pytest
+
+from studyhelper.quiz import quiz_item
+from studyhelper.review import ReviewDeck
+
+DAY = 86400
+QUALITY = ReviewDeck.QUALITY
+
+
+@pytest.fixture
+def deck(tmp_path):
+    return ReviewDeck(str(tmp_path / "cards.sqlite3"))
+
+
+def reviews(*ratings, ease=ReviewDeck.INITIAL_EASE):
+    """SM-2 states after each of a sequence of ratings, from a new card"""
+    state, states = (ease, 0, 0), []
+    for rating in ratings:
+        state = ReviewDeck.schedule(*state, QUALITY[rating])
+        states.append(state)
+    return states
+
+
+def test_intervals_for_successful_reviews():
+    assert [(interval, repetitions) for _, interval, repetitions in reviews("good", "good", "good", "good")] == [
+        (1, 1), (6, 2), (15, 3), (38, 4)  # 6 * 2.5 = 15, round(15 * 2.5) = 38
+    ]
+
+
+@pytest.mark.parametrize("rating, change", [("easy", 0.1), ("good", 0.0), ("hard", -0.14), ("again", -0.54)])
+def test_ease_change_per_rating(rating, change):
+    (ease, _, _), = reviews(rating)
+    assert ease == pytest.approx(ReviewDeck.INITIAL_EASE + change)
+
+
+def test_interval_grows_with_ease():
+    # The interval is stretched by the ease from before the review, then the ease is updated
+    easy = reviews("easy", "easy", "easy")[-1]
+    hard = reviews("hard", "hard", "hard")[-1]
+    assert easy == (pytest.approx(2.8), round(6 * 2.7), 3)
+    assert hard == (pytest.approx(2.08), round(6 * 2.22), 3)
+
+
+def test_lapse_resets_repetitions_but_not_ease():
+    ease, interval, repetitions = reviews("good", "good", "good", "again")[-1]
+    assert (interval, repetitions) == (1, 0)
+    assert ease == pytest.approx(2.5 - 0.54)
+    # Relearning starts over at 1 and 6 days, with the lowered ease
+    assert [state[1] for state in reviews("again", "good", "good", "good")] == [1, 1, 6, round(6 * 1.96)]
+
+
+def test_ease_never_drops_below_minimum():
+    ease, _, _ = reviews(*["again"] * 5)[-1]
+    assert ease == ReviewDeck.MIN_EASE
+    assert ReviewDeck.schedule(ReviewDeck.MIN_EASE, 6, 2, QUALITY["good"]) == (ReviewDeck.MIN_EASE, 8, 3)
+
+
+def test_review_reschedules_card(deck):
+    items = [quiz_item("Fill in the blank: ______ absorbs light.", "Chlorophyll", "cloze"),
+             quiz_item("True or False: Plants make glucose.", "True", "true_false")]
+    assert deck.add_cards("u1", "Photosynthesis", items[:1], now=1000) == 1
+    assert deck.add_cards("u1", "Photosynthesis", items, now=1500) == 1
+    due = deck.due_cards("u1", now=1500)
+    assert [card['item'] for card in due] == items and all(card['new'] for card in due)
+    assert deck.due_cards("u1", now=1200) == due[:1]
+
+    card_id = due[0]['card_id']
+    assert deck.review("u1", card_id, QUALITY["good"], now=2000) == 2000 + DAY
+    assert deck.review("u1", card_id, QUALITY["good"], now=3000) == 3000 + 6 * DAY
+    assert [card['card_id'] for card in deck.due_cards("u1", now=3000)] == [due[1]['card_id']]
+    assert deck.next_due("u1") == 1500
+    assert deck.stats("u1", now=3000 + 6 * DAY) == {'cards': 2, 'due': 2}
+
+    # Re-adding an existing card keeps its progress
+    assert deck.add_cards("u1", "Photosynthesis", items[:1], now=4000) == 0
+    assert deck.review("u1", card_id, QUALITY["good"], now=5000) == 5000 + 15 * DAY
+
+
+def test_lapse_is_counted_and_due_next_day(deck):
+    item = quiz_item("Fill in the blank: ______ absorbs light.", "Chlorophyll", "cloze")
+    deck.add_cards("u1", "Photosynthesis", [item], now=0)
+    card_id = ReviewDeck.card_id("Photosynthesis", item)
+    deck.review("u1", card_id, QUALITY["good"], now=0)
+    assert deck.review("u1", card_id, QUALITY["again"], now=DAY) == 2 * DAY
+    lapses, = deck._connect().execute("SELECT lapses FROM cards WHERE card_id = ?", (card_id,)).fetchone()
+    assert lapses == 1
+
+
+def test_decks_are_per_user(deck):
+    item = quiz_item("Fill in the blank: ______ absorbs light.", "Chlorophyll", "cloze")
+    deck.add_cards("u1", "Photosynthesis", [item], now=0)
+    assert deck.due_cards("u2", now=0) == []
+    assert deck.review("u2", ReviewDeck.card_id("Photosynthesis", item), QUALITY["good"], now=0) is None
+    assert deck.stats("u2") == {'cards': 0, 'due': 0}
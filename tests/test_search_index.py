@@ -0,0 +1,126 @@
+import math
+
+import pytest
+
+from studyhelper.search_index import SearchIndex, decode_varints, encode_varints
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SearchIndex(str(tmp_path / "index.sqlite3"), flush_every=1000)
+
+
+def postings(index, term):
+    return index._connect().execute(
+        "SELECT segment, data FROM postings WHERE term = ? ORDER BY segment", (term,)
+    ).fetchall()
+
+
+def test_varints_round_trip():
+    values = [0, 1, 127, 128, 300, 16383, 16384, 2 ** 21, 2 ** 35 + 5]
+    assert decode_varints(encode_varints(values)) == values
+    assert decode_varints(b"") == []
+
+
+def test_varint_encoding_is_leb128():
+    assert encode_varints([0]) == b"\x00"
+    assert encode_varints([127]) == b"\x7f"
+    assert encode_varints([128]) == b"\x80\x01"
+    assert encode_varints([300, 1]) == b"\xac\x02\x01"
+
+
+def test_postings_are_delta_encoded():
+    entries = [(3, 1), (4, 2), (1000, 7), (1001, 130)]
+    data = SearchIndex._encode(entries)
+    assert decode_varints(data) == [3, 1, 1, 2, 996, 7, 1, 130]
+    assert list(SearchIndex._decode(data)) == entries
+
+
+def test_bm25_scores(index):
+    index.add("Alpha", "red red blue")
+    index.add("Beta", "red green green green green")
+    index.add("Gamma", "green blue yellow")
+    index.flush()
+
+    # Documents hold 3, 5 and 3 content words; title words add TITLE_WEIGHT each
+    lengths = {"Alpha": 3 + SearchIndex.TITLE_WEIGHT, "Beta": 5 + SearchIndex.TITLE_WEIGHT}
+    avg_length = (3 + 5 + 3 + 3 * SearchIndex.TITLE_WEIGHT) / 3
+    idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+
+    def bm25(tf, length):
+        norm = SearchIndex.K1 * (1 - SearchIndex.B + SearchIndex.B * length / avg_length)
+        return idf * tf * (SearchIndex.K1 + 1) / (tf + norm)
+
+    results = dict(index.search("red"))
+    assert set(results) == {"Alpha", "Beta"}
+    assert results["Alpha"] == pytest.approx(bm25(2, lengths["Alpha"]))
+    assert results["Beta"] == pytest.approx(bm25(1, lengths["Beta"]))
+
+
+def test_search_ranks_title_matches_first(index):
+    index.add("Mercury (planet)", "The smallest planet, closest to the Sun.")
+    index.add("Thermometer", "Older thermometers held mercury; mercury expands when heated.")
+    index.add("Venus", "The second planet from the Sun.")
+    assert [title for title, _ in index.search("mercury")] == ["Mercury (planet)", "Thermometer"]
+    assert index.resolve("Mercury") == "Mercury (planet)"
+    assert index.resolve("Jupiter") is None
+
+
+def test_search_flushes_pending_and_ignores_repeats(index):
+    index.add("Photosynthesis", "Plants turn light into sugar.")
+    assert index.stats() == {'documents': 0, 'pending': 1}
+    assert [title for title, _ in index.search("sugar")] == ["Photosynthesis"]
+    index.add("photosynthesis", "A different text about sugar.")
+    assert index.flush() == 0
+    assert index.stats() == {'documents': 1, 'pending': 0}
+
+
+def test_search_without_terms_or_documents(index):
+    assert index.search("sugar") == []
+    index.add("Photosynthesis", "Plants turn light into sugar.")
+    assert index.search("the of and") == []
+    assert index.search("zebra") == []
+
+
+def test_merge_combines_similar_sized_segments(index):
+    for i in range(4):
+        index.add(f"Doc {i}", "shared term")
+        index.flush()
+    assert len(postings(index, "shared")) == 4
+
+    conn = index._connect()
+    with conn:
+        index._merge(conn, "shared")
+    rows = postings(index, "shared")
+    assert [segment for segment, _ in rows] == [1]
+    assert [doc_id for doc_id, _ in SearchIndex._decode(rows[0][1])] == [1, 2, 3, 4]
+    assert conn.execute("SELECT df, segments FROM terms WHERE term = 'shared'").fetchone() == (4, 1)
+
+
+def test_merge_leaves_a_much_larger_older_segment_alone(index):
+    for i in range(40):
+        index.add(f"Old {i}", "shared")
+    index.flush()
+    for i in range(2):
+        index.add(f"New {i}", "shared")
+        index.flush()
+
+    conn = index._connect()
+    with conn:
+        index._merge(conn, "shared")
+    rows = postings(index, "shared")
+    assert [segment for segment, _ in rows] == [1, 41]
+    assert [doc_id for doc_id, _ in SearchIndex._decode(rows[1][1])] == [41, 42]
+    assert conn.execute("SELECT segments FROM terms WHERE term = 'shared'").fetchone() == (2,)
+
+
+def test_flush_keeps_segments_bounded(index):
+    index.MAX_SEGMENTS = 3
+    for i in range(30):
+        index.add(f"Doc {i}", "shared words")
+        index.flush()
+    rows = postings(index, "shared")
+    assert len(rows) <= index.MAX_SEGMENTS
+    doc_ids = [doc_id for _, data in rows for doc_id, _ in SearchIndex._decode(data)]
+    assert doc_ids == list(range(1, 31))
+    assert len(index.search("shared", limit=50)) == 30
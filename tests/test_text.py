@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from studyhelper.config import GROQ_CONTEXT_TOKENS, SYSTEM_PROMPT
+from studyhelper.text import JSONObjectStream, PromptPacker, estimate_tokens
+
+LEAD = "Photosynthesis converts light energy into chemical energy in plants."
+FILLER = "The weather was pleasant on the day of the meeting in the old town hall."
+
+
+def article(repeats=40):
+    salient = [
+        "Chlorophyll absorbs light energy for photosynthesis in plants.",
+        "Plants store the chemical energy from photosynthesis as glucose.",
+    ]
+    return " ".join([LEAD] + (salient + [FILLER]) * repeats)
+
+
+def test_budget_subtracts_template_system_prompt_and_completion():
+    overhead = 100 + estimate_tokens(SYSTEM_PROMPT) + PromptPacker.SAFETY_MARGIN
+    assert PromptPacker.budget(100, 1000) == GROQ_CONTEXT_TOKENS - 1000 - overhead
+    assert PromptPacker.budget(100, GROQ_CONTEXT_TOKENS) == 0
+
+
+def test_pack_keeps_content_that_fits():
+    content = article(2)
+    for budget in (estimate_tokens(content), estimate_tokens(content) + 1000):
+        report = PromptPacker.pack(content, budget)
+        assert report['text'] == content
+        assert (report['kept_sentences'], report['dropped_sentences'], report['dropped_chars']) == (None, 0, 0)
+
+
+def test_pack_keeps_salient_sentences_in_order_within_budget():
+    content = article()
+    budget = estimate_tokens(content) // 3
+    report = PromptPacker.pack(content, budget)
+
+    text = report['text']
+    assert report['estimated_tokens'] == estimate_tokens(text) <= budget
+    assert text.startswith(LEAD)
+    assert FILLER not in text
+    assert report['kept_sentences'] + report['dropped_sentences'] == 1 + 3 * 40
+    assert report['dropped_chars'] == len(content) - len(text)
+    # Kept sentences appear in their original order
+    positions = [content.index(sentence) for sentence in text.split(". ")[:3]]
+    assert positions == sorted(positions)
+
+
+def test_pack_cuts_a_single_oversized_sentence():
+    content = " ".join(["word"] * 2000)
+    report = PromptPacker.pack(content, 100)
+    assert 0 < report['estimated_tokens'] <= 100
+    assert content.startswith(report['text'])
+    assert report['kept_sentences'] == 1
+
+
+def test_pack_with_no_budget_returns_nothing():
+    report = PromptPacker.pack(article(), 0)
+    assert report['text'] == ""
+    assert report['estimated_tokens'] == 0
+
+
+def test_fill_fits_the_context_window():
+    template = f"Write notes about photosynthesis.\n\nSource:\n{PromptPacker.SLOT}\n\nUse plain text."
+    prompt, report = PromptPacker.fill(template, article(400), max_tokens=2000)
+    assert PromptPacker.SLOT not in prompt
+    assert report['text'] in prompt and report['dropped_sentences'] > 0
+    assert estimate_tokens(prompt) + estimate_tokens(SYSTEM_PROMPT) + 2000 <= GROQ_CONTEXT_TOKENS
+
+
+def test_fill_short_content_unchanged():
+    prompt, report = PromptPacker.fill(f"Quiz on:\n{PromptPacker.SLOT}", LEAD, max_tokens=1200)
+    assert prompt == f"Quiz on:\n{LEAD}"
+    assert report['kept_sentences'] is None
+
+
+def test_json_stream_objects_split_across_chunks():
+    stream = JSONObjectStream()
+    reply = '[{"question": "Q1?", "answer": "A"}, {"question": "Q2?", "answer": "B"}]'
+    completed = []
+    for start in range(0, len(reply), 7):
+        completed.extend(stream.feed(reply[start:start + 7]))
+    assert completed == json.loads(reply)
+    assert stream.text == reply
+
+
+def test_json_stream_ignores_braces_and_quotes_inside_strings():
+    stream = JSONObjectStream()
+    objects = stream.feed('{"question": "What does {x} mean in \\"f(x)\\"?", "answer": "}"}')
+    assert objects == [{"question": 'What does {x} mean in "f(x)"?', "answer": "}"}]
+
+
+def test_json_stream_yields_nested_objects_innermost_first():
+    stream = JSONObjectStream()
+    objects = stream.feed('Here you go:\n```json\n{"questions": [{"q": 1}, {"q": 2}]}\n```')
+    assert objects == [{"q": 1}, {"q": 2}, {"questions": [{"q": 1}, {"q": 2}]}]
+
+
+@pytest.mark.parametrize("reply", ['{"q": 1,}', '{q: 1}', '{"q": 1', 'no json here }'])
+def test_json_stream_skips_invalid_or_unfinished_objects(reply):
+    stream = JSONObjectStream()
+    assert stream.feed(reply) == []
+    assert stream.feed(' {"q": 2}') == [{"q": 2}]